@@ -4,6 +4,7 @@ from html import escape
 
 from utils import admin_required, error_notificator
 from utils.admin_btns import get_admin_keyboard
+from utils.search_cache import bump_catalog_version
 from database import Movie, Genre, Countries, QualityEnum, LanguageEnum
 
 
@@ -613,6 +614,7 @@ async def save_data(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 movie_quality=context.user_data.get('quality'),
                 movie_language=context.user_data.get('language')
             )
+            await bump_catalog_version(movie.movie_id)
 
             genre_ids = context.user_data.get('genres', [])
             if genre_ids:
@@ -28,6 +28,8 @@ from telegram.error import TelegramError
 from telegram.ext import ContextTypes
 
 from database import BackupSettings
+from utils.redis_manager import PRIORITY_ALERTS
+from utils.search_cache import bump_catalog_version
 from utils.settings import (
     ADMIN_ID,
     MANAGER_ID,
@@ -247,7 +249,7 @@ async def send_backup(bot, chat_ids, *, reason: str = "Qo'lda") -> tuple[int, st
             )
             for cid in chat_ids:
                 try:
-                    await bot.send_message(chat_id=cid, text=warn, parse_mode="HTML")
+                    await bot.send_message(chat_id=cid, text=warn, parse_mode="HTML", priority=PRIORITY_ALERTS)
                 except TelegramError as e:
                     logger.error("Zaxira ogohlantirishini %s ga yuborib bo'lmadi: %s", cid, e)
             return 0, path.name
@@ -719,6 +721,8 @@ async def restore_confirm_callback(update: Update, context: ContextTypes.DEFAULT
             success, message = False, "Noma'lum fayl formati"
 
         if success:
+            # Butun katalog almashdi — qidiruv keshi eskirgan
+            await bump_catalog_version()
             await context.bot.send_message(
                 chat_id=query.message.chat_id,
                 text=(
@@ -1,7 +1,6 @@
 import asyncio
 import logging
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.error import Forbidden, BadRequest, RetryAfter
 from telegram.ext import (
     ConversationHandler, MessageHandler, CallbackQueryHandler,
     CommandHandler, ContextTypes, filters,
@@ -9,6 +8,7 @@ from telegram.ext import (
 
 from database import User
 from utils import admin_required, ADMIN_ID
+from utils.redis_manager import ENQUEUE_CHUNK, PRIORITY_BULK, blocked_among, enqueue_batch, set_queue_priority
 from utils.admin_btns import get_admin_keyboard
 
 logger = logging.getLogger(__name__)
@@ -35,7 +35,7 @@ async def receive_broadcast(update: Update, context: ContextTypes.DEFAULT_TYPE):
     context.user_data['broadcast_chat_id'] = update.message.chat_id
 
     # Foydalanuvchilar sonini olish
-    total_users = await User.all().count()
+    total_users = await User.filter(is_blocked=False).count()
 
     keyboard = InlineKeyboardMarkup([
         [
@@ -56,56 +56,55 @@ async def receive_broadcast(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 
 async def _broadcast_worker(bot, from_chat_id: int, msg_id: int, status_chat_id: int, status_msg_id: int):
-    """Background task: barcha userlarga xabar yuborish"""
-    # Faqat ID'larni yuklaymiz (butun User obyektlari emas) — xotira tejaladi
-    user_ids = await User.all().values_list("telegram_id", flat=True)
+    """Background task: xabarni barcha userlar uchun navbatga qo'yish.
+
+    Yuborishning o'zini worker bajaradi (Telegram limitlari, flood-limit va
+    qayta urinishlar o'sha yerda) — bu yerda faqat copy_message payloadlari
+    ENQUEUE_CHUNK donadan bitta round-trip'da Redis'ga yoziladi.
+    """
+    # Task handler kontekstini (interactive) meros oladi — progress xabarlari
+    # foydalanuvchilar javoblarini to'smasligi uchun bulk navbatga o'tamiz.
+    set_queue_priority(PRIORITY_BULK)
+    # Faqat ID'larni yuklaymiz (butun User obyektlari emas) — xotira tejaladi.
+    # Botni bloklaganlar umuman olinmaydi.
+    user_ids = await User.filter(is_blocked=False).values_list("telegram_id", flat=True)
     total = len(user_ids)
-    sent = 0
-    blocked = 0
+    queued = 0
+    failed = 0
+    skipped = 0
 
-    for i, telegram_id in enumerate(user_ids):
+    for start in range(0, total, ENQUEUE_CHUNK):
+        chunk = user_ids[start:start + ENQUEUE_CHUNK]
         try:
-            await bot.copy_message(
-                chat_id=telegram_id,
+            # DB'ga hali yozilmagan (worker yaqinda belgilagan) bloklanganlar
+            blocked = await blocked_among(chunk)
+            if blocked:
+                chunk = [telegram_id for telegram_id in chunk if telegram_id not in blocked]
+                skipped += len(blocked)
+
+            queued += await enqueue_batch(
+                "copy_message",
+                ((telegram_id, None) for telegram_id in chunk),
+                priority=PRIORITY_BULK,
                 from_chat_id=from_chat_id,
                 message_id=msg_id,
             )
-            sent += 1
-        except RetryAfter as e:
-            # Telegram flood-limit: kutib, shu userga qayta urinamiz
-            await asyncio.sleep(int(getattr(e, "retry_after", 1)) + 1)
-            try:
-                await bot.copy_message(
-                    chat_id=telegram_id,
-                    from_chat_id=from_chat_id,
-                    message_id=msg_id,
-                )
-                sent += 1
-            except Exception:
-                blocked += 1
-        except (Forbidden, BadRequest):
-            blocked += 1
         except Exception as e:
-            logger.warning("Broadcast: %s ga yuborilmadi: %s", telegram_id, e)
-            blocked += 1
-
-        # Progress: har 50 ta userda yangilash
-        if (i + 1) % 50 == 0 or (i + 1) == total:
-            try:
-                await bot.edit_message_text(
-                    chat_id=status_chat_id,
-                    message_id=status_msg_id,
-                    text=(
-                        f"📤 <b>Yuborilmoqda...</b>\n\n"
-                        f"📊 {i + 1}/{total} | ✅ {sent} | ❌ {blocked}"
-                    ),
-                    parse_mode="HTML",
-                )
-            except Exception:
-                pass
-
-        # Telegram rate limit dan himoya
-        await asyncio.sleep(0.05)
+            logger.error("Broadcast: %s ta xabar navbatga qo'yilmadi: %s", len(chunk), e)
+            failed += len(chunk)
+
+        try:
+            await bot.edit_message_text(
+                chat_id=status_chat_id,
+                message_id=status_msg_id,
+                text=(
+                    f"📤 <b>Navbatga qo'yilmoqda...</b>\n\n"
+                    f"📊 {queued + failed + skipped}/{total} | ✅ {queued} | ⛔ {skipped} | ❌ {failed}"
+                ),
+                parse_mode="HTML",
+            )
+        except Exception:
+            pass
 
     # Yakuniy natija
     try:
@@ -113,10 +112,12 @@ async def _broadcast_worker(bot, from_chat_id: int, msg_id: int, status_chat_id:
             chat_id=status_chat_id,
             message_id=status_msg_id,
             text=(
-                f"✅ <b>Yuborish yakunlandi!</b>\n\n"
+                f"✅ <b>Xabar navbatga qo'yildi!</b>\n\n"
                 f"📊 Jami: {total}\n"
-                f"✅ Yuborildi: {sent}\n"
-                f"❌ Blok/xato: {blocked}"
+                f"📤 Navbatda: {queued}\n"
+                f"⛔ Bloklagan: {skipped}\n"
+                f"❌ Xato: {failed}\n\n"
+                f"Worker Telegram limitlari doirasida yuboradi."
             ),
             parse_mode="HTML",
         )
@@ -136,14 +137,14 @@ async def confirm_broadcast(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await query.edit_message_text("❌ Xato: xabar topilmadi.")
         return ConversationHandler.END
 
-    total = await User.all().count()
+    total = await User.filter(is_blocked=False).count()
 
     # Status xabari — query.message dan chat_id va message_id olamiz
     status_chat_id = query.message.chat_id
     status_msg_id = query.message.message_id
 
     await query.edit_message_text(
-        f"📤 <b>Yuborilmoqda...</b>\n\n"
+        f"📤 <b>Navbatga qo'yilmoqda...</b>\n\n"
         f"📊 0/{total} | ✅ 0 | ❌ 0",
         parse_mode="HTML",
     )
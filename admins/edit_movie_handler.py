@@ -4,6 +4,7 @@ from telegram.ext import ContextTypes, ConversationHandler, CallbackQueryHandler
 from database import Countries, Genre, LanguageEnum, Movie, QualityEnum
 from utils.decorators import admin_required
 from utils import error_notificator, get_movies_page
+from utils.search_cache import bump_catalog_version
 from admins.movie_handlers import get_movies_keyboard
 
 SELECTING_ACTION, WAITING_INPUT, SELECTING_PART_ACTION, \
@@ -90,6 +91,7 @@ async def _prepare_add_part(movie_id: int, context: ContextTypes.DEFAULT_TYPE) -
         # Ota-kinoning file_id ni tozalash (container bo'ladi)
         movie.file_id = None
         await movie.save()
+        await bump_catalog_version(movie.movie_id)
         context.user_data['add_part_number_auto'] = 2
     else:
         # Keyingi qism raqamini hisoblash
@@ -251,6 +253,7 @@ async def select_field_callback(update: Update, context: ContextTypes.DEFAULT_TY
         movie = await Movie.get_or_none(movie_id=movie_id)
         if movie:
             await movie.delete()
+            await bump_catalog_version(movie.movie_id)
             if query.message.caption:
                 await query.edit_message_caption("🗑 <b>Kino muvaffaqiyatli o'chirildi!</b>", parse_mode="HTML", reply_markup=None)
             else:
@@ -389,6 +392,7 @@ async def select_field_callback(update: Update, context: ContextTypes.DEFAULT_TY
             msg = f"✅ Til o'zgartirildi: {val}"
 
         await movie.save()
+        await bump_catalog_version(movie.movie_id)
         await query.answer(msg, show_alert=True)
         # Menyuga qaytish
         return await start_edit_movie(update, context, movie_id=movie_id)
@@ -441,6 +445,7 @@ async def select_field_callback(update: Update, context: ContextTypes.DEFAULT_TY
         part = await Movie.get_or_none(movie_id=part_movie_id)
         if part and part.parent_movie_id:
             await part.delete()
+            await bump_catalog_version(part.movie_id)
             await query.answer("🗑 Qism o'chirildi!", show_alert=True)
         else:
             await query.answer("⚠️ Qism topilmadi.", show_alert=True)
@@ -592,6 +597,7 @@ async def receive_new_value(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return WAITING_INPUT
 
         await movie.save()
+        await bump_catalog_version(movie.movie_id)
 
         # Muvaffaqiyatli saqlandi -> Menyuga qaytish (xabarni yangilash)
         return await start_edit_movie(update, context, movie_id)
@@ -619,6 +625,7 @@ async def receive_part_video(update: Update, context: ContextTypes.DEFAULT_TYPE)
             return ConversationHandler.END
         movie.file_id = file_id
         await movie.save()
+        await bump_catalog_version(movie.movie_id)
         await update.message.reply_text("✅ Video muvaffaqiyatli saqlandi!")
         return await start_edit_movie(update, context, movie_id)
 
@@ -713,6 +720,7 @@ async def create_part_movie_helper(update: Update, context: ContextTypes.DEFAULT
     # M2M fieldlarni nusxalash (Har doim nusxalanadi)
     await new_part.movie_genre.add(*await movie.movie_genre.all())
     await new_part.movie_country.add(*await movie.movie_country.all())
+    await bump_catalog_version(new_part.movie_id)
 
     msg_text = (
         f"✅ <b>{part_number}-qism</b> muvaffaqiyatli qo'shildi!\n\n"
@@ -1,4 +1,5 @@
 import asyncio
+import logging
 import os
 from datetime import datetime
 from telegram import Update
@@ -7,7 +8,14 @@ from telegram.ext import ContextTypes
 
 from database import Movie
 from utils import admin_required, ADMIN_ID
-from utils.redis_manager import _original_send_video, _original_delete_message
+from utils.redis_manager import (
+    PRIORITY_BULK, QueuedSendError, _original_send_video, _original_delete_message, set_queue_priority,
+)
+
+logger = logging.getLogger(__name__)
+
+# Holat xabarining message_id'sini shuncha soniya kutamiz
+STATUS_WAIT_TIMEOUT = 10
 
 
 @admin_required
@@ -16,24 +24,34 @@ async def file_check_handler(update: Update, context: ContextTypes.DEFAULT_TYPE)
     chat_id = update.effective_chat.id
     admin_id = update.effective_user.id
 
-    # direct=True — Redis ni chetlab o'tish, chunki bizga message_id kerak
-    status_msg = await context.bot.send_message(
-        chat_id=chat_id,
-        text=(
-            "🔍 <b>Tekshirish boshlanmoqda...</b>\n\n"
-            "Barcha kinolarning video fayllari tekshirilmoqda.\n"
-            "Bu biroz vaqt olishi mumkin."
-        ),
-        parse_mode="HTML",
-        direct=True,  # type: ignore
-    )
+    # wait=True — navbat orqali yuboriladi, lekin message_id kerakligi uchun
+    # worker yuborgan Message qaytguncha kutiladi. Natija kelmasa ham tekshiruv
+    # boshlanadi — progress ko'rsatilmaydi, yakuniy natija yangi xabar bo'ladi.
+    status_msg_id = None
+    try:
+        status_msg = await context.bot.send_message(
+            chat_id=chat_id,
+            text=(
+                "🔍 <b>Tekshirish boshlanmoqda...</b>\n\n"
+                "Barcha kinolarning video fayllari tekshirilmoqda.\n"
+                "Bu biroz vaqt olishi mumkin."
+            ),
+            parse_mode="HTML",
+            wait=True,  # type: ignore
+            wait_timeout=STATUS_WAIT_TIMEOUT,  # type: ignore
+        )
+        status_msg_id = status_msg.message_id
+    except TimeoutError:
+        logger.info("⏳ Tekshiruv holat xabari navbatda kutmoqda — progress ko'rsatilmaydi")
+    except QueuedSendError as e:
+        logger.warning("⚠️ Tekshiruv holat xabarini yuborib bo'lmadi: %s", e)
 
     # Background task ishga tushirish
     asyncio.create_task(
         _check_files_worker(
             bot=context.bot,
             status_chat_id=chat_id,
-            status_msg_id=status_msg.message_id,
+            status_msg_id=status_msg_id,
             admin_id=admin_id,
         )
     )
@@ -134,8 +152,20 @@ async def _check_single_file(bot, admin_id: int, file_id: str, max_retries: int
     return None, "Max retries exceeded"
 
 
-async def _check_files_worker(bot, status_chat_id: int, status_msg_id: int, admin_id: int):
+async def _show_status(bot, chat_id: int, msg_id: int | None, text: str, **kwargs):
+    """Holat xabarini yangilash; u yo'q bo'lsa (message_id kelmagan) — yangi xabar."""
+    try:
+        if msg_id:
+            await bot.edit_message_text(chat_id=chat_id, message_id=msg_id, text=text, **kwargs)
+        else:
+            await bot.send_message(chat_id=chat_id, text=text, **kwargs)
+    except Exception:
+        pass
+
+
+async def _check_files_worker(bot, status_chat_id: int, status_msg_id: int | None, admin_id: int):
     """Background task: barcha kinolarning file_id sini tekshirish"""
+    set_queue_priority(PRIORITY_BULK)
     movies = await Movie.filter(file_id__isnull=False, parent_movie_id__isnull=True).order_by('movie_code')
     parts = await Movie.filter(file_id__isnull=False, parent_movie_id__isnull=False).order_by('parent_movie_id', 'part_number')
 
@@ -144,14 +174,7 @@ async def _check_files_worker(bot, status_chat_id: int, status_msg_id: int, admi
     total = len(all_movies)
 
     if total == 0:
-        try:
-            await bot.edit_message_text(
-                chat_id=status_chat_id,
-                message_id=status_msg_id,
-                text="📭 Tekshirish uchun kino topilmadi.",
-            )
-        except Exception:
-            pass
+        await _show_status(bot, status_chat_id, status_msg_id, "📭 Tekshirish uchun kino topilmadi.")
         return
 
     valid = 0
@@ -172,7 +195,7 @@ async def _check_files_worker(bot, status_chat_id: int, status_msg_id: int, admi
             skipped += 1
 
         # Progress: har 30 ta kinoda yangilash
-        if (i + 1) % 30 == 0 or (i + 1) == total:
+        if status_msg_id and ((i + 1) % 30 == 0 or (i + 1) == total):
             try:
                 await bot.edit_message_text(
                     chat_id=status_chat_id,
@@ -221,15 +244,7 @@ async def _check_files_worker(bot, status_chat_id: int, status_msg_id: int, admi
                 f.write(f"{item['detail']}\n")
                 f.write(f"  Xato: {item.get('error', 'Nomalum')}\n\n")
 
-        try:
-            await bot.edit_message_text(
-                chat_id=status_chat_id,
-                message_id=status_msg_id,
-                text=result_text,
-                parse_mode="HTML",
-            )
-        except Exception:
-            pass
+        await _show_status(bot, status_chat_id, status_msg_id, result_text, parse_mode="HTML")
 
         # TXT faylni yuborish
         try:
@@ -259,12 +274,4 @@ async def _check_files_worker(bot, status_chat_id: int, status_msg_id: int, admi
             f"{skipped_text}\n\n"
             f"Hech qanday yaroqsiz fayl topilmadi. 🎉"
         )
-        try:
-            await bot.edit_message_text(
-                chat_id=status_chat_id,
-                message_id=status_msg_id,
-                text=result_text,
-                parse_mode="HTML",
-            )
-        except Exception:
-            pass
+        await _show_status(bot, status_chat_id, status_msg_id, result_text, parse_mode="HTML")
@@ -19,6 +19,7 @@ from telegram.ext import (
 from database import Movie
 from utils.decorators import admin_required
 from utils import get_linked_series_page
+from utils.search_cache import bump_catalog_version
 from utils.admin_btns import get_admin_keyboard
 
 
@@ -308,6 +309,7 @@ async def ls_confirm_root(update: Update, context: ContextTypes.DEFAULT_TYPE):
         is_linked_series=True,
         file_id=None,
     )
+    await bump_catalog_version(root.movie_id)
 
     if query.message.caption is not None:
         await query.edit_message_caption(f"✅ <b>{escape(root.movie_name)}</b> yaratildi.", parse_mode="HTML", reply_markup=None)
@@ -344,12 +346,13 @@ async def ls_receive_link(update: Update, context: ContextTypes.DEFAULT_TYPE):
     root = await Movie.get_or_none(movie_id=root_id)
     next_num = await Movie.filter(parent_movie_id=root_id).count() + 1
 
-    await Movie.create(
+    part = await Movie.create(
         parent_movie_id=root_id,
         part_number=next_num,
         watch_url=text,
         movie_name=f"{root.movie_name} - {next_num}-qism" if root else f"{next_num}-qism",
     )
+    await bump_catalog_version(part.movie_id)
 
     await _update_collect_msg(
         context, chat_id,
@@ -425,6 +428,7 @@ async def ls_receive_link_edit(update: Update, context: ContextTypes.DEFAULT_TYP
     if part:
         part.watch_url = text
         await part.save()
+        await bump_catalog_version(part.movie_id)
         confirm_text = f"✅ <b>{part.part_number}-qism havolasi yangilandi.</b>"
     else:
         confirm_text = "⚠️ Qism topilmadi."
@@ -569,6 +573,7 @@ async def ls_edit_menu_callback(update: Update, context: ContextTypes.DEFAULT_TY
         movie = await Movie.get_or_none(movie_id=movie_id)
         if movie:
             await movie.delete()
+            await bump_catalog_version(movie.movie_id)
         await _ls_edit_message(query, "🗑 <b>Link serial muvaffaqiyatli o'chirildi!</b>", None)
         await context.bot.send_message(update.effective_chat.id, "Admin panel:", reply_markup=get_admin_keyboard(update.effective_chat.id))
         context.user_data.clear()
@@ -612,6 +617,7 @@ async def ls_edit_menu_callback(update: Update, context: ContextTypes.DEFAULT_TY
         movie_id = context.user_data.get('ls_edit_id')
         if part and part.parent_movie_id:
             await part.delete()
+            await bump_catalog_version(part.movie_id)
             await query.answer("🗑 Qism o'chirildi!", show_alert=True)
         else:
             await query.answer("⚠️ Qism topilmadi.", show_alert=True)
@@ -676,6 +682,7 @@ async def ls_receive_edit_value(update: Update, context: ContextTypes.DEFAULT_TY
         movie.movie_description = new_value
 
     await movie.save()
+    await bump_catalog_version(movie.movie_id)
     return await ls_view(update, context, movie_id=movie_id)
 
 
@@ -702,6 +709,7 @@ async def ls_receive_edit_poster(update: Update, context: ContextTypes.DEFAULT_T
 
     movie.poster_file_id = photo
     await movie.save()
+    await bump_catalog_version(movie.movie_id)
     return await ls_view(update, context, movie_id=movie_id)
 
 
@@ -727,15 +735,17 @@ async def ls_receive_edit_link(update: Update, context: ContextTypes.DEFAULT_TYP
         if part:
             part.watch_url = text
             await part.save()
+            await bump_catalog_version(part.movie_id)
     else:
         root = await Movie.get_or_none(movie_id=movie_id)
         next_num = await Movie.filter(parent_movie_id=movie_id).count() + 1
-        await Movie.create(
+        part = await Movie.create(
             parent_movie_id=movie_id,
             part_number=next_num,
             watch_url=text,
             movie_name=f"{root.movie_name} - {next_num}-qism" if root else f"{next_num}-qism",
         )
+        await bump_catalog_version(part.movie_id)
 
     context.user_data.pop('ls_editing_part_id', None)
     return await ls_view(update, context, movie_id=movie_id)
@@ -1,6 +1,7 @@
 import asyncio
 import logging
 from datetime import datetime, timedelta
+from html import escape
 from pathlib import Path
 from tempfile import gettempdir
 
@@ -10,6 +11,12 @@ from tortoise import Tortoise
 
 from database import Channels, ChannelSubscription, Countries, Genre, Movie, Rating, User, UserMovieHistory
 from utils import admin_required, error_notificator
+from utils.queue_metrics import histogram_quantile
+from utils.search_cache import cache_stats
+from utils.redis_manager import (
+    PRIORITY_QUEUES, acquire_replay_lock, count_dead_letters, dead_letter_reason_key, dead_letter_summary,
+    dead_letters, queue_metrics, release_replay_lock, replay_dead_letters,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -40,6 +47,11 @@ def _stats_menu_keyboard() -> InlineKeyboardMarkup:
             [InlineKeyboardButton("🤝 Referallar", callback_data="stats_referral")],
             [InlineKeyboardButton("📢 Kanal obunachilari", callback_data="stats_channels")],
             [InlineKeyboardButton("📊 Grafik hisobot", callback_data="stats_chart_menu")],
+            [InlineKeyboardButton("📮 Yetkazilmagan xabarlar", callback_data="stats_dead")],
+            [
+                InlineKeyboardButton("🚦 Navbat holati", callback_data="stats_queue"),
+                InlineKeyboardButton("🔎 Qidiruv", callback_data="stats_search"),
+            ],
             [InlineKeyboardButton("🔄 Yangilash", callback_data="stats_refresh")],
         ]
     )
@@ -248,6 +260,198 @@ async def _channels_text() -> str:
     )
 
 
+def _fmt_seconds(value: float | None) -> str:
+    if value is None:
+        return "—"
+    return f"{value * 1000:.0f} ms" if value < 1 else f"{value:.1f} s"
+
+
+async def _queue_text() -> str:
+    data = await queue_metrics()
+    if data is None:
+        return (
+            "🚦 <b>Statistika — Navbat holati</b>\n\n"
+            "Hozir ishlayotgan worker topilmadi (oxirgi daqiqada metrika yozilmagan)."
+        )
+
+    gauges = data["gauges"]
+    rates = data["rates"]
+    counters = data["counters"]
+
+    def per_min(name: str) -> float:
+        return sum(rates.get(name, {}).values())
+
+    def total(name: str) -> int:
+        return sum(counters.get(name, {}).values())
+
+    lanes = "\n".join(
+        f"• {name}: <b>{gauges.get(f'queue_depth:{name}', 0)}</b> navbatda, "
+        f"{gauges.get(f'queue_delayed:{name}', 0)} kechiktirilgan"
+        + (f", {gauges[f'queue_pending:{name}']} ishlanmoqda" if f"queue_pending:{name}" in gauges else "")
+        for name in PRIORITY_QUEUES
+    )
+
+    latency_lines = []
+    for method, hist in sorted(data["hist"].get("enqueue_to_send_seconds", {}).items()):
+        request = data["hist"].get("telegram_request_seconds", {}).get(method)
+        latency_lines.append(
+            f"• {method}: p50 <b>{_fmt_seconds(histogram_quantile(hist, 0.5))}</b>, "
+            f"p99 {_fmt_seconds(histogram_quantile(hist, 0.99))}"
+            + (f" | API p50 {_fmt_seconds(histogram_quantile(request, 0.5))}" if request else "")
+        )
+
+    return (
+        "🚦 <b>Statistika — Navbat holati</b>\n\n"
+        f"👷 Worker'lar: <b>{data['workers']}</b> | "
+        f"bufferda: {gauges.get('lanes_buffered', 0)} ({gauges.get('lanes_active', 0)} chat)\n\n"
+        f"<b>Navbatlar:</b>\n{lanes}\n"
+        f"📮 Dead-letter: {gauges.get('dead_letters', 0)}\n"
+        f"🌐 HTTP pul: {gauges.get('http_in_flight', 0)}/{gauges.get('http_pool_size', 0)} band "
+        f"(eng ko'pi {gauges.get('http_in_flight_peak', 0)}), pool timeout: {total('pool_timeouts')}\n\n"
+        "<b>Oxirgi daqiqada:</b>\n"
+        f"✅ Yuborildi: <b>{per_min('sent'):.0f}</b>/daq\n"
+        f"🐢 Flood-limit (429): {per_min('retry_after'):.0f}/daq\n"
+        f"🔁 Qayta urinish: {per_min('retries'):.0f}/daq\n\n"
+        "<b>Ishga tushgandan beri:</b>\n"
+        f"✅ {total('sent')} | 🐢 {total('retry_after')} | 🔁 {total('retries')} | "
+        f"❌ {total('dropped')} | ⛔ {total('forbidden') + total('blocked_skipped')}\n\n"
+        "<b>Navbatdan yuborilgunicha:</b>\n"
+        + ("\n".join(latency_lines) or "—")
+    )
+
+
+async def _search_text() -> str:
+    lookups = cache_stats["hits"] + cache_stats["misses"]
+    ratio = f"{cache_stats['hits'] * 100 / lookups:.1f}%" if lookups else "—"
+    return (
+        "🔎 <b>Statistika — Qidiruv keshi</b>\n\n"
+        "Bot ishga tushgandan beri:\n"
+        f"✅ Keshdan (hit): <b>{cache_stats['hits']}</b>\n"
+        f"🐘 Bazadan (miss): <b>{cache_stats['misses']}</b>\n"
+        f"🎯 Hit ulushi: <b>{ratio}</b>\n"
+        f"🤝 Parallel so'rov bilan bo'lishilgan: {cache_stats['shared']}\n"
+        f"⏳ Boshqa replikani kutgan: {cache_stats['lock_waits']}\n"
+        f"♻️ Katalog yangilanishi: {cache_stats['bumps']}\n"
+        f"⚠️ Redis xatolari: {cache_stats['errors']}"
+    )
+
+
+# Dead-letter paneli: stats_dead[_replay | _replayok][_m_<method> | _r_<sabab kaliti>]
+# _replay — tasdiqlash (soni bilan), _replayok — haqiqiy qayta yuborish.
+DEAD_LETTER_PREVIEW = 5
+
+# Ishlayotgan replay task'lari — GC o'rtada yig'ib yubormasligi uchun havola
+_replay_tasks: set = set()
+
+
+def _parse_dead_section(section: str) -> tuple[str, str | None, str | None]:
+    """"dead..." bo'limidan (amal, method, reason_key) ni ajratish.
+
+    amal: "view", "confirm" yoki "replay".
+    """
+    rest = section.removeprefix("dead")
+    action = "view"
+    if rest.startswith("_replayok"):
+        action, rest = "replay", rest.removeprefix("_replayok")
+    elif rest.startswith("_replay"):
+        action, rest = "confirm", rest.removeprefix("_replay")
+    if rest.startswith("_m_"):
+        return action, rest[3:], None
+    if rest.startswith("_r_"):
+        return action, None, rest[3:]
+    return action, None, None
+
+
+def _dead_suffix(method: str | None, reason_key: str | None) -> str:
+    if method:
+        return f"_m_{method}"
+    if reason_key:
+        return f"_r_{reason_key}"
+    return ""
+
+
+def _fmt_ts(ts: float | None) -> str:
+    return datetime.fromtimestamp(ts).strftime("%d.%m %H:%M") if ts else "—"
+
+
+async def _dead_letters_view(method: str | None, reason_key: str | None) -> tuple[str, InlineKeyboardMarkup]:
+    summary = await dead_letter_summary()
+    rows = []
+
+    if method or reason_key:
+        entries = await dead_letters(method=method, reason_key=reason_key, limit=DEAD_LETTER_PREVIEW)
+        label = escape(method) if method else next(
+            (escape(group) for group, _ in summary["reasons"] if dead_letter_reason_key(group) == reason_key),
+            reason_key,
+        )
+        lines = [f"📮 <b>Yetkazilmagan xabarlar — {label}</b>\n"]
+        if not entries:
+            lines.append("Mos yozuv topilmadi.")
+        for e in entries:
+            lines.append(
+                f"• {_fmt_ts(e['dropped_at'])} | <code>{escape(e['method'])}</code> → "
+                f"<code>{escape(e['chat_id'])}</code> | {e['attempts']} urinish\n"
+                f"  <i>{escape(e['reason'][:120])}</i>"
+            )
+        suffix = _dead_suffix(method, reason_key)
+        if entries:
+            rows.append([InlineKeyboardButton("🔁 Shularni qayta yuborish", callback_data=f"stats_dead_replay{suffix}")])
+        rows.append([InlineKeyboardButton("⬅️ Ortga", callback_data="stats_dead")])
+        return "\n".join(lines), InlineKeyboardMarkup(rows)
+
+    lines = [
+        "📮 <b>Yetkazilmagan xabarlar (dead-letter)</b>\n",
+        f"📦 Jami: <b>{summary['total']}</b>",
+        f"🕐 Oraliq: {_fmt_ts(summary['oldest'])} — {_fmt_ts(summary['newest'])}",
+    ]
+    if summary["methods"]:
+        lines.append("\n<b>Metod bo'yicha:</b>")
+        lines += [f"• <code>{escape(m)}</code>: {n}" for m, n in summary["methods"][:6]]
+        rows += [
+            [InlineKeyboardButton(f"🔎 {m} ({n})", callback_data=f"stats_dead_m_{m}"[:64])]
+            for m, n in summary["methods"][:4]
+        ]
+    if summary["reasons"]:
+        lines.append("\n<b>Sabab bo'yicha:</b>")
+        lines += [f"• {escape(group)}: {n}" for group, n in summary["reasons"][:6]]
+        rows += [
+            [InlineKeyboardButton(f"⚠️ {group[:40]} ({n})", callback_data=f"stats_dead_r_{dead_letter_reason_key(group)}")]
+            for group, n in summary["reasons"][:4]
+        ]
+    if summary["total"]:
+        rows.append([InlineKeyboardButton("🔁 Hammasini qayta yuborish", callback_data="stats_dead_replay")])
+    rows.append([InlineKeyboardButton("⬅️ Ortga", callback_data="stats_overview")])
+    return "\n".join(lines), InlineKeyboardMarkup(rows)
+
+
+async def _dead_replay_confirm_view(method: str | None, reason_key: str | None) -> tuple[str, InlineKeyboardMarkup]:
+    matched = await count_dead_letters(method=method, reason_key=reason_key)
+    suffix = _dead_suffix(method, reason_key)
+    back = InlineKeyboardButton("⬅️ Ortga", callback_data=f"stats_dead{suffix}")
+    if not matched:
+        return "📭 Qayta yuborish uchun mos yozuv topilmadi.", InlineKeyboardMarkup([[back]])
+    return (
+        f"🔁 <b>{matched} ta xabar navbatga qaytariladi.</b>\n\nDavom etamizmi?",
+        InlineKeyboardMarkup([
+            [InlineKeyboardButton("✅ Ha, qayta yuborish", callback_data=f"stats_dead_replayok{suffix}")],
+            [back],
+        ]),
+    )
+
+
+async def _replay_dead_letters_task(bot, chat_id: int, method: str | None, reason_key: str | None) -> None:
+    """Qulf (acquire_replay_lock) chaqiruvchi tomonidan olingan — shu yerda bo'shatiladi."""
+    try:
+        replayed = await replay_dead_letters(method=method, reason_key=reason_key)
+        text = f"🔁 <b>Dead-letter:</b> {replayed} ta xabar navbatga qaytarildi."
+    except Exception as e:
+        logger.exception("Dead-letter replay xatosi: %s", e)
+        text = f"❌ <b>Qayta yuborishda xato:</b>\n<code>{escape(str(e)[:300])}</code>"
+    finally:
+        await release_replay_lock()
+    await bot.send_message(chat_id=chat_id, text=text, parse_mode="HTML")
+
+
 async def _chart_data(period: str) -> dict:
     """Tanlangan davr uchun ko'rishlar dinamikasi va top kinolarni yig'ish."""
     now = datetime.now()
@@ -600,6 +804,36 @@ async def statistics_callback(update: Update, context: ContextTypes.DEFAULT_TYPE
             await _send_stats_chart(update, context, period)
             return
 
+        if section.startswith("dead"):
+            action, method, reason_key = _parse_dead_section(section)
+            if action == "confirm":
+                text, keyboard = await _dead_replay_confirm_view(method, reason_key)
+                await query.edit_message_text(text, reply_markup=keyboard, parse_mode="HTML")
+                return
+            if action == "replay":
+                back = InlineKeyboardMarkup([[InlineKeyboardButton("⬅️ Ortga", callback_data="stats_dead")]])
+                if not await acquire_replay_lock():
+                    await query.edit_message_text(
+                        "⏳ <b>Qayta yuborish allaqachon ishlayapti.</b>\n\nTugashini kuting.",
+                        reply_markup=back,
+                        parse_mode="HTML",
+                    )
+                    return
+                task = asyncio.create_task(
+                    _replay_dead_letters_task(context.bot, query.message.chat_id, method, reason_key)
+                )
+                _replay_tasks.add(task)
+                task.add_done_callback(_replay_tasks.discard)
+                await query.edit_message_text(
+                    "🔁 <b>Qayta yuborish boshlandi.</b>\n\nTugagach xabar beraman.",
+                    reply_markup=back,
+                    parse_mode="HTML",
+                )
+                return
+            text, keyboard = await _dead_letters_view(method, reason_key)
+            await query.edit_message_text(text, reply_markup=keyboard, parse_mode="HTML")
+            return
+
         if section == "referral":
             await query.edit_message_text(
                 await _referral_text(), reply_markup=_referral_keyboard(), parse_mode="HTML"
@@ -623,6 +857,8 @@ async def statistics_callback(update: Update, context: ContextTypes.DEFAULT_TYPE
             "rating": _rating_text,
             "top": _top_text,
             "channels": _channels_text,
+            "queue": _queue_text,
+            "search": _search_text,
             "refresh": _overview_text,
         }
         build = builders.get(section, _overview_text)
@@ -11,6 +11,7 @@ from tortoise.exceptions import IntegrityError
 from database import Genre, Movie, Rating, User, UserMovieHistory
 from utils import get_user_keyboard
 from utils.settings import MOVIES_PER_PAGE, ADMIN_ID, MANAGER_ID
+from utils.redis_manager import PRIORITY_ALERTS
 from utils.decorators import user_registered_required
 from utils.error_notificator import error_notificator
 from utils.movie_card import (
@@ -68,7 +69,7 @@ async def _report_broken_link(update: Update, context: ContextTypes.DEFAULT_TYPE
     )
     for admin_id in {ADMIN_ID, MANAGER_ID}:
         try:
-            await context.bot.send_message(chat_id=admin_id, text=text, parse_mode="HTML")
+            await context.bot.send_message(chat_id=admin_id, text=text, parse_mode="HTML", priority=PRIORITY_ALERTS)
         except Exception:
             pass
 
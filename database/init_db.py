@@ -2,6 +2,9 @@ import logging
 
 from tortoise import Tortoise
 from utils import DATABASE_URL
+from utils.autocomplete import setup_autocomplete
+from utils.search_cache import CYRILLIC_TO_LATIN
+from utils.trigram_index import setup_search_engine
 
 from telegram import BotCommand
 
@@ -24,20 +27,120 @@ async def init_db():
     logger.info("✅ Database connected!")
 
 
-async def ensure_search_index():
+# Qidiruv ustunlarini trigger bilan yuritish. movie_name_norm — uz_normalize(movie_name);
+# inherits_parent_name — qism ota-kino nomini o'zgarishsiz meros qilganmi (bunday
+# qismlar qidiruvda alohida ko'rsatilmaydi, utils/search.py ga qarang).
+_SEARCH_COLUMNS_TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION movie_search_columns() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.movie_name_norm := uz_normalize(NEW.movie_name);
+    NEW.inherits_parent_name := NEW.parent_movie_id IS NOT NULL AND EXISTS (
+        SELECT 1 FROM movie p WHERE p.movie_id = NEW.parent_movie_id AND p.movie_name = NEW.movie_name
+    );
+    RETURN NEW;
+END $$;
+
+CREATE OR REPLACE FUNCTION movie_parent_renamed() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE movie SET inherits_parent_name = (movie_name = NEW.movie_name)
+    WHERE parent_movie_id = NEW.movie_id
+      AND inherits_parent_name IS DISTINCT FROM (movie_name = NEW.movie_name);
+    RETURN NULL;
+END $$;
+
+DROP TRIGGER IF EXISTS trg_movie_search_columns ON movie;
+CREATE TRIGGER trg_movie_search_columns
+    BEFORE INSERT OR UPDATE OF movie_name, parent_movie_id ON movie
+    FOR EACH ROW EXECUTE FUNCTION movie_search_columns();
+
+DROP TRIGGER IF EXISTS trg_movie_parent_renamed ON movie;
+CREATE TRIGGER trg_movie_parent_renamed
+    AFTER UPDATE OF movie_name ON movie
+    FOR EACH ROW WHEN (OLD.movie_name IS DISTINCT FROM NEW.movie_name)
+    EXECUTE FUNCTION movie_parent_renamed();
+"""
+
+# Mavjud qatorlarni to'ldirish. Faqat farq qiladiganlar yoziladi — har ishga
+# tushishda bajarilsa ham arzon, uz_normalize() o'zgarsa esa hammasi yangilanadi.
+_SEARCH_COLUMNS_BACKFILL_SQL = """
+UPDATE movie m SET
+    movie_name_norm = uz_normalize(m.movie_name),
+    inherits_parent_name = COALESCE(p.movie_name = m.movie_name, FALSE)
+FROM movie m2 LEFT JOIN movie p ON p.movie_id = m2.parent_movie_id
+WHERE m2.movie_id = m.movie_id
+  AND (m.movie_name_norm IS DISTINCT FROM uz_normalize(m.movie_name)
+       OR m.inherits_parent_name IS DISTINCT FROM COALESCE(p.movie_name = m.movie_name, FALSE));
+"""
+
+
+def _transliterate_sql(expr: str) -> str:
+    """CYRILLIC_TO_LATIN jadvalini SQL ifodaga aylantirish (utils/search_cache.normalize_query
+    bilan bir xil). Ko'p harfli mosliklar (ш -> sh) replace() bilan, qolganlari bitta
+    translate() bilan; "to" qismida juftligi yo'q harflar (ъ, ь) o'chiriladi. Bosh
+    harflar ham qo'shilgan — C locale'da lower() kirill harflarini kichraytirmaydi.
+    """
+    for cyr, lat in CYRILLIC_TO_LATIN.items():
+        if len(lat) > 1:
+            for ch in (cyr, cyr.upper()):
+                expr = f"replace({expr}, '{ch}', '{lat}')"
+    mapped = {cyr: lat for cyr, lat in CYRILLIC_TO_LATIN.items() if len(lat) == 1}
+    dropped = [cyr for cyr, lat in CYRILLIC_TO_LATIN.items() if not lat]
+    source = "".join(mapped) + "".join(cyr.upper() for cyr in mapped) + "".join(dropped) + "".join(c.upper() for c in dropped)
+    target = "".join(mapped.values()) * 2
+    return f"translate({expr}, '{source}', '{target}')"
+
+
+async def ensure_user_columns() -> None:
+    """User.is_blocked / blocked_at ustunlari va indeksi (mavjud bazalar uchun).
+
+    Repo aerich migratsiyalarini saqlamaydi va generate_schemas chaqirmaydi —
+    ustunlar bo'lmasa bloklanganlarni yuklash va har bir broadcast
+    "column does not exist" bilan yiqiladi. Idempotent, har ishga tushishda
+    bajariladi.
+    """
+    conn = Tortoise.get_connection("default")
+    if conn.capabilities.dialect != "postgres":
+        return
+    try:
+        await conn.execute_query(
+            'ALTER TABLE "user" ADD COLUMN IF NOT EXISTS is_blocked BOOLEAN NOT NULL DEFAULT FALSE, '
+            'ADD COLUMN IF NOT EXISTS blocked_at TIMESTAMPTZ;'
+        )
+        await conn.execute_query('CREATE INDEX IF NOT EXISTS idx_user_is_blocked ON "user" (is_blocked);')
+    except Exception as e:
+        logger.warning("⚠️ user.is_blocked ustunlarini qo'shib bo'lmadi: %s", e)
+
+
+async def ensure_search_index() -> bool:
     """movie_name bo'yicha moslashuvchan (fuzzy) qidiruv uchun pg_trgm GIN index.
 
     `uz_normalize()` SQL funksiyasini yaratadi — u apostrof variantlarini
     (', ', ', ʻ, ʼ, `, ´, ʹ, ʺ) va registrni bir xillashtiradi, shuning uchun
     "po'lat", "po'lat" va "polat" endi bir xil so'z sifatida topiladi
     (foydalanuvchilar bu belgini turlicha yozgani sabab qidiruv ishlamay
-    qolgan holatlarni tuzatadi — utils/search.py shu funksiyadan foydalanadi).
+    qolgan holatlarni tuzatadi). Kirill yozuvi ham lotinga o'giriladi
+    ("Ўргимчак одам" = "O'rgimchak odam"); funksiya o'zgarganda backfill
+    mavjud qatorlarni qayta normalize qiladi, indeks shu ustun ustida.
+
+    Normalize qilingan nom `movie_name_norm` ustunida saqlanadi (trigger
+    yuritadi), indeks ham shu oddiy ustun ustida — utils/search.py har bir
+    qator uchun regexp yoki ota-kino JOIN'isiz solishtiradi. Ustunlar Tortoise
+    modelida yo'q (faqat qidiruv SQL'i o'qiydi), shuning uchun aerich
+    migratsiyasi o'rniga shu yerda yaratiladi va to'ldiriladi.
 
     Idempotent: indeks/extension/funksiya mavjud bo'lsa qayta yaratiladi
     yoki hech narsa qilinmaydi. Huquq yetishmasa (masalan, CREATE EXTENSION
     uchun) — faqat ogohlantiradi, ishni to'xtatmaydi.
+
+    pg_trgm qidiruvi tayyor bo'lsa True qaytaradi; aks holda (boshqa baza yoki
+    xato) SEARCH_ENGINE=auto xotiradagi indeksga o'tadi (utils/trigram_index.py).
     """
     conn = Tortoise.get_connection("default")
+    if conn.capabilities.dialect != "postgres":
+        logger.warning("⚠️ Baza Postgres emas (%s) — pg_trgm qidiruv indeksi yaratilmadi", conn.capabilities.dialect)
+        return False
 
     # Uzbek apostrof/tirnoqcha variantlari: ' ' ' ʻ ʼ ` ´ ʹ ʺ
     apostrophe_chars = "'‘’ʻʼ`´ʹʺ"
@@ -50,25 +153,37 @@ async def ensure_search_index():
             f"""
             CREATE OR REPLACE FUNCTION uz_normalize(input text) RETURNS text
             LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
-                SELECT regexp_replace(lower(trim(input)), '{char_class}', '', 'g');
+                SELECT regexp_replace({_transliterate_sql("lower(trim(input))")}, '{char_class}', '', 'g');
             $$;
             """
         )
 
-        # Eski, normalize qilinmagan indeks endi ishlatilmaydi.
+        await conn.execute_query(
+            'ALTER TABLE "movie" ADD COLUMN IF NOT EXISTS movie_name_norm TEXT, '
+            'ADD COLUMN IF NOT EXISTS inherits_parent_name BOOLEAN NOT NULL DEFAULT FALSE;'
+        )
+        await conn.execute_query(_SEARCH_COLUMNS_TRIGGER_SQL)
+        await conn.execute_query(_SEARCH_COLUMNS_BACKFILL_SQL)
+
+        # Eski indekslar (normalize qilinmagan / ifoda ustidagi) endi ishlatilmaydi.
         await conn.execute_query('DROP INDEX IF EXISTS idx_movie_name_trgm;')
+        await conn.execute_query('DROP INDEX IF EXISTS idx_movie_name_normalized_trgm;')
         await conn.execute_query(
-            'CREATE INDEX IF NOT EXISTS idx_movie_name_normalized_trgm '
-            'ON "movie" USING gin (uz_normalize(movie_name) gin_trgm_ops);'
+            'CREATE INDEX IF NOT EXISTS idx_movie_name_norm_trgm '
+            'ON "movie" USING gin (movie_name_norm gin_trgm_ops) WHERE NOT inherits_parent_name;'
         )
-        logger.info("✅ pg_trgm qidiruv indeksi (normalize bilan) tayyor")
+        logger.info("✅ pg_trgm qidiruv indeksi (movie_name_norm) tayyor")
     except Exception as e:
         logger.warning("⚠️ pg_trgm indeksini yaratib bo'lmadi (huquq yetishmasligi mumkin): %s", e)
+        return False
+    return True
 
 
 async def post_init(application):
     await init_db()
-    await ensure_search_index()
+    await ensure_user_columns()
+    await setup_search_engine(await ensure_search_index())
+    await setup_autocomplete()
 
     # Bot komandalarini sozlash
     commands = [
@@ -25,6 +25,11 @@ class User(Model):
         'models.User', related_name='referrals', on_delete=fields.SET_NULL, null=True
     )
 
+    # Botni bloklagan / akkaunti o'chirilgan: broadcast va bildirishnomalar
+    # yuborilmaydi. Worker belgilaydi, /start qayta bosilganda tozalanadi.
+    is_blocked = fields.BooleanField(default=False, index=True)
+    blocked_at = fields.DatetimeField(null=True)
+
     created_at = fields.DatetimeField(auto_now_add=True)
     updated_at = fields.DatetimeField(auto_now=True)
 
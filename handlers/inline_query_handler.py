@@ -1,28 +1,45 @@
+import asyncio
 import re
 import logging
+import time
 
 from telegram import (
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
     InlineQueryResultArticle,
+    InlineQueryResultCachedPhoto,
+    InlineQueryResultCachedVideo,
     InputTextMessageContent,
     Update,
 )
 from telegram.error import BadRequest
 from telegram.ext import ContextTypes
 
-from database import Movie, User, UserMovieHistory
-from utils import INLINE_THUMB_URL
+from database import Channels, Movie, User, UserMovieHistory
+from utils import INLINE_PAGE_SIZE, INLINE_RESULT_TYPE, INLINE_THUMB_URL
+from utils.autocomplete import autocomplete_index
+from utils.search_cache import load_ranked_ids, normalize_query, query_fingerprint, save_ranked_ids
+from utils.checker import is_user_subscribed
 from utils.decorators import channel_subscription_required, user_registered_required
-from utils.movie_card import build_movie_card, build_parts_list_card, get_child_parts, is_privileged, send_linked_series_card
-from utils.search import search_movies
+from utils.movie_card import (
+    build_movie_card, build_parts_list_card, get_child_parts, is_privileged, prefetched_movie_caption,
+    send_linked_series_card,
+)
+from utils.search import search_movie_ids
 
 
-MAX_INLINE_RESULTS = 15
+# Bitta so'rov uchun saralanadigan natijalar chuqurligi (INLINE_PAGE_SIZE li
+# sahifalarga bo'linadi, keyingi sahifalar Redis'dagi ro'yxatdan olinadi)
+INLINE_RESULTS_DEPTH = 200
+# INLINE_RESULT_TYPE=media: ro'yxatdan o'tgan va kanallarga a'zo foydalanuvchi
+# tekshiruvi natijasi shuncha soniya user_data'da saqlanadi (har harfga emas)
+INLINE_MEDIA_CHECK_TTL = 600
 logger = logging.getLogger(__name__)
 
 
-async def _answer_inline_query_safely(query, results, cache_time: int = 30) -> None:
+async def _answer_inline_query_safely(query, results, cache_time: int = 30, next_offset: str | None = None) -> None:
     try:
-        await query.answer(results=results, cache_time=cache_time, is_personal=True)
+        await query.answer(results=results, cache_time=cache_time, is_personal=True, next_offset=next_offset)
     except BadRequest as e:
         msg = str(e).lower()
         # Inline query expires quickly; in this case we just ignore it.
@@ -55,33 +72,159 @@ def _to_result(movie: Movie) -> InlineQueryResultArticle:
     )
 
 
+def _share_markup(movie: Movie, bot_username: str) -> InlineKeyboardMarkup | None:
+    """Inline yuborilgan media ostidagi tugma — botda ochish (callback emas, url)."""
+    if not movie.movie_code:
+        return None
+    return InlineKeyboardMarkup([[
+        InlineKeyboardButton("🤖 Botda ochish", url=f"https://t.me/{bot_username}?start={movie.movie_code}")
+    ]])
+
+
+def _to_media_result(movie: Movie, bot_username: str):
+    """Videosi (yoki posteri) bor kino — foydalanuvchi uni to'g'ridan-to'g'ri
+    inline rejimdan yuboradi, botga /kino so'rovi va navbatdagi send_video kerak emas.
+    Janr/davlatlar _movies_by_ids(prefetch=True) da butun sahifa uchun yuklangan.
+    """
+    if movie.is_linked_series or not (movie.file_id or movie.poster_file_id):
+        return _to_result(movie)
+
+    caption = prefetched_movie_caption(movie)
+    title = f"{movie.movie_name} ({movie.movie_year or '?'})"[:80]
+    if movie.file_id:
+        return InlineQueryResultCachedVideo(
+            id=f"vid_{movie.movie_id}",
+            video_file_id=movie.file_id,
+            title=title,
+            description=f"Kod: {movie.movie_code}" if movie.movie_code else None,
+            caption=caption,
+            parse_mode="HTML",
+            reply_markup=_share_markup(movie, bot_username),
+        )
+    return InlineQueryResultCachedPhoto(
+        id=f"pst_{movie.movie_id}",
+        photo_file_id=movie.poster_file_id,
+        title=title,
+        caption=caption,
+        parse_mode="HTML",
+        reply_markup=_share_markup(movie, bot_username),
+    )
+
+
+async def _media_allowed(context: ContextTypes.DEFAULT_TYPE, user_id: int) -> bool:
+    """Media natija /kino dagi tekshiruvlarni chetlab o'tadi — shuning uchun faqat
+    ro'yxatdan o'tgan va barcha kanallarga a'zo foydalanuvchiga beriladi.
+    """
+    checked_at, allowed = context.user_data.get("inline_media_check", (0.0, False))
+    if time.monotonic() - checked_at < INLINE_MEDIA_CHECK_TTL:
+        return allowed
+
+    allowed = await User.exists(telegram_id=user_id)
+    if allowed:
+        channels = await Channels.all()
+        memberships = await asyncio.gather(*(is_user_subscribed(context.bot, user_id, ch) for ch in channels))
+        allowed = all(memberships)
+    context.user_data["inline_media_check"] = (time.monotonic(), allowed)
+    return allowed
+
+
+async def _movies_by_ids(ids: list[int], *, prefetch: bool = False) -> list[Movie]:
+    """prefetch — caption uchun janr/davlatlar ham (sahifa uchun 2 ta qo'shimcha so'rov)."""
+    qs = Movie.filter(movie_id__in=ids)
+    if prefetch:
+        qs = qs.prefetch_related("movie_genre", "movie_country")
+    by_id = {m.movie_id: m for m in await qs}
+    return [by_id[i] for i in ids if i in by_id]
+
+
+async def _ranked_ids(q: str, depth: int) -> list[int]:
+    """So'rovning saralangan natija id'lari: qisqa so'rov va kodlar — prefiks
+    indeksidan (utils/autocomplete.py), qolgani — fuzzy qidiruv.
+    """
+    completed = autocomplete_index.complete(q, limit=depth)
+    if completed is not None and completed[0]:
+        ids = completed[0]
+        short = len(q) <= autocomplete_index.max_len
+        if short or not q.isdecimal() or len(ids) >= depth:
+            return ids
+        # Uzun raqamli so'rov: kod mosliklaridan keyin nomi raqam bo'lgan kinolar ("1917")
+        seen = set(ids)
+        name_ids, _ = await search_movie_ids(q, limit=depth)
+        return ids + [i for i in name_ids if i not in seen]
+
+    if q.isdecimal():
+        # code first
+        exact_id = await Movie.filter(movie_code=int(q)).values_list("movie_id", flat=True).first()
+        name_ids, _ = await search_movie_ids(q, limit=depth)
+        if exact_id is not None:
+            return [exact_id] + [i for i in name_ids if i != exact_id]
+        return name_ids
+
+    ids, _ = await search_movie_ids(q, limit=depth)
+    return ids
+
+
+def _parse_offset(raw: str, fingerprint: str) -> int:
+    """next_offset "<pozitsiya>:<so'rov izi>" — boshqa so'rovniki bo'lsa boshidan."""
+    position, _, token = (raw or "").partition(":")
+    if token != fingerprint or not position.isdecimal():
+        return 0
+    return int(position)
+
+
 async def inline_query_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     query = update.inline_query
     if not query:
         return
 
     q = (query.query or "").strip()
-    movies: list[Movie] = []
-
     if not q:
         await _answer_inline_query_safely(query, [], cache_time=5)
         return
-    elif q.isdecimal():
-        # code first
-        exact = await Movie.get_or_none(movie_code=int(q))
-        if exact:
-            movies = [exact]
-        name_matches, _ = await search_movies(q, limit=MAX_INLINE_RESULTS)
-        if exact:
-            movies.extend([m for m in name_matches if m.movie_id != exact.movie_id])
-        else:
-            movies = list(name_matches)
+
+    # Telegram keyingi sahifani shu so'rov va bizning next_offset bilan so'raydi.
+    # Saralangan ro'yxat qisqa muddat Redis'da turadi — qidiruv takrorlanmaydi.
+    fingerprint = query_fingerprint(normalize_query(q))
+    start = _parse_offset(query.offset, fingerprint)
+    ids = await load_ranked_ids(fingerprint) if start else None
+    if ids is None:
+        ids = await _ranked_ids(q, INLINE_RESULTS_DEPTH)
+        if len(ids) > INLINE_PAGE_SIZE:
+            await save_ranked_ids(fingerprint, ids)
+
+    end = start + INLINE_PAGE_SIZE
+    page = ids[start:end]
+    media = bool(page) and INLINE_RESULT_TYPE == "media" and await _media_allowed(context, query.from_user.id)
+    movies = await _movies_by_ids(page, prefetch=media) if page else []
+    if media:
+        results = [_to_media_result(movie, context.bot.username) for movie in movies]
     else:
-        movies, _ = await search_movies(q, limit=MAX_INLINE_RESULTS)
+        results = [_to_result(movie) for movie in movies]
+    next_offset = f"{end}:{fingerprint}" if end < len(ids) else ""
+
+    await _answer_inline_query_safely(query, results, cache_time=30, next_offset=next_offset)
+
 
-    results = [_to_result(movie) for movie in movies[:MAX_INLINE_RESULTS]]
+async def chosen_inline_result_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Inline rejimdan to'g'ridan-to'g'ri yuborilgan video — ko'rish tarixiga yoziladi.
 
-    await _answer_inline_query_safely(query, results, cache_time=30)
+    Article natijalar /kino orqali o'tadi va tarixni o'sha yerda yozadi. Bu
+    update faqat BotFather'da /setinlinefeedback yoqilgan bo'lsa keladi.
+    """
+    chosen = update.chosen_inline_result
+    if not chosen or not chosen.result_id.startswith("vid_"):
+        return
+    movie_id = chosen.result_id.removeprefix("vid_")
+    if not movie_id.isdecimal():
+        return
+
+    user = await User.get_or_none(telegram_id=chosen.from_user.id)
+    movie = await Movie.get_or_none(movie_id=int(movie_id))
+    if not user or not movie:
+        return
+    history, created = await UserMovieHistory.get_or_create(user=user, movie=movie)
+    if not created:
+        await history.save()
 
 
 def _extract_movie_code(raw_arg: str) -> int | None:
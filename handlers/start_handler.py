@@ -1,15 +1,22 @@
+import logging
 from pathlib import Path
 
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
-from telegram.error import BadRequest, Forbidden
+from telegram.error import BadRequest, Forbidden, TelegramError
 from telegram.ext import ContextTypes
 
 from database import User
 from utils import error_notificator, get_user_keyboard
+from utils.blocked_users import unblock_user
 from utils.decorators import channel_subscription_required
+from utils.redis_manager import QueuedSendError
 
+logger = logging.getLogger(__name__)
 
 START_IMAGE_PATH = Path(__file__).resolve().parent.parent / "IMG_7403.PNG"
+# Fallback xabar natijasini (pin uchun) shuncha soniya kutamiz — navbat tiqilib
+# qolsa /start handler'i uzoq osilib turmasligi kerak.
+START_WAIT_TIMEOUT = 5
 
 
 def _start_caption(first_name: str, created: bool) -> str:
@@ -73,6 +80,9 @@ async def _start_handler_impl(update: Update, context: ContextTypes.DEFAULT_TYPE
             defaults['referred_by'] = referrer
 
         user, created = await User.get_or_create(telegram_id=telegram_id, defaults=defaults)
+        if not created:
+            # Avval botni bloklagan bo'lsa — endi yana xabar oladi
+            await unblock_user(user)
 
         if context.args and context.args[0].isdecimal():
             from handlers.inline_query_handler import inline_movie_command_handler
@@ -97,7 +107,17 @@ async def _start_handler_impl(update: Update, context: ContextTypes.DEFAULT_TYPE
                 raise FileNotFoundError("IMG_7403.PNG topilmadi")
         except (BadRequest, OSError):
             # Fallback: old text welcome if image cannot be sent.
-            welcome_message = await update.message.reply_text(caption, parse_mode="HTML")
+            # wait=True — navbat orqali yuboriladi, lekin pin uchun Message qaytadi.
+            try:
+                welcome_message = await context.bot.send_message(
+                    update.effective_chat.id, caption, parse_mode="HTML",
+                    wait=True, wait_timeout=START_WAIT_TIMEOUT,
+                )
+            except TimeoutError:
+                # Natija o'z vaqtida kelmadi — xabar navbatda qoladi, faqat pin qilinmaydi.
+                logger.info("⏳ /start xabari navbatda kutmoqda, pin qilinmaydi (chat_id=%s)", update.effective_chat.id)
+            except (QueuedSendError, TelegramError) as e:
+                logger.warning("⚠️ /start xabarini yuborib bo'lmadi (chat_id=%s): %s", update.effective_chat.id, e)
 
         if welcome_message:
             try:
@@ -1,14 +1,18 @@
 import logging
 
 from admins import get_channels
-from telegram.ext import Application, CommandHandler, CallbackQueryHandler, ChatJoinRequestHandler, InlineQueryHandler, MessageHandler, filters
+from telegram.ext import Application, CommandHandler, CallbackQueryHandler, ChatJoinRequestHandler, ChosenInlineResultHandler, InlineQueryHandler, MessageHandler, TypeHandler, filters
 from telegram import Update
 
 from handlers import *
 from callbacks import *
 from admins import *
 from database import post_init
-from utils import BOT_TOKEN, apply_redis_patch
+from utils import BOT_TOKEN, apply_redis_patch, mark_update_interactive
+from utils.blocked_users import load_blocked_users, schedule_blocked_sync
+from utils.autocomplete import schedule_autocomplete_refresh
+from utils.telegram_http import build_request
+from utils.trigram_index import schedule_search_index_refresh
 
 logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
@@ -21,12 +25,26 @@ apply_redis_patch()
 
 async def _post_init(application):
     await post_init(application)
+    await load_blocked_users()
     if application.job_queue:
         await reschedule_backup_job(application.job_queue)
+        schedule_blocked_sync(application.job_queue)
+        schedule_search_index_refresh(application.job_queue)
+        schedule_autocomplete_refresh(application.job_queue)
 
 
 def main():
-    bot = Application.builder().token(BOT_TOKEN).post_init(_post_init).build()
+    bot = (
+        Application.builder()
+        .token(BOT_TOKEN)
+        .request(build_request())
+        .post_init(_post_init)
+        .build()
+    )
+
+    # Har bir Update'ga javob "interactive" navbatga tushishi uchun — boshqa
+    # handlerlardan oldin (group=-1) ishlaydi va hech narsani to'xtatmaydi.
+    bot.add_handler(TypeHandler(Update, mark_update_interactive), group=-1)
 
     bot.add_handler(CommandHandler('start', start_handler))
     bot.add_handler(CommandHandler("kino", inline_movie_command_handler))
@@ -34,6 +52,7 @@ def main():
     bot.add_handler(CommandHandler("history", history_handler))
     bot.add_handler(CommandHandler("top", top_handler))
     bot.add_handler(InlineQueryHandler(inline_query_handler))
+    bot.add_handler(ChosenInlineResultHandler(chosen_inline_result_handler))
     bot.add_handler(ChatJoinRequestHandler(channel_join_request_handler))
 
     bot.add_handler(add_movie_conf_handler)
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""Worker o'tkazuvchanligi benchmarki (soxta Telegram API bilan, oflayn).
+
+Skript bitta jarayonda:
+  1. scripts/fake_telegram.py serverini ishga tushiradi (kechikish, 429/403/500);
+  2. run_worker() ni shu serverga yo'naltirib ishga tushiradi;
+  3. patch qilingan Bot orqali (xuddi bot jarayonidek) navbatga haqiqiy
+     payloadlar qo'yadi: caption + klaviaturali videolar, xabarlar, edit'lar,
+     delete'lar;
+  4. hammasi yetkazilgunicha kutadi va natijani chiqaradi: xabar/s,
+     p50/p90/p99 "navbatdan Telegramgacha" kechikish, qayta urinishlar.
+
+DIQQAT: navbat kalitlari haqiqiy bot bilan bir xil (bot_queue...), shuning
+uchun benchmark ALOHIDA Redis'da ishlaydi: --redis-url majburiy va .env dagi
+REDIS_URL bilan bir xil bo'lsa skript ishga tushmaydi. Redis/navbat/worker
+sozlamalari .env dan emas, skriptning o'zidan olinadi (load_dotenv mavjud
+o'zgaruvchilarni almashtirmaydi). Baza bo'sh bo'lmasa — --flush bilan tozalanadi.
+
+Foydalanish:
+  redis-server --port 6390 --save ""   # vaqtinchalik Redis
+  python scripts/bench_worker.py --redis-url redis://localhost:6390/0 --messages 5000 --chats 1000 --flush
+  python scripts/bench_worker.py --redis-url ... --messages 2000 --flood-rate 0.02 --error-rate 0.01 --flush
+  python scripts/bench_worker.py --redis-url ... --global-rate 1000 --concurrency 32 --json > baseline.json
+
+Telegram limitlari (RATE_LIMIT_*) benchmarkda ham amal qiladi: worker'ning
+"sof" tezligini o'lchash uchun --global-rate / --private-rate ni oshiring.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_telegram import FakeConfig, FakeTelegramServer  # noqa: E402
+
+BENCH_TOKEN = "123456:BENCHMARK"
+MIX_TYPES = ("video", "message", "edit", "delete")
+DEFAULT_MIX = "video=0.6,message=0.2,edit=0.15,delete=0.05"
+ENQUEUE_CONCURRENCY = 200
+
+
+def _parse_mix(raw: str) -> dict[str, float]:
+    mix = {}
+    for part in raw.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in MIX_TYPES:
+            raise SystemExit(f"Noma'lum xabar turi: {name!r} (mumkin: {', '.join(MIX_TYPES)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def _check_redis_url(url: str) -> None:
+    """Benchmark .env dagi (ishlab turgan bot) Redis'iga yozmasligi kerak."""
+    from dotenv import dotenv_values
+
+    configured = {
+        value for value in (os.environ.get("REDIS_URL"), dotenv_values(ROOT / ".env").get("REDIS_URL")) if value
+    }
+    if url.rstrip("/") in {value.rstrip("/") for value in configured}:
+        raise SystemExit(
+            f"❌ --redis-url bot ishlatadigan Redis bilan bir xil ({url}). Alohida Redis/baza bering."
+        )
+
+
+def _configure_env(args) -> None:
+    """utils importidan OLDIN: benchmark Redis'i va worker sozlamalari.
+
+    Hammasi majburan o'rnatiladi (setdefault emas) — keyin settings'dagi
+    load_dotenv() .env qiymatlari bilan ularni almashtirmaydi. Faqat
+    TELEGRAM_* HTTP sozlamalari .env/muhitdan olinadi (ularni o'lchash mumkin).
+    """
+    _check_redis_url(args.redis_url)
+    forced = {
+        "REDIS_URL": args.redis_url,
+        "BOT_TOKEN": BENCH_TOKEN,
+        "WORKER_ID": "bench-worker",
+        "QUEUE_BACKEND": args.backend,
+        "QUEUE_CODEC": "compact",
+        "QUEUE_STREAM_MAXLEN": "0",
+        "STREAM_CLAIM_IDLE": "60",
+        "DEAD_LETTER_MAXLEN": "10000",
+        "WORKER_CONCURRENCY": str(args.concurrency),
+        "RATE_LIMIT_GLOBAL_PER_SEC": str(args.global_rate),
+        "RATE_LIMIT_PRIVATE_PER_SEC": str(args.private_rate),
+        "RATE_LIMIT_PRIVATE_BURST": "3",
+        "RATE_LIMIT_GROUP_PER_MIN": "20",
+        "METRICS_PORT": "0",
+        # DB'ga ulanilmaydi, lekin settings majburiy qiymatlarni talab qiladi
+        "ADMIN_ID": "1", "MANAGER_ID": "1", "DB_NAME": "bench", "DB_USER": "bench",
+        "DB_PASSWORD": "bench", "DB_HOST": "localhost", "DB_PORT": "5432",
+    }
+    os.environ.update(forced)
+
+
+def _percentile(values: list[float], q: float) -> float | None:
+    if not values:
+        return None
+    return values[max(0, math.ceil(q * len(values)) - 1)]
+
+
+def _card(key: int) -> tuple[str, dict]:
+    caption = (
+        f"🎬 <b>Benchmark kino #b{key}</b>\n\n"
+        f"⭐️ {random.uniform(5, 9):.1f} | 📅 {random.randint(1990, 2025)}\n"
+        "🎭 Drama, Komediya, Sarguzasht\n🌐 AQSh | 🗂 O'zbek tilida\n\n"
+        f"📥 Kod: <code>{key}</code>"
+    )
+    return caption, {
+        "inline_keyboard": [
+            [{"text": "⭐ Baholash", "callback_data": f"rate_{key}"},
+             {"text": "📤 Ulashish", "url": f"https://t.me/share/url?url=https://t.me/bench_bot?start=movie_{key}"}],
+            [{"text": "🔎 Qidirish", "switch_inline_query_current_chat": ""}],
+        ]
+    }
+
+
+async def _enqueue(bot, kind: str, key: int, chat_id: int, markup_cls) -> None:
+    if kind == "video":
+        caption, markup = _card(key)
+        await bot.send_video(
+            chat_id, f"BAACAgIAAxkBAAIB{key:08d}fake_file_id", caption=caption,
+            parse_mode="HTML", reply_markup=markup_cls.de_json(markup, None),
+        )
+    elif kind == "message":
+        await bot.send_message(chat_id, f"🔎 Qidiruv natijasi #b{key}: 15 ta kino topildi", parse_mode="HTML")
+    elif kind == "edit":
+        # Har bir edit alohida xabarga — coalescing o'lchovni buzmasin
+        caption, markup = _card(key)
+        await bot.edit_message_text(
+            caption, chat_id=chat_id, message_id=key, parse_mode="HTML",
+            reply_markup=markup_cls.de_json(markup, None),
+        )
+    else:
+        await bot.delete_message(chat_id, key)
+
+
+def _report(args, server, enqueued: dict, kinds: dict, started: float, finished: float, counters: dict) -> dict:
+    delivered = {k: server.stats.delivered[k] for k in enqueued if k in server.stats.delivered}
+    latencies = sorted(delivered[k] - enqueued[k] for k in delivered)
+    last = max(delivered.values(), default=finished)
+    duration = max(last - started, 1e-9)
+    attempts = server.stats.attempts
+
+    per_kind = {}
+    for kind in MIX_TYPES:
+        values = sorted(delivered[k] - enqueued[k] for k in delivered if kinds[k] == kind)
+        if values:
+            per_kind[kind] = {"count": len(values), "p50": _percentile(values, 0.5), "p99": _percentile(values, 0.99)}
+
+    def total(name):
+        return sum(counters.get(name, {}).values())
+
+    return {
+        "config": {
+            "messages": args.messages, "chats": args.chats, "backend": args.backend,
+            "concurrency": args.concurrency, "global_rate": args.global_rate,
+            "latency_ms": args.latency, "flood_rate": args.flood_rate,
+            "forbidden_rate": args.forbidden_rate, "error_rate": args.error_rate,
+        },
+        "enqueued": len(enqueued),
+        "delivered": len(delivered),
+        "duration_s": round(duration, 3),
+        "throughput_msg_s": round(len(delivered) / duration, 1),
+        "latency_s": {
+            "p50": _percentile(latencies, 0.5),
+            "p90": _percentile(latencies, 0.9),
+            "p99": _percentile(latencies, 0.99),
+            "max": latencies[-1] if latencies else None,
+        },
+        "per_kind": per_kind,
+        "retries": {
+            "retried_messages": sum(1 for k in enqueued if attempts.get(k, 0) > 1),
+            "extra_attempts": sum(max(0, attempts.get(k, 0) - 1) for k in enqueued),
+            "http_429": server.stats.responses.get(429, 0),
+            "http_403": server.stats.responses.get(403, 0),
+            "http_500": server.stats.responses.get(500, 0),
+            "worker_retry_after": total("retry_after"),
+            "worker_retries": total("retries"),
+            "worker_dropped": total("dropped"),
+            "worker_forbidden": total("forbidden") + total("blocked_skipped"),
+        },
+        "http_connections": server.stats.connections,
+    }
+
+
+def _print_report(result: dict) -> None:
+    def ms(value):
+        return "—" if value is None else f"{value * 1000:.0f} ms"
+
+    lat = result["latency_s"]
+    ret = result["retries"]
+    print("\n📊 Natija")
+    print(f"   Yetkazildi:   {result['delivered']}/{result['enqueued']} ta, {result['duration_s']:.1f} s")
+    print(f"   Tezlik:       {result['throughput_msg_s']} xabar/s")
+    print(f"   Kechikish:    p50 {ms(lat['p50'])} | p90 {ms(lat['p90'])} | p99 {ms(lat['p99'])} | max {ms(lat['max'])}")
+    for kind, data in result["per_kind"].items():
+        print(f"     {kind:<8} {data['count']:>6} ta  p50 {ms(data['p50'])}  p99 {ms(data['p99'])}")
+    print(f"   Qayta urinish: {ret['retried_messages']} xabar ({ret['extra_attempts']} qo'shimcha so'rov)")
+    print(f"   HTTP:         429={ret['http_429']} 403={ret['http_403']} 500={ret['http_500']} "
+          f"| ulanishlar: {result['http_connections']}")
+    print(f"   Worker:       retry_after={ret['worker_retry_after']} retries={ret['worker_retries']} "
+          f"dropped={ret['worker_dropped']} blocked={ret['worker_forbidden']}")
+
+
+async def run(args) -> dict:
+    _configure_env(args)
+    from telegram import Bot, InlineKeyboardMarkup
+    from utils import redis_manager as rm
+
+    if await rm.r.dbsize():
+        if not args.flush:
+            raise SystemExit(f"❌ {args.redis_url} bo'sh emas. Benchmark uchun alohida baza bering yoki --flush qo'shing.")
+        await rm.r.flushdb()
+
+    server = FakeTelegramServer(FakeConfig(
+        latency_ms=args.latency, jitter_ms=args.jitter, flood_rate=args.flood_rate,
+        retry_after=args.retry_after, forbidden_rate=args.forbidden_rate,
+        error_rate=args.error_rate, seed=args.seed,
+    ))
+    base_url = await server.start(port=0)
+    worker = asyncio.create_task(rm.run_worker(BENCH_TOKEN, base_url=base_url))
+
+    rm.apply_redis_patch()
+    producer = Bot(token=BENCH_TOKEN, base_url=base_url)
+    random.seed(args.seed)
+    mix = _parse_mix(args.mix)
+    kinds = {}
+    enqueued = {}
+    semaphore = asyncio.Semaphore(ENQUEUE_CONCURRENCY)
+
+    async def enqueue_one(key: int) -> None:
+        kind = random.choices(list(mix), weights=list(mix.values()))[0]
+        chat_id = 10_000_000 + random.randrange(args.chats)
+        async with semaphore:
+            kinds[key] = kind
+            enqueued[key] = time.time()
+            await _enqueue(producer, kind, key, chat_id, InlineKeyboardMarkup)
+
+    print(f"📤 {args.messages} ta xabar navbatga qo'yilmoqda ({args.chats} chat, {args.backend})...", file=sys.stderr)
+    started = time.time()
+    await asyncio.gather(*(enqueue_one(key) for key in range(1, args.messages + 1)))
+    print(f"   {time.time() - started:.2f} s da navbatga qo'yildi, yetkazilishi kutilmoqda...", file=sys.stderr)
+
+    deadline = started + args.timeout
+    while time.time() < deadline:
+        counters = rm.metrics.counters
+        finished = sum(1 for k in enqueued if k in server.stats.delivered)
+        lost = sum(sum(counters[name].values()) for name in ("dropped", "forbidden", "blocked_skipped"))
+        if finished + lost >= len(enqueued):
+            break
+        await asyncio.sleep(0.5)
+    else:
+        print("⚠️ Vaqt tugadi — hamma xabar yetkazilmadi.", file=sys.stderr)
+    finished_at = time.time()
+
+    worker.cancel()
+    try:
+        await worker
+    except asyncio.CancelledError:
+        pass
+    await server.stop()
+    counters = {name: dict(labels) for name, labels in rm.metrics.counters.items()}
+    return _report(args, server, enqueued, kinds, started, finished_at, counters)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Worker o'tkazuvchanligi benchmarki (soxta Telegram API)")
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--chats", type=int, default=1000, help="nechta turli chatga yuboriladi")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"xabar turlari ulushi (standart: {DEFAULT_MIX})")
+    parser.add_argument("--redis-url", required=True, help="ALOHIDA Redis (bot ishlatadiganidan boshqa)")
+    parser.add_argument("--flush", action="store_true", help="benchmark Redis bazasini oldindan tozalash")
+    parser.add_argument("--backend", choices=("list", "stream"), default="list")
+    parser.add_argument("--concurrency", type=int, default=8, help="WORKER_CONCURRENCY")
+    parser.add_argument("--global-rate", type=float, default=30, help="RATE_LIMIT_GLOBAL_PER_SEC")
+    parser.add_argument("--private-rate", type=float, default=1, help="RATE_LIMIT_PRIVATE_PER_SEC")
+    parser.add_argument("--latency", type=float, default=40.0, help="soxta API kechikishi (ms)")
+    parser.add_argument("--jitter", type=float, default=20.0)
+    parser.add_argument("--flood-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--forbidden-rate", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--timeout", type=float, default=600, help="maksimal kutish (s)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="natijani JSON qilib chiqarish (baseline uchun)")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        _print_report(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Yetkazilmagan xabarlar (dead-letter) bilan ishlash vositasi.
+
+Worker urinishlari tugagan xabarlarni "bot_queue:dead" stream'iga yozadi
+(payload, sabab, urinishlar soni, vaqtlar bilan). Bu skript ularni ko'rish,
+filtrlash, navbatga qaytarish va o'chirish uchun.
+
+Foydalanish:
+  python scripts/dead_letters.py stats
+  python scripts/dead_letters.py list --method send_video --error "timed out" --limit 50
+  python scripts/dead_letters.py replay --method send_message --rate 10 --yes
+  python scripts/dead_letters.py purge --error "chat not found" --yes
+
+Redis ulanishi va navbat sozlamalari .env dan olinadi (REDIS_URL, QUEUE_BACKEND, ...).
+"""
+import argparse
+import asyncio
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.redis_manager import (  # noqa: E402
+    DEAD_LETTER_REPLAY_RATE, acquire_replay_lock, count_dead_letters, dead_letter_summary, dead_letters,
+    purge_dead_letters, release_replay_lock, replay_dead_letters,
+)
+
+
+def _fmt_ts(ts: float | None) -> str:
+    return datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S") if ts else "—"
+
+
+def _filters(args) -> dict:
+    return {"method": args.method, "error": args.error}
+
+
+async def cmd_stats(args) -> None:
+    summary = await dead_letter_summary()
+    print(f"📮 Dead-letter: jami {summary['total']} ta (ko'rildi: {summary['scanned']})")
+    print(f"   Oraliq: {_fmt_ts(summary['oldest'])} — {_fmt_ts(summary['newest'])}")
+    if summary["methods"]:
+        print("\nMetod bo'yicha:")
+        for method, n in summary["methods"]:
+            print(f"   {n:>6}  {method}")
+    if summary["reasons"]:
+        print("\nSabab bo'yicha:")
+        for group, n in summary["reasons"][:20]:
+            print(f"   {n:>6}  {group}")
+
+
+async def cmd_list(args) -> None:
+    entries = await dead_letters(**_filters(args), limit=args.limit)
+    if not entries:
+        print("Mos yozuv topilmadi.")
+        return
+    for e in entries:
+        print(
+            f"{e['id']}  {_fmt_ts(e['dropped_at'])}  {e['method']:<22} chat={e['chat_id']:<14} "
+            f"urinish={e['attempts']}  birinchi xato={_fmt_ts(e['failed_at'])}\n"
+            f"    {e['reason']}"
+        )
+
+
+async def cmd_replay(args) -> None:
+    if not args.yes:
+        matched = await count_dead_letters(**_filters(args))
+        if args.limit is not None:
+            matched = min(matched, args.limit)
+        print(f"🔁 {matched} ta xabar navbatga qaytariladi (tezlik: {args.rate}/s).")
+        print("   Tasdiqlash uchun qaytadan --yes bilan ishga tushiring.")
+        sys.exit(2)
+    if not await acquire_replay_lock():
+        print("⏳ Qayta yuborish allaqachon ishlayapti (admin panel yoki boshqa skript).")
+        sys.exit(1)
+    try:
+        replayed = await replay_dead_letters(
+            **_filters(args), limit=args.limit, rate=args.rate, delete=not args.keep
+        )
+    finally:
+        await release_replay_lock()
+    print(f"✅ {replayed} ta xabar navbatga qaytarildi.")
+
+
+async def cmd_purge(args) -> None:
+    if not args.yes:
+        matched = await count_dead_letters(**_filters(args))
+        print(f"⚠️  Filtrga mos {matched} ta dead-letter yozuvi butunlay O'CHIRILADI.")
+        print("   Tasdiqlash uchun qaytadan --yes bilan ishga tushiring.")
+        sys.exit(2)
+    removed = await purge_dead_letters(**_filters(args))
+    print(f"🗑 {removed} ta yozuv o'chirildi.")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Yetkazilmagan xabarlar (dead-letter) vositasi")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_filters(p):
+        p.add_argument("--method", help="aniq metod (send_message, send_video, copy_message, ...)")
+        p.add_argument("--error", help="sabab matnida qidiriladigan qism (katta-kichik harf farqsiz)")
+
+    sub.add_parser("stats", help="umumiy ko'rinish")
+
+    p = sub.add_parser("list", help="oxirgi yozuvlarni ko'rish")
+    add_filters(p)
+    p.add_argument("--limit", type=int, default=20)
+
+    p = sub.add_parser("replay", help="navbatga qaytarish (eskisidan boshlab)")
+    add_filters(p)
+    p.add_argument("--limit", type=int, default=None)
+    p.add_argument("--rate", type=float, default=DEAD_LETTER_REPLAY_RATE, help="soniyasiga nechta xabar")
+    p.add_argument("--keep", action="store_true", help="dead-letter'dan o'chirmaslik")
+    p.add_argument("--yes", action="store_true")
+
+    p = sub.add_parser("purge", help="o'chirish")
+    add_filters(p)
+    p.add_argument("--yes", action="store_true")
+
+    args = parser.parse_args()
+    commands = {"stats": cmd_stats, "list": cmd_list, "replay": cmd_replay, "purge": cmd_purge}
+    asyncio.run(commands[args.command](args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""Lokal "soxta" Telegram Bot API serveri (worker'ni oflayn sinash uchun).
+
+Haqiqiy Telegram'ga bormasdan worker'ni yuklama ostida o'lchash mumkin:
+server har bir so'rovga sozlanadigan kechikish bilan javob beradi va kerak
+bo'lsa xatolarni (429 flood-limit, 403 bloklagan, 500) tasodifiy qaytaradi.
+Har bir yetkazilgan xabar matn/caption'idagi ``#b<raqam>`` belgisi (yoki
+deleteMessage uchun message_id) bo'yicha qayd etiladi — benchmark shundan
+aniq "navbatdan Telegramgacha" kechikishini hisoblaydi.
+
+Foydalanish (alohida jarayon sifatida):
+  python scripts/fake_telegram.py --port 8081 --latency 40 --jitter 20 --flood-rate 0.01
+  # bot/worker: Bot(token, base_url="http://127.0.0.1:8081/bot")
+
+scripts/bench_worker.py uni o'z jarayoni ichida ham ishga tushira oladi.
+Tashqi kutubxonalarsiz — oddiy asyncio HTTP/1.1 (keep-alive bilan).
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from urllib.parse import parse_qsl
+
+logger = logging.getLogger("fake_telegram")
+
+BENCH_KEY_RE = re.compile(r"#b(\d+)")
+# Javobi Message bo'lgan metodlar (qolganlari — True)
+_MESSAGE_METHODS = {
+    "sendmessage", "sendvideo", "sendphoto", "senddocument",
+    "editmessagetext", "editmessagecaption", "editmessagereplymarkup",
+}
+_REASONS = {200: "OK", 400: "Bad Request", 403: "Forbidden", 404: "Not Found",
+            429: "Too Many Requests", 500: "Internal Server Error"}
+
+
+@dataclass
+class FakeConfig:
+    latency_ms: float = 40.0
+    jitter_ms: float = 20.0
+    flood_rate: float = 0.0       # 429 qaytarish ehtimoli
+    retry_after: int = 1
+    forbidden_rate: float = 0.0   # 403 "bot was blocked by the user"
+    error_rate: float = 0.0       # 500 ichki xato
+    seed: int | None = None
+
+
+@dataclass
+class FakeStats:
+    requests: Counter = field(default_factory=Counter)    # metod -> so'rovlar
+    responses: Counter = field(default_factory=Counter)   # status kodi -> soni
+    # benchmark kaliti -> birinchi muvaffaqiyatli yetkazish vaqti (time.time())
+    delivered: dict = field(default_factory=dict)
+    # benchmark kaliti -> urinishlar soni (xato javoblar ham)
+    attempts: Counter = field(default_factory=Counter)
+    connections: int = 0
+
+
+class FakeTelegramServer:
+    def __init__(self, config: FakeConfig | None = None):
+        self.config = config or FakeConfig()
+        self.stats = FakeStats()
+        self._random = random.Random(self.config.seed)
+        self._message_id = 0
+        self._server = None
+        self._connections: dict = {}
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8081) -> str:
+        self._server = await asyncio.start_server(self._handle, host, port)
+        port = self._server.sockets[0].getsockname()[1]
+        logger.info("🧪 Soxta Telegram API: http://%s:%s/bot<token>/<method>", host, port)
+        return f"http://{host}:{port}/bot"
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            # Keep-alive ulanishlarni yopamiz — aks holda handler'lar so'rov kutib qoladi
+            for writer, reader in list(self._connections.items()):
+                reader.feed_eof()
+                writer.close()
+            await asyncio.sleep(0)
+            await self._server.wait_closed()
+
+    # ---------- HTTP ----------
+
+    async def _handle(self, reader, writer):
+        self.stats.connections += 1
+        self._connections[writer] = reader
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                headers = {}
+                for line in header_lines:
+                    name, _, value = line.partition(":")
+                    if value:
+                        headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length") or 0))
+
+                path = request_line.split(" ")[1] if " " in request_line else "/"
+                method = path.rstrip("/").rsplit("/", 1)[-1].split("?", 1)[0]
+                params = self._params(headers.get("content-type", ""), body)
+
+                status, payload = await self._respond(method, params)
+                data = json.dumps(payload).encode()
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(
+                    f"HTTP/1.1 {status} {_REASONS.get(status, 'Error')}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode()
+                    + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    return
+        except Exception as e:
+            logger.debug("Ulanish xatosi: %s", e)
+        finally:
+            self._connections.pop(writer, None)
+            writer.close()
+
+    @staticmethod
+    def _params(content_type: str, body: bytes) -> dict:
+        if not body:
+            return {}
+        if "json" in content_type:
+            try:
+                return json.loads(body)
+            except ValueError:
+                return {}
+        if "x-www-form-urlencoded" in content_type:
+            return dict(parse_qsl(body.decode("utf-8", "replace")))
+        # multipart (fayl yuklash) — faqat oddiy maydonlarni qidiramiz
+        fields = {}
+        for name, value in re.findall(rb'name="([^"]+)"\r\n\r\n(.*?)\r\n--', body, re.S):
+            fields[name.decode()] = value.decode("utf-8", "replace")
+        return fields
+
+    # ---------- Bot API ----------
+
+    @staticmethod
+    def bench_key(method: str, params: dict) -> int | None:
+        text = params.get("text") or params.get("caption") or ""
+        match = BENCH_KEY_RE.search(str(text))
+        if match:
+            return int(match.group(1))
+        if method == "deletemessage" and str(params.get("message_id", "")).isdigit():
+            return int(params["message_id"])
+        return None
+
+    async def _respond(self, method: str, params: dict) -> tuple[int, dict]:
+        cfg = self.config
+        name = method.lower()
+        self.stats.requests[method] += 1
+        key = self.bench_key(name, params)
+        if key is not None:
+            self.stats.attempts[key] += 1
+
+        delay = max(0.0, cfg.latency_ms + self._random.uniform(-cfg.jitter_ms, cfg.jitter_ms)) / 1000
+        if delay:
+            await asyncio.sleep(delay)
+
+        if name != "getme":
+            roll = self._random.random()
+            if roll < cfg.flood_rate:
+                return self._error(429, f"Too Many Requests: retry after {cfg.retry_after}",
+                                   parameters={"retry_after": cfg.retry_after})
+            roll -= cfg.flood_rate
+            if roll < cfg.forbidden_rate:
+                return self._error(403, "Forbidden: bot was blocked by the user")
+            roll -= cfg.forbidden_rate
+            if roll < cfg.error_rate:
+                return self._error(500, "Internal Server Error")
+
+        if key is not None:
+            self.stats.delivered.setdefault(key, time.time())
+        self.stats.responses[200] += 1
+        return 200, {"ok": True, "result": self._result(name, params)}
+
+    def _error(self, code: int, description: str, **extra) -> tuple[int, dict]:
+        self.stats.responses[code] += 1
+        return code, {"ok": False, "error_code": code, "description": description, **extra}
+
+    def _result(self, name: str, params: dict):
+        if name == "getme":
+            return {"id": 1, "is_bot": True, "first_name": "FakeBot", "username": "fake_bot"}
+        self._message_id += 1
+        if name == "copymessage":
+            return {"message_id": self._message_id}
+        if name not in _MESSAGE_METHODS:
+            return True
+        try:
+            chat_id = int(params.get("chat_id"))
+        except (TypeError, ValueError):
+            chat_id = 0
+        message = {
+            "message_id": int(params.get("message_id") or self._message_id),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private" if chat_id > 0 else "supergroup"},
+        }
+        if "text" in params:
+            message["text"] = params["text"]
+        if "caption" in params:
+            message["caption"] = params["caption"]
+        return message
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Soxta Telegram Bot API serveri")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=40.0, help="o'rtacha javob kechikishi (ms)")
+    parser.add_argument("--jitter", type=float, default=20.0, help="kechikish tebranishi ± (ms)")
+    parser.add_argument("--flood-rate", type=float, default=0.0, help="429 ehtimoli (0..1)")
+    parser.add_argument("--retry-after", type=int, default=1, help="429 dagi retry_after (s)")
+    parser.add_argument("--forbidden-rate", type=float, default=0.0, help="403 ehtimoli (0..1)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="500 ehtimoli (0..1)")
+    args = parser.parse_args()
+
+    logging.basicConfig(format="%(asctime)s - %(levelname)s - %(message)s", level=logging.INFO)
+    server = FakeTelegramServer(FakeConfig(
+        latency_ms=args.latency, jitter_ms=args.jitter, flood_rate=args.flood_rate,
+        retry_after=args.retry_after, forbidden_rate=args.forbidden_rate, error_rate=args.error_rate,
+    ))
+
+    async def run():
+        await server.start(args.host, args.port)
+        try:
+            while True:
+                await asyncio.sleep(10)
+                logger.info("📊 so'rovlar=%s javoblar=%s", sum(server.stats.requests.values()),
+                            dict(server.stats.responses))
+        finally:
+            await server.stop()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""Inline qidiruv uchun prefiks (autocomplete) indeksi.
+
+Telegram inline rejimda har bir yozilgan harf uchun alohida update yuboradi
+("a", "av", "ave", ...) — har biriga to'liq fuzzy qidiruv (pg_trgm) qilish
+ortiqcha: 1-3 harfli so'rovda trigram o'xshashligi baribir ma'nosiz. Bu
+yerda jarayon ichida edge n-gram lug'ati saqlanadi:
+
+  • nomning boshlanishi (normalize qilingan, AUTOCOMPLETE_MAX_LEN harfgacha);
+  • nomdagi har bir so'zning boshlanishi;
+  • kino kodining boshlanishi (raqamli so'rovlar uchun, to'liq uzunlikda).
+
+Har bir kalit uchun ro'yxat oldindan saralangan, shuning uchun javob
+lug'atdan bitta o'qish — millisekunddan kam. Natija bo'sh bo'lsa yoki
+so'rov uzunroq bo'lsa, chaqiruvchi odatdagi fuzzy qidiruvga o'tadi.
+
+Indeks utils/trigram_index.py kabi yuritiladi: ishga tushganda yuklanadi,
+bump_catalog_version(movie_id) da shu kinolar yangilanadi, davriy job
+boshqa replikalardagi o'zgarishlarni oladi.
+"""
+import bisect
+import logging
+import re
+import time
+
+from .search_cache import add_catalog_listener, normalize_query
+from .settings import AUTOCOMPLETE_MAX_LEN
+
+logger = logging.getLogger(__name__)
+
+AUTOCOMPLETE_JOB_NAME = "autocomplete_refresh"
+AUTOCOMPLETE_REFRESH_INTERVAL = 300
+
+_WORD_RE = re.compile(r"[^\W_]+")
+
+
+class PrefixIndex:
+    def __init__(self, max_len: int = AUTOCOMPLETE_MAX_LEN):
+        self.max_len = max_len
+        self.ready = False
+        # prefiks -> [(0 — nom shu bilan boshlanadi / 1 — biror so'z, nom, movie_id), ...]
+        self._prefixes: dict[str, list] = {}
+        # kod prefiksi -> [(kod uzunligi, kod, movie_id), ...] — aniq kod birinchi
+        self._codes: dict[str, list] = {}
+        # movie_id -> (ota id, [(jadval, kalit, element), ...]) — o'chirish uchun
+        self._movies: dict[int, tuple] = {}
+        self.loaded_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self._movies)
+
+    # ---------- yozish ----------
+
+    def _entries(self, movie_id: int, name: str | None, code: int | None) -> list[tuple]:
+        entries = []
+        if name:
+            norm = normalize_query(name)
+            title = name.lower()
+            starts = {norm[:k] for k in range(1, min(len(norm), self.max_len) + 1)}
+            words = {
+                word[:k] for word in _WORD_RE.findall(norm) for k in range(1, min(len(word), self.max_len) + 1)
+            }
+            entries.extend((self._prefixes, key, (0, title, movie_id)) for key in starts)
+            entries.extend((self._prefixes, key, (1, title, movie_id)) for key in words - starts)
+        if code is not None:
+            digits = str(code)
+            entries.extend((self._codes, digits[:k], (len(digits), code, movie_id)) for k in range(1, len(digits) + 1))
+        return entries
+
+    def _add(self, movie_id: int, name: str, code: int | None, parent_id: int | None, searchable: bool,
+             *, bulk: bool = False) -> None:
+        entries = self._entries(movie_id, name if searchable else None, code)
+        if not entries:
+            return
+        self._movies[movie_id] = (parent_id, entries)
+        for table, key, item in entries:
+            if bulk:
+                table.setdefault(key, []).append(item)
+            else:
+                bisect.insort(table.setdefault(key, []), item)
+
+    def _remove(self, movie_id: int) -> None:
+        _, entries = self._movies.pop(movie_id, (None, ()))
+        for table, key, item in entries:
+            items = table.get(key)
+            if not items:
+                continue
+            i = bisect.bisect_left(items, item)
+            if i < len(items) and items[i] == item:
+                del items[i]
+            if not items:
+                del table[key]
+
+    def replace(self, rows: list[tuple]) -> None:
+        """To'liq qayta qurish. rows — (movie_id, movie_name, movie_code, parent_movie_id)."""
+        names = {row[0]: row[1] for row in rows}
+        self._prefixes, self._codes, self._movies = {}, {}, {}
+        for movie_id, name, code, parent_id in rows:
+            self._add(movie_id, name, code, parent_id, parent_id is None or names.get(parent_id) != name, bulk=True)
+        for table in (self._prefixes, self._codes):
+            for items in table.values():
+                items.sort()
+        self.loaded_at = time.time()
+        self.ready = True
+
+    def update(self, movie_ids: set, rows: list[tuple], parent_names: dict) -> None:
+        """Berilgan kinolar va ularning qismlarini bazadagi joriy holat bilan almashtirish.
+
+        parent_names — rows dagi qismlarning ota-kino nomlari (meros tekshiruvi uchun).
+        Bazada yo'q (o'chirilgan) id'lar va ularning qismlari (CASCADE bilan
+        o'chgan, rows da yo'q) indeksdan chiqadi.
+        """
+        stale = set(movie_ids) | {row[0] for row in rows}
+        stale.update(i for i, (parent_id, _) in self._movies.items() if parent_id in movie_ids)
+        for movie_id in stale:
+            self._remove(movie_id)
+        for movie_id, name, code, parent_id in rows:
+            self._add(movie_id, name, code, parent_id, parent_id is None or parent_names.get(parent_id) != name)
+
+    # ---------- qidirish ----------
+
+    def complete(self, query: str, *, limit: int, offset: int = 0) -> tuple[list[int], int] | None:
+        """Prefiks bo'yicha saralangan id'lar sahifasi va jami son.
+
+        None — indeks bu so'rovga javob bermaydi (tayyor emas yoki so'rov
+        uzun) va fuzzy qidiruv kerak. Raqamli so'rovda avval kod bo'yicha,
+        keyin (qisqa bo'lsa) nom bo'yicha mosliklar. Ro'yxatlar oldindan
+        saralangan — faqat kerakli sahifa o'qiladi (jami son kod va nom
+        ro'yxatlari uzunligi yig'indisi, ikkalasida ham bor kino ikki marta
+        sanaladi).
+        """
+        if not self.ready:
+            return None
+        norm = normalize_query(query)
+        short = 0 < len(norm) <= self.max_len
+        if not short and not norm.isdecimal():
+            return None
+
+        sources = []
+        if norm.isdecimal():
+            sources.append(self._codes.get(norm, ()))
+        if short:
+            sources.append(self._prefixes.get(norm, ()))
+
+        ids: list[int] = []
+        seen = set()
+        for items in sources:
+            for item in items:
+                movie_id = item[2]
+                if movie_id in seen:
+                    continue
+                seen.add(movie_id)
+                ids.append(movie_id)
+                if len(ids) >= offset + limit:
+                    break
+            if len(ids) >= offset + limit:
+                break
+        return ids[offset:offset + limit], sum(len(items) for items in sources)
+
+
+autocomplete_index = PrefixIndex()
+
+
+async def _fetch_rows(movie_ids: set | None = None) -> list[tuple]:
+    from tortoise.expressions import Q
+
+    from database import Movie
+
+    qs = Movie.all()
+    if movie_ids is not None:
+        qs = Movie.filter(Q(movie_id__in=movie_ids) | Q(parent_movie_id__in=movie_ids))
+    return await qs.values_list("movie_id", "movie_name", "movie_code", "parent_movie_id")
+
+
+async def load_autocomplete_index(context=None) -> None:
+    """Indeksni bazadan to'liq qayta yuklash (ishga tushganda va JobQueue callback)."""
+    if AUTOCOMPLETE_MAX_LEN <= 0:
+        return
+    try:
+        started = time.perf_counter()
+        autocomplete_index.replace(await _fetch_rows())
+        logger.info(
+            "🔤 Autocomplete indeksi yuklandi: %s ta kino, %.0f ms",
+            len(autocomplete_index), (time.perf_counter() - started) * 1000,
+        )
+    except Exception as e:
+        logger.warning("⚠️ Autocomplete indeksini yuklab bo'lmadi: %s", e)
+
+
+async def _on_catalog_change(movie_ids: tuple) -> None:
+    if not autocomplete_index.ready:
+        return
+    if not movie_ids:
+        await load_autocomplete_index()
+        return
+    from database import Movie
+
+    ids = set(movie_ids)
+    try:
+        rows = await _fetch_rows(ids)
+        parent_names = {row[0]: row[1] for row in rows}
+        missing = {row[3] for row in rows if row[3] is not None} - parent_names.keys()
+        if missing:
+            parent_names.update(await Movie.filter(movie_id__in=missing).values_list("movie_id", "movie_name"))
+        autocomplete_index.update(ids, rows, parent_names)
+    except Exception as e:
+        logger.warning("⚠️ Autocomplete indeksini yangilab bo'lmadi (%s): %s", ids, e)
+
+
+async def setup_autocomplete() -> None:
+    if AUTOCOMPLETE_MAX_LEN <= 0:
+        return
+    add_catalog_listener(_on_catalog_change)
+    await load_autocomplete_index()
+
+
+def schedule_autocomplete_refresh(job_queue) -> None:
+    if not autocomplete_index.ready:
+        return
+    for job in job_queue.get_jobs_by_name(AUTOCOMPLETE_JOB_NAME):
+        job.schedule_removal()
+    job_queue.run_repeating(
+        load_autocomplete_index, interval=AUTOCOMPLETE_REFRESH_INTERVAL, first=AUTOCOMPLETE_REFRESH_INTERVAL,
+        name=AUTOCOMPLETE_JOB_NAME,
+    )
@@ -0,0 +1,78 @@
+"""Botni bloklagan foydalanuvchilar reestri: Redis set + User.is_blocked.
+
+Worker Forbidden / "chat not found" olganda shaxsiy chatni Redis'dagi BLOCKED_CHATS
+ga qo'shadi (DB'ga ulanmaydi). Bot jarayoni esa:
+  • ishga tushganda DB'dagi bloklanganlarni Redis'ga yuklaydi (Redis
+    tozalangan bo'lsa ham ro'yxat yo'qolmaydi);
+  • davriy job bilan worker qo'shgan yangi chatlarni User.is_blocked ga yozadi;
+  • /start da foydalanuvchini ikkala joydan ham chiqaradi.
+"""
+import logging
+from datetime import datetime
+
+from database import User
+from .redis_manager import BLOCKED_CHANGES, BLOCKED_CHATS, blocked_among, r, unmark_chat_blocked
+
+logger = logging.getLogger(__name__)
+
+BLOCKED_SYNC_JOB_NAME = "blocked_users_sync"
+BLOCKED_SYNC_INTERVAL = 60
+_SYNC_BATCH = 500
+
+
+async def load_blocked_users() -> None:
+    """DB'dagi bloklangan foydalanuvchilarni Redis set'iga yuklash."""
+    try:
+        # Oldingi versiya kanal/guruhlarni ham qo'shgan — ular /start bosa olmaydi
+        stale = [chat_id async for chat_id in r.sscan_iter(BLOCKED_CHATS, match="-*")]
+        for start in range(0, len(stale), _SYNC_BATCH):
+            await r.srem(BLOCKED_CHATS, *stale[start:start + _SYNC_BATCH])
+        ids = await User.filter(is_blocked=True).values_list("telegram_id", flat=True)
+        for start in range(0, len(ids), _SYNC_BATCH):
+            await r.sadd(BLOCKED_CHATS, *ids[start:start + _SYNC_BATCH])
+    except Exception as e:
+        logger.warning("⚠️ Bloklangan foydalanuvchilarni yuklab bo'lmadi: %s", e)
+        return
+    if ids:
+        logger.info("⛔ %s ta bloklangan foydalanuvchi Redis'ga yuklandi", len(ids))
+
+
+async def sync_blocked_users(context=None) -> None:
+    """Worker qo'shgan bloklangan chatlarni User.is_blocked ga yozish (JobQueue callback)."""
+    try:
+        while True:
+            raw_ids = await r.lpop(BLOCKED_CHANGES, _SYNC_BATCH)
+            if not raw_ids:
+                return
+            ids = []
+            for raw in raw_ids:
+                try:
+                    ids.append(int(raw))
+                except ValueError:
+                    continue
+            # Shu orada /start bosganlar ro'yxatdan chiqqan — ularni belgilamaymiz
+            still_blocked = await blocked_among(ids)
+            if still_blocked:
+                await User.filter(telegram_id__in=list(still_blocked), is_blocked=False).update(
+                    is_blocked=True, blocked_at=datetime.now()
+                )
+    except Exception as e:
+        logger.warning("⚠️ Bloklangan foydalanuvchilarni DB'ga yozib bo'lmadi: %s", e)
+
+
+async def unblock_user(user: User) -> None:
+    """Foydalanuvchi /start bosdi — yana xabar olishi mumkin."""
+    await unmark_chat_blocked(user.telegram_id)
+    if user.is_blocked:
+        user.is_blocked = False
+        user.blocked_at = None
+        await user.save(update_fields=["is_blocked", "blocked_at"])
+
+
+def schedule_blocked_sync(job_queue) -> None:
+    for job in job_queue.get_jobs_by_name(BLOCKED_SYNC_JOB_NAME):
+        job.schedule_removal()
+    job_queue.run_repeating(
+        sync_blocked_users, interval=BLOCKED_SYNC_INTERVAL, first=BLOCKED_SYNC_INTERVAL,
+        name=BLOCKED_SYNC_JOB_NAME,
+    )
@@ -7,6 +7,7 @@ import logging
 import html
 
 from utils import ADMIN_ID
+from utils.redis_manager import PRIORITY_ALERTS
 
 logger = logging.getLogger(__name__)
 
@@ -58,7 +59,8 @@ class ErrorNotificator:
                 await context.bot.send_message(
                     chat_id=admin_id,
                     text=message,
-                    parse_mode="HTML"
+                    parse_mode="HTML",
+                    priority=PRIORITY_ALERTS,
                 )
             except Exception as e:
                 logger.error(f"Admin {admin_id} ga yuborib bo'lmadi: {e}")
@@ -38,9 +38,21 @@ async def get_child_parts(movie: Movie) -> list[Movie]:
 async def movie_caption(movie: Movie) -> str:
     """Kino ma'lumotlari (HTML caption). Janr/davlatlarni o'zi yuklaydi."""
     genres = await movie.movie_genre.all().order_by("name")
-    genres_text = ", ".join(g.name for g in genres) if genres else UNKNOWN
-
     countries = await movie.movie_country.all().order_by("name")
+    return format_movie_caption(movie, genres, countries)
+
+
+def prefetched_movie_caption(movie: Movie) -> str:
+    """movie_caption() — janr/davlatlar oldindan yuklangan kino uchun
+    (prefetch_related("movie_genre", "movie_country")): bazaga bormaydi.
+    """
+    genres = sorted(movie.movie_genre, key=lambda g: g.name)
+    countries = sorted(movie.movie_country, key=lambda c: c.name)
+    return format_movie_caption(movie, genres, countries)
+
+
+def format_movie_caption(movie: Movie, genres, countries) -> str:
+    genres_text = ", ".join(g.name for g in genres) if genres else UNKNOWN
     countries_text = ", ".join(c.name for c in countries) if countries else UNKNOWN
 
     caption = (
@@ -0,0 +1,101 @@
+"""Navbat payloadlari uchun ixcham, versiyalangan kodlash.
+
+Format (v2): 1 bayt versiya + 1 bayt bayroqlar + tana.
+  • tana — msgpack (o'rnatilgan bo'lsa) yoki ixcham JSON;
+  • katta tana zlib bilan siqiladi. zlib'ga oldindan lug'at (zdict) beriladi:
+    unda klaviatura va payloadlarda doim takrorlanadigan kalitlar/shablonlar
+    bor, shuning uchun hatto o'rtacha kino kartasi ham yaxshi siqiladi.
+
+"{" bilan boshlanadigan payload — eski (v1) JSON format: worker yangilanish
+paytida navbatda qolgan eski xabarlarni ham o'qiy oladi.
+"""
+import json
+import zlib
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+CODEC_JSON = "json"
+CODEC_COMPACT = "compact"
+
+_VERSION = 2
+_FLAG_MSGPACK = 0x01
+_FLAG_ZLIB = 0x02
+
+# Shundan kichik tana siqilmaydi (zlib sarlavhasi foyda bermaydi)
+COMPRESS_MIN = 160
+_ZLIB_LEVEL = 6
+
+# DIQQAT: lug'at formatning bir qismi. Uni o'zgartirish — yangi versiya
+# (_VERSION) degani, aks holda navbatdagi xabarlar ochilmay qoladi.
+# zlib lug'atning oxiridagi qismlarni afzal ko'radi — eng ko'p uchraydiganlar oxirida.
+_ZDICT = "".join([
+    "📥 Kod: <code>", "🎬 <b>", "</b>\n", "⭐️ ", "📅 ", "🎭 ", "🌐 ", "🗂 ",
+    "https://t.me/share/url?url=", "https://t.me/", "?start=movie_", "?start=part_",
+    "switch_inline_query", "edit_movie_", "ls:view_", "rate_", "part_", "movie_",
+    "disable_notification", "protect_content", "inline_message_id", "message_id",
+    "from_chat_id", "callback_data", "inline_keyboard", "reply_markup",
+    "parse_mode", "HTML", "caption", "send_video", "send_message",
+    "edit_message_text", "edit_message_caption", "priority", "interactive", "bulk",
+    "chat_id", "method", "content", "args", "text", "url", "id",
+]).encode("utf-8")
+
+
+class PayloadError(ValueError):
+    """Payloadni ochib bo'lmadi (buzilgan yoki noma'lum versiya)."""
+
+
+def _json_bytes(payload: dict) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def encode(payload: dict, codec: str = CODEC_COMPACT) -> bytes:
+    if codec == CODEC_JSON:
+        return _json_bytes(payload)
+
+    flags = 0
+    if msgpack is not None:
+        body = msgpack.packb(payload, use_bin_type=True)
+        flags |= _FLAG_MSGPACK
+    else:
+        body = _json_bytes(payload)
+
+    if len(body) >= COMPRESS_MIN:
+        compressor = zlib.compressobj(_ZLIB_LEVEL, zdict=_ZDICT)
+        packed = compressor.compress(body) + compressor.flush()
+        if len(packed) < len(body):
+            body = packed
+            flags |= _FLAG_ZLIB
+
+    return bytes((_VERSION, flags)) + body
+
+
+def decode(raw) -> dict:
+    if isinstance(raw, str):
+        raw = raw.encode("utf-8")
+    if not raw:
+        raise PayloadError("bo'sh payload")
+
+    try:
+        # v1: oddiy JSON
+        if raw[:1] == b"{":
+            return json.loads(raw)
+
+        if raw[0] != _VERSION or len(raw) < 2:
+            raise PayloadError(f"noma'lum payload versiyasi: {raw[0]}")
+        flags = raw[1]
+        body = raw[2:]
+        if flags & _FLAG_ZLIB:
+            decompressor = zlib.decompressobj(zdict=_ZDICT)
+            body = decompressor.decompress(body) + decompressor.flush()
+        if flags & _FLAG_MSGPACK:
+            if msgpack is None:
+                raise PayloadError("msgpack payload, lekin msgpack o'rnatilmagan")
+            return msgpack.unpackb(body, raw=False)
+        return json.loads(body)
+    except PayloadError:
+        raise
+    except (ValueError, TypeError, zlib.error) as e:
+        raise PayloadError(str(e)) from e
@@ -0,0 +1,225 @@
+"""Worker metrikalari: hisoblagichlar, gistogrammalar va ularni chiqarish.
+
+Worker jarayoni ichida yig'iladi va ikki yo'l bilan ko'rsatiladi:
+  • Prometheus matn formati — METRICS_PORT berilsa, lokal HTTP port'da
+    (``curl localhost:<port>/metrics``);
+  • Redis hash (METRICS_HASH) — har bir worker o'z "snapshot"ini JSON qilib
+    yozadi, admin statistika paneli barcha tirik worker'larnikini jamlaydi.
+
+Gistogrammalar qat'iy chegaralar (bucket) bilan — worker'lar orasida oddiy
+qo'shish orqali birlashtiriladi, kvantillar shu chegaralardan taxminlanadi.
+"""
+import asyncio
+import json
+import logging
+import time
+from collections import defaultdict, deque
+
+logger = logging.getLogger(__name__)
+
+METRICS_PREFIX = "kino"
+# Navbatga qo'yilgandan yuborilgunicha (soniya) — qayta urinishlar ham kiradi
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+# Bitta Telegram HTTP so'rovi (soniya)
+REQUEST_BUCKETS = (0.025, 0.05, 0.1, 0.2, 0.35, 0.5, 1, 2, 5, 10)
+
+# Hisoblagich nomi -> Prometheus izohi
+COUNTERS = {
+    "sent": "Telegramga muvaffaqiyatli yuborilgan xabarlar",
+    "retry_after": "Telegram flood-limit (429 RetryAfter) javoblari",
+    "retries": "Xato tufayli kechiktirib qayta urinishlar",
+    "dropped": "Urinishlari tugab dead-letter'ga o'tgan xabarlar",
+    "forbidden": "Bloklagan / mavjud bo'lmagan chat javoblari",
+    "blocked_skipped": "Bloklangan chat sababli yuborilmagan xabarlar",
+    "pool_timeouts": "HTTP pulida bo'sh ulanish topilmagan so'rovlar",
+}
+HISTOGRAMS = {
+    "enqueue_to_send_seconds": ("Navbatga qo'yilgandan yuborilgunicha vaqt", LATENCY_BUCKETS),
+    "telegram_request_seconds": ("Telegram Bot API so'rovi davomiyligi", REQUEST_BUCKETS),
+}
+# Rate (daqiqasiga) hisoblash uchun shuncha vaqt oldingi holat bilan solishtiriladi
+RATE_WINDOW = 60
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+    def to_dict(self) -> dict:
+        return {"b": list(self.buckets), "c": list(self.counts), "sum": self.sum, "n": self.count}
+
+
+def histogram_quantile(data: dict, q: float) -> float | None:
+    """Bucket'lar bo'yicha kvantil (bucket ichida chiziqli interpolyatsiya)."""
+    total = data.get("n") or 0
+    if not total:
+        return None
+    rank = q * total
+    seen = 0
+    lower = 0.0
+    for bound, n in zip([*data["b"], None], data["c"]):
+        if n and seen + n >= rank:
+            if bound is None:
+                return lower
+            return lower + (bound - lower) * (rank - seen) / n
+        seen += n
+        if bound is not None:
+            lower = bound
+    return lower
+
+
+def _merge_histogram(into: dict | None, data: dict) -> dict:
+    if into is None or into["b"] != data["b"]:
+        return {"b": list(data["b"]), "c": list(data["c"]), "sum": data["sum"], "n": data["n"]}
+    into["c"] = [a + b for a, b in zip(into["c"], data["c"])]
+    into["sum"] += data["sum"]
+    into["n"] += data["n"]
+    return into
+
+
+def merge_snapshots(snapshots: list[dict]) -> dict:
+    """Bir nechta worker snapshot'ini bitta umumiy ko'rinishga jamlash (admin panel uchun)."""
+    merged = {"workers": len(snapshots), "counters": {}, "rates": {}, "hist": {}, "gauges": {}}
+    newest = max(snapshots, key=lambda s: s.get("ts", 0), default=None)
+    for snap in snapshots:
+        for section in ("counters", "rates"):
+            for name, labels in snap.get(section, {}).items():
+                target = merged[section].setdefault(name, {})
+                for label, value in labels.items():
+                    target[label] = target.get(label, 0) + value
+        for name, labels in snap.get("hist", {}).items():
+            target = merged["hist"].setdefault(name, {})
+            for label, data in labels.items():
+                target[label] = _merge_histogram(target.get(label), data)
+        # Jarayonga xos gauge'lar (buffer, HTTP pool) — qo'shiladi
+        for name, value in snap.get("local_gauges", {}).items():
+            merged["gauges"][name] = merged["gauges"].get(name, 0) + value
+    if newest:
+        # Navbat chuqurligi umumiy (Redis'dagi) — eng yangi snapshot'dan olinadi
+        merged["gauges"].update(newest.get("gauges", {}))
+    return merged
+
+
+def _labels(label: str, key: str) -> str:
+    return f'{{{key}="{label}"}}' if label else ""
+
+
+class WorkerMetrics:
+    def __init__(self):
+        self.started = time.time()
+        self.counters: dict[str, dict[str, int]] = {name: defaultdict(int) for name in COUNTERS}
+        self.histograms: dict[str, dict[str, Histogram]] = {name: {} for name in HISTOGRAMS}
+        # (vaqt, hisoblagichlar nusxasi) — daqiqalik rate uchun
+        self._history: deque = deque()
+
+    def inc(self, name: str, label: str = "", n: int = 1) -> None:
+        self.counters[name][label] += n
+
+    def observe(self, name: str, label: str, value: float) -> None:
+        hist = self.histograms[name].get(label)
+        if hist is None:
+            hist = self.histograms[name][label] = Histogram(HISTOGRAMS[name][1])
+        hist.observe(value)
+
+    def _counters_copy(self) -> dict:
+        return {name: dict(labels) for name, labels in self.counters.items()}
+
+    def _rates(self, now: float, counters: dict) -> dict:
+        self._history.append((now, counters))
+        while len(self._history) > 1 and now - self._history[1][0] >= RATE_WINDOW:
+            self._history.popleft()
+        then, old = self._history[0]
+        elapsed = now - then
+        if elapsed <= 0:
+            return {}
+        return {
+            name: {
+                label: round((value - old.get(name, {}).get(label, 0)) * 60 / elapsed, 2)
+                for label, value in labels.items()
+            }
+            for name, labels in counters.items()
+        }
+
+    def snapshot(self, worker_id: str, gauges: dict, local_gauges: dict) -> dict:
+        now = time.time()
+        counters = self._counters_copy()
+        return {
+            "worker": worker_id,
+            "ts": now,
+            "started": self.started,
+            "counters": counters,
+            "rates": self._rates(now, counters),
+            "hist": {
+                name: {label: h.to_dict() for label, h in labels.items()}
+                for name, labels in self.histograms.items()
+            },
+            "gauges": gauges,
+            "local_gauges": local_gauges,
+        }
+
+    def render_prometheus(self, gauges: dict, local_gauges: dict) -> str:
+        lines = []
+        for name, value in sorted({**gauges, **local_gauges}.items()):
+            # "queue_depth:bulk" -> kino_queue_depth{lane="bulk"}
+            base, _, label = name.partition(":")
+            metric = f"{METRICS_PREFIX}_{base}"
+            lines.append(f"{metric}{_labels(label, 'lane')} {value}")
+        for name, help_text in COUNTERS.items():
+            metric = f"{METRICS_PREFIX}_{name}_total"
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for label, value in sorted(self.counters[name].items()):
+                lines.append(f"{metric}{_labels(label, 'method')} {value}")
+        for name, (help_text, _) in HISTOGRAMS.items():
+            metric = f"{METRICS_PREFIX}_{name}"
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} histogram")
+            for label, hist in sorted(self.histograms[name].items()):
+                cumulative = 0
+                for bound, n in zip([*hist.buckets, "+Inf"], hist.counts):
+                    cumulative += n
+                    lines.append(f'{metric}_bucket{{method="{label}",le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{method="{label}"}} {hist.sum}')
+                lines.append(f'{metric}_count{{method="{label}"}} {hist.count}')
+        return "\n".join(lines) + "\n"
+
+
+async def serve_prometheus(render, host: str, port: int):
+    """Minimal HTTP server: har qanday GET so'roviga render() natijasini qaytaradi."""
+
+    async def handle(reader, writer):
+        try:
+            await reader.readuntil(b"\r\n\r\n")
+            body = (await render()).encode()
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                + f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+                + body
+            )
+            await writer.drain()
+        except Exception as e:
+            logger.debug("Metrics so'rovi xatosi: %s", e)
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    logger.info("📈 Prometheus metrikalari: http://%s:%s/metrics", host, port)
+    return server
+
+
+def dumps_snapshot(snapshot: dict) -> str:
+    return json.dumps(snapshot, separators=(",", ":"))
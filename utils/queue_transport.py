@@ -0,0 +1,520 @@
+"""Worker navbati uchun almashtiriladigan transport qatlami.
+
+Ikki xil amalga oshirish bor, QUEUE_BACKEND sozlamasi bilan tanlanadi:
+
+  • ListTransport   — Redis LIST. Olingan xabar ACK bo'lguncha worker'ning
+    "processing" ro'yxatida turadi; worker tirikligi heartbeat kaliti bilan
+    bildiriladi, o'lik worker'ning xabarlari navbatga qaytariladi.
+  • StreamTransport — Redis Streams consumer group (XADD / XREADGROUP / XACK /
+    XAUTOCLAIM). Pending-entry hisobi va consumer lag Redis'ning o'zida — bir
+    nechta worker replikasi bir xabarni ikki marta olmaydi. ACK qilingan
+    yozuvlar XDEL bilan o'chiriladi, shuning uchun stream uzunligi = hali
+    yuborilmagan xabarlar; MAXLEN bilan kesish ishlatilmaydi (u yuborilmagan
+    xabarlarni jimgina o'chirib yuborardi).
+
+Worker ichida har bir olingan xabar "token" bilan yuradi va ACK aynan shu
+token bilan qilinadi (list uchun — asl payload, stream uchun — (kalit, id),
+stream'da ref'dan olingan edit'lar uchun — (HELD, held kaliti, payload)).
+Navbatlar bu yerda mantiqiy nomlari bilan beriladi (masalan "bot_queue");
+Redis'dagi haqiqiy kalitni key() qaytaradi — Lua skriptlar uchun kerak.
+
+Payloadlar binar (utils/queue_codec.py), shuning uchun transportga javoblarni
+dekodlamaydigan Redis ulanishi beriladi (decode_responses=False).
+"""
+import logging
+import time
+
+from redis.exceptions import ResponseError
+
+logger = logging.getLogger(__name__)
+
+
+def _text(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _payload(fields):
+    """Stream yozuvidagi payload (yozuv o'chirilgan bo'lsa — None)."""
+    if not fields:
+        return None
+    return fields.get(b"p", fields.get("p"))
+
+# Navbatlardan ARGV[1] tagacha xabarni processing ro'yxatiga atomar ko'chirish.
+# Avval har bir navbatdan o'z kvotasi (ARGV[i + 1]) olinadi, qolgan joy esa
+# navbatlar tartibida to'ldiriladi. KEYS — navbatlar + oxirida processing.
+# Qaytaradi: {navbat indeksi, xabar, navbat indeksi, xabar, ...}.
+_LIST_POP_LUA = """
+local dest = KEYS[#KEYS]
+local left = tonumber(ARGV[1])
+local out = {}
+local function take(i, n)
+    while n > 0 and left > 0 do
+        local item = redis.call('LMOVE', KEYS[i], dest, 'LEFT', 'RIGHT')
+        if not item then
+            return
+        end
+        table.insert(out, i)
+        table.insert(out, item)
+        n = n - 1
+        left = left - 1
+    end
+end
+for i = 1, #KEYS - 1 do
+    take(i, tonumber(ARGV[i + 1]))
+end
+for i = 1, #KEYS - 1 do
+    take(i, left)
+end
+return out
+"""
+
+# O'lik worker'ning processing ro'yxatini navbat BOSHIGA (asl tartibda) qaytarish.
+# Ro'yxatda turli ustuvorlikdagi xabarlar aralash bo'lgani uchun hammasi
+# birinchi (interactive) navbatga qaytadi (ular allaqachon kechikkan).
+# Heartbeat hali mavjud bo'lsa (worker tirik) — hech narsa qilinmaydi (-1).
+_LIST_RECOVER_LUA = """
+if redis.call('EXISTS', KEYS[3]) == 1 then
+    return -1
+end
+local n = 0
+while redis.call('LMOVE', KEYS[1], KEYS[2], 'RIGHT', 'LEFT') do
+    n = n + 1
+end
+redis.call('SREM', KEYS[4], ARGV[1])
+return n
+"""
+
+# Edit ref'i uchun to'plangan edit'larni (content, keyin markup) olish.
+# List rejimida ular processing ro'yxatiga qo'yiladi va ref ACK qilinadi —
+# hammasi atomar, worker shu orada o'lsa ham edit'lar yo'qolmaydi.
+# KEYS: edits hash, pending set[, processing]; ARGV: target[, ref payload].
+_TAKE_EDITS_LUA = """
+local out = {}
+for _, slot in ipairs({'content', 'markup'}) do
+    local field = ARGV[1] .. '|' .. slot
+    local payload = redis.call('HGET', KEYS[1], field)
+    if payload then
+        redis.call('HDEL', KEYS[1], field)
+        if KEYS[3] then
+            redis.call('RPUSH', KEYS[3], payload)
+        end
+        table.insert(out, payload)
+    end
+end
+redis.call('SREM', KEYS[2], ARGV[1])
+if KEYS[3] then
+    redis.call('LREM', KEYS[3], 1, ARGV[2])
+end
+return out
+"""
+
+
+# Stream rejimi: ref uchun to'plangan edit'larni worker'ning "held" ro'yxatiga
+# ko'chirish va ref'ni ACK qilish — hammasi atomar. Edit'lar ro'yxatdan
+# yuborilgandan keyin (o'z tokeni bilan) olinadi; worker shu orada o'lsa
+# _STREAM_RECOVER_HELD_LUA ularni stream'ga qaytaradi (list rejimidagi
+# processing ro'yxatining o'xshashi).
+# KEYS: edits hash, pending set, held ro'yxat, stream, held worker'lar set'i;
+# ARGV: target, ref entry id, group, worker id.
+_STREAM_TAKE_EDITS_LUA = """
+local out = {}
+for _, slot in ipairs({'content', 'markup'}) do
+    local field = ARGV[1] .. '|' .. slot
+    local payload = redis.call('HGET', KEYS[1], field)
+    if payload then
+        redis.call('HDEL', KEYS[1], field)
+        redis.call('RPUSH', KEYS[3], payload)
+        table.insert(out, payload)
+    end
+end
+redis.call('SREM', KEYS[2], ARGV[1])
+if #out > 0 then
+    redis.call('SADD', KEYS[5], ARGV[4])
+end
+redis.call('XACK', KEYS[4], ARGV[3], ARGV[2])
+redis.call('XDEL', KEYS[4], ARGV[2])
+return out
+"""
+
+# O'lik worker'ning held ro'yxatini stream oxiriga qaytarish (tirik bo'lsa — -1).
+# KEYS: held ro'yxat, stream, tiriklik kaliti, held worker'lar set'i; ARGV: worker id.
+_STREAM_RECOVER_HELD_LUA = """
+if redis.call('EXISTS', KEYS[3]) == 1 then
+    return -1
+end
+local items = redis.call('LRANGE', KEYS[1], 0, -1)
+for _, payload in ipairs(items) do
+    redis.call('XADD', KEYS[2], '*', 'p', payload)
+end
+redis.call('DEL', KEYS[1])
+redis.call('SREM', KEYS[4], ARGV[1])
+return #items
+"""
+
+
+class _BaseTransport:
+    name = ""
+    # Boshqa Lua skriptlar ichida navbatga yozish uchun: push(kalit, payload)
+    lua_push = ""
+
+    def __init__(self, client, *, queues: list[str], worker_id: str):
+        self._r = client
+        self.queues = list(queues)
+        self.worker_id = worker_id
+        self._take_edits = client.register_script(_TAKE_EDITS_LUA)
+
+    def key(self, queue: str) -> str:
+        return queue
+
+    def ack_to(self, pipe, token) -> None:
+        """ACK buyrug'ini tashqi tranzaksiyaga (pipeline) qo'shish."""
+        raise NotImplementedError
+
+    def acked(self, token) -> None:
+        """Tranzaksiya muvaffaqiyatli bajarilgandan keyin lokal hisobni yangilash."""
+
+    async def ack(self, token) -> None:
+        pipe = self._r.pipeline(transaction=True)
+        self.ack_to(pipe, token)
+        await pipe.execute()
+        self.acked(token)
+
+    def push_to(self, pipe, queue: str, raws: list) -> None:
+        """Bir nechta payloadni navbatga yozish buyrug'ini pipeline'ga qo'shish."""
+        raise NotImplementedError
+
+    async def push_many(self, queue: str, raws: list) -> None:
+        """Payloadlarni bitta round-trip'da navbat oxiriga yozish."""
+        if not raws:
+            return
+        pipe = self._r.pipeline(transaction=False)
+        self.push_to(pipe, queue, raws)
+        await pipe.execute()
+
+
+class ListTransport(_BaseTransport):
+    name = "list"
+    lua_push = "local function push(key, payload) return redis.call('RPUSH', key, payload) end"
+
+    HEARTBEAT_TTL = 30
+
+    def __init__(self, client, *, queues: list[str], worker_id: str, namespace: str):
+        super().__init__(client, queues=queues, worker_id=worker_id)
+        self._workers_set = f"{namespace}:workers"
+        self._processing_prefix = f"{namespace}:processing:"
+        self._heartbeat_prefix = f"{namespace}:heartbeat:"
+        self.processing = self._processing_prefix + worker_id
+        self._pop = client.register_script(_LIST_POP_LUA)
+        self._recover = client.register_script(_LIST_RECOVER_LUA)
+
+    async def push(self, queue: str, raw) -> None:
+        await self._r.rpush(queue, raw)
+
+    def push_to(self, pipe, queue: str, raws: list) -> None:
+        pipe.rpush(queue, *raws)
+
+    async def pop(self, queues: list[str], quotas: list[int], limit: int, timeout: float) -> list:
+        """Navbatlardan ``limit`` tagacha xabarni o'zlashtirib olish.
+
+        ``quotas`` — har bir navbatdan birinchi navbatda olinadigan son; qolgan
+        joy ``queues`` tartibida to'ldiriladi. Qaytaradi: [(navbat, token,
+        payload), ...]. Hammasi bo'sh bo'lsa — birinchi navbatda ``timeout``
+        soniya kutiladi (bitta xabar).
+        """
+        found = await self._pop(keys=[*queues, self.processing], args=[limit, *quotas])
+        if found:
+            return [
+                (queues[int(found[i]) - 1], found[i + 1], found[i + 1])
+                for i in range(0, len(found), 2)
+            ]
+        raw = await self._r.blmove(queues[0], self.processing, timeout, "LEFT", "RIGHT")
+        return [(queues[0], raw, raw)] if raw else []
+
+    def ack_to(self, pipe, token) -> None:
+        pipe.lrem(self.processing, 1, token)
+
+    async def take_edits(self, hash_key: str, pending_key: str, target: str, token) -> list:
+        raws = await self._take_edits(
+            keys=[hash_key, pending_key, self.processing], args=[target, token]
+        )
+        return [(raw, raw) for raw in raws]
+
+    async def _recover_worker(self, worker_id: str) -> int:
+        """Worker'ning ACK qilinmagan xabarlarini navbatga qaytarish (-1 — worker tirik)."""
+        return int(await self._recover(
+            keys=[
+                self._processing_prefix + worker_id,
+                self.queues[0],
+                self._heartbeat_prefix + worker_id,
+                self._workers_set,
+            ],
+            args=[worker_id],
+        ))
+
+    async def start(self) -> None:
+        """Ishga tushishda: oldingi hayotdan qolgan xabarlarni qaytarish va ro'yxatdan o'tish."""
+        await self._r.delete(self._heartbeat_prefix + self.worker_id)
+        recovered = await self._recover_worker(self.worker_id)
+        if recovered:
+            logger.warning("♻️ Oldingi ishga tushirishdan %s ta xabar navbatga qaytarildi", recovered)
+        await self._beat()
+
+    async def _beat(self) -> None:
+        await self._r.set(
+            self._heartbeat_prefix + self.worker_id, int(time.time()), ex=self.HEARTBEAT_TTL
+        )
+        await self._r.sadd(self._workers_set, self.worker_id)
+
+    async def keepalive(self) -> None:
+        """O'z heartbeat'ini yangilash va o'lik worker'larning xabarlarini qaytarish."""
+        await self._beat()
+        for worker_id in map(_text, await self._r.smembers(self._workers_set)):
+            if worker_id == self.worker_id:
+                continue
+            recovered = await self._recover_worker(worker_id)
+            if recovered >= 0:
+                logger.warning("♻️ O'lik worker %s: %s ta xabar navbatga qaytarildi", worker_id, recovered)
+
+    async def stats(self) -> dict:
+        pipe = self._r.pipeline(transaction=False)
+        for queue in self.queues:
+            pipe.llen(queue)
+        depths = await pipe.execute()
+        return {queue: {"depth": depth} for queue, depth in zip(self.queues, depths)}
+
+
+class StreamTransport(_BaseTransport):
+    name = "stream"
+    GROUP = "workers"
+
+    lua_push = "local function push(key, payload) return redis.call('XADD', key, '*', 'p', payload) end"
+
+    def __init__(self, client, *, queues: list[str], worker_id: str, warn_len: int, claim_idle: float):
+        super().__init__(client, queues=queues, worker_id=worker_id)
+        self._warn_len = warn_len
+        self._claim_idle_ms = int(claim_idle * 1000)
+        # stream kaliti -> shu worker hozir ishlayotgan entry id'lari
+        self._inflight: dict[str, set] = {}
+        # warn_len dan oshgani haqida allaqachon ogohlantirilgan stream'lar
+        self._over_warn_len: set = set()
+        self._take_held = client.register_script(_STREAM_TAKE_EDITS_LUA)
+        self._recover_held = client.register_script(_STREAM_RECOVER_HELD_LUA)
+
+    def key(self, queue: str) -> str:
+        # List kalitlari bilan to'qnashmasligi uchun alohida nom
+        return f"{queue}:stream"
+
+    async def push(self, queue: str, raw) -> None:
+        await self._r.xadd(self.key(queue), {"p": raw})
+
+    def push_to(self, pipe, queue: str, raws: list) -> None:
+        stream_key = self.key(queue)
+        for raw in raws:
+            pipe.xadd(stream_key, {"p": raw})
+
+    def _track(self, queue: str, response) -> list:
+        if isinstance(response, dict):
+            response = list(response.items())
+        if not response:
+            return []
+        stream_key, entries = response[0]
+        inflight = self._inflight.setdefault(stream_key, set())
+        found = []
+        for entry_id, fields in entries:
+            inflight.add(entry_id)
+            found.append((queue, (stream_key, entry_id), _payload(fields)))
+        return found
+
+    async def _read(self, queue: str, count: int, block: int | None = None) -> list:
+        response = await self._r.xreadgroup(
+            self.GROUP, self.worker_id, {self.key(queue): ">"}, count=count, block=block
+        )
+        return self._track(queue, response)
+
+    async def pop(self, queues: list[str], quotas: list[int], limit: int, timeout: float) -> list:
+        """ListTransport.pop bilan bir xil: kvotalar, keyin tartib bo'yicha to'ldirish."""
+        found = []
+        for queue, quota in zip(queues, quotas):
+            n = min(quota, limit - len(found))
+            if n > 0:
+                found += await self._read(queue, n)
+        for queue in queues:
+            if len(found) >= limit:
+                break
+            found += await self._read(queue, limit - len(found))
+        if found:
+            return found
+        return await self._read(queues[0], 1, block=max(1, int(timeout * 1000)))
+
+    # Held ro'yxatdagi edit tokeni: (HELD, held kaliti, payload)
+    HELD = "held"
+
+    def _held_key(self, stream_key, worker_id: str) -> str:
+        return f"{_text(stream_key)}:held:{worker_id}"
+
+    def _held_workers_key(self, stream_key) -> str:
+        return f"{_text(stream_key)}:held"
+
+    def _held_alive_key(self, stream_key, worker_id: str) -> str:
+        return f"{_text(stream_key)}:held:{worker_id}:alive"
+
+    def ack_to(self, pipe, token) -> None:
+        if token[0] == self.HELD:
+            _, held_key, raw = token
+            pipe.lrem(held_key, 1, raw)
+            return
+        stream_key, entry_id = token
+        pipe.xack(stream_key, self.GROUP, entry_id)
+        # ACK qilingan yozuv stream'da saqlanmaydi — uzunlik = navbat + pending
+        pipe.xdel(stream_key, entry_id)
+
+    def acked(self, token) -> None:
+        if token[0] == self.HELD:
+            return
+        stream_key, entry_id = token
+        self._inflight.get(stream_key, set()).discard(entry_id)
+
+    async def take_edits(self, hash_key: str, pending_key: str, target: str, token) -> list:
+        """Edit'lar held ro'yxatga ko'chadi, ref esa shu skriptning o'zida ACK qilinadi.
+
+        Har bir edit o'z tokeni bilan ACK qilinadi (held ro'yxatdan LREM) —
+        worker yuborishdan oldin o'lsa, edit'lar keepalive/start'da stream'ga qaytadi.
+        """
+        stream_key, entry_id = token
+        held_key = self._held_key(stream_key, self.worker_id)
+        raws = await self._take_held(
+            keys=[hash_key, pending_key, held_key, stream_key, self._held_workers_key(stream_key)],
+            args=[target, entry_id, self.GROUP, self.worker_id],
+        )
+        self.acked(token)
+        return [((self.HELD, held_key, raw), raw) for raw in raws]
+
+    async def _recover_held_edits(self, stream_key: str, worker_id: str) -> int:
+        """Worker'ning held edit'larini stream'ga qaytarish (-1 — worker tirik)."""
+        return int(await self._recover_held(
+            keys=[
+                self._held_key(stream_key, worker_id),
+                stream_key,
+                self._held_alive_key(stream_key, worker_id),
+                self._held_workers_key(stream_key),
+            ],
+            args=[worker_id],
+        ))
+
+    async def _requeue_entries(self, stream_key: str, entries) -> int:
+        """Boshqa (yoki oldingi) consumer'dan olingan yozuvlarni stream oxiriga qayta qo'yish."""
+        if not entries:
+            return 0
+        pipe = self._r.pipeline(transaction=True)
+        for entry_id, fields in entries:
+            payload = _payload(fields)
+            if payload is not None:
+                pipe.xadd(stream_key, {"p": payload})
+            pipe.xack(stream_key, self.GROUP, entry_id)
+            pipe.xdel(stream_key, entry_id)
+        await pipe.execute()
+        return len(entries)
+
+    async def start(self) -> None:
+        """Consumer group'larni yaratish va oldingi hayotdan qolgan pending'larni qaytarish."""
+        for queue in self.queues:
+            stream_key = self.key(queue)
+            try:
+                await self._r.xgroup_create(stream_key, self.GROUP, id="0", mkstream=True)
+            except ResponseError as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+
+            await self._r.delete(self._held_alive_key(stream_key, self.worker_id))
+            recovered = await self._recover_held_edits(stream_key, self.worker_id)
+            await self._mark_alive(stream_key)
+            while True:
+                response = await self._r.xreadgroup(
+                    self.GROUP, self.worker_id, {stream_key: "0"}, count=100
+                )
+                if isinstance(response, dict):
+                    response = list(response.items())
+                entries = response[0][1] if response else []
+                if not entries:
+                    break
+                recovered += await self._requeue_entries(stream_key, entries)
+            if recovered:
+                logger.warning("♻️ Oldingi ishga tushirishdan %s ta xabar qaytarildi (%s)", recovered, stream_key)
+
+    async def keepalive(self) -> None:
+        """Ishlanayotgan yozuvlarni "yangilash" va o'lik consumer'larnikini qaytarish.
+
+        XCLAIM (JUSTID) o'zimizdagi yozuvlarning idle vaqtini nolga tushiradi —
+        shuning uchun XAUTOCLAIM faqat haqiqatan tashlab ketilgan (worker o'lgan)
+        yozuvlarni oladi va sekin yuborilayotgan xabar ikki marta ketmaydi.
+        """
+        for stream_key, ids in self._inflight.items():
+            if ids:
+                await self._r.xclaim(
+                    stream_key, self.GROUP, self.worker_id, min_idle_time=0,
+                    message_ids=list(ids), justid=True,
+                )
+        for queue in self.queues:
+            stream_key = self.key(queue)
+            claimed = await self._r.xautoclaim(
+                stream_key, self.GROUP, self.worker_id,
+                min_idle_time=self._claim_idle_ms, start_id="0-0", count=100,
+            )
+            recovered = await self._requeue_entries(stream_key, claimed[1] if claimed else [])
+            await self._mark_alive(stream_key)
+            for worker_id in await self._r.smembers(self._held_workers_key(stream_key)):
+                worker_id = _text(worker_id)
+                if worker_id != self.worker_id:
+                    recovered += max(0, await self._recover_held_edits(stream_key, worker_id))
+            if recovered:
+                logger.warning("♻️ Tashlab ketilgan %s ta xabar qaytarildi (%s)", recovered, stream_key)
+            await self._check_length(stream_key)
+
+    async def _mark_alive(self, stream_key: str) -> None:
+        """Held edit'lar egasi tirik — claim_idle ichida yangilanmasa boshqalar qaytarib oladi."""
+        await self._r.set(
+            self._held_alive_key(stream_key, self.worker_id), int(time.time()),
+            px=max(self._claim_idle_ms, 1000),
+        )
+
+    async def _check_length(self, stream_key: str) -> None:
+        """Navbat warn_len dan oshsa ogohlantirish (yozuvlar o'chirilmaydi)."""
+        if self._warn_len <= 0:
+            return
+        length = await self._r.xlen(stream_key)
+        if length > self._warn_len:
+            if stream_key not in self._over_warn_len:
+                self._over_warn_len.add(stream_key)
+                logger.warning(
+                    "⚠️ %s navbatida %s ta yuborilmagan xabar (chegara %s) — worker'lar ulgurmayapti",
+                    stream_key, length, self._warn_len,
+                )
+        elif stream_key in self._over_warn_len:
+            self._over_warn_len.discard(stream_key)
+            logger.info("✅ %s navbati yana chegaradan past: %s ta xabar", stream_key, length)
+
+    async def stats(self) -> dict:
+        result = {}
+        for queue in self.queues:
+            stream_key = self.key(queue)
+            info = {"depth": 0, "pending": 0, "lag": 0}
+            try:
+                info["depth"] = await self._r.xlen(stream_key)
+                for group in await self._r.xinfo_groups(stream_key):
+                    if _text(group.get("name")) == self.GROUP:
+                        info["pending"] = group.get("pending") or 0
+                        info["lag"] = group.get("lag") or 0
+            except ResponseError:
+                pass  # stream hali yaratilmagan
+            result[queue] = info
+        return result
+
+
+def create_transport(backend: str, client, *, queues: list[str], namespace: str, worker_id: str,
+                     stream_warn_len: int, stream_claim_idle: float):
+    if backend == StreamTransport.name:
+        return StreamTransport(
+            client, queues=queues, worker_id=worker_id,
+            warn_len=stream_warn_len, claim_idle=stream_claim_idle,
+        )
+    return ListTransport(client, queues=queues, worker_id=worker_id, namespace=namespace)
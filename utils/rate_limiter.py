@@ -0,0 +1,128 @@
+"""Telegram yuborish limitlari uchun Redis asosidagi token-bucket.
+
+Telegram bir nechta limitni birdaniga qo'llaydi: bot bo'yicha umumiy
+(~30 xabar/sek), bitta shaxsiy chatga (~1 xabar/sek) va bitta guruh/kanalga
+(~20 xabar/daqiqa). Har biri uchun alohida "chelak" (bucket) Redis'da
+saqlanadi, shuning uchun bir nechta worker jarayoni bitta umumiy budjetdan
+foydalanadi. Tekshirish va token olish bitta Lua skriptda atomar bajariladi:
+token faqat BARCHA chelaklarda yetarli bo'lganda olinadi — ya'ni bitta "issiq"
+chat o'z chelagini kutayotganda umumiy budjetni band qilmaydi.
+"""
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+_KEY_PREFIX = "ratelimit"
+
+# KEYS — chelaklar; ARGV — har bir chelak uchun (tezlik token/ms, sig'im).
+# Qaytaradi: 0 — token olindi; >0 — shuncha millisekund kutish kerak.
+_ACQUIRE_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local wait = 0
+local levels = {}
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[i * 2 - 1])
+    local cap = tonumber(ARGV[i * 2])
+    local b = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(b[1]) or cap
+    local ts = tonumber(b[2]) or now
+    tokens = math.min(cap, tokens + math.max(0, now - ts) * rate)
+    levels[i] = tokens
+    if tokens < 1 then
+        wait = math.max(wait, math.ceil((1 - tokens) / rate))
+    end
+end
+if wait > 0 then
+    return wait
+end
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[i * 2 - 1])
+    local cap = tonumber(ARGV[i * 2])
+    redis.call('HSET', key, 'tokens', levels[i] - 1, 'ts', now)
+    redis.call('PEXPIRE', key, math.ceil(cap / rate) + 1000)
+end
+return 0
+"""
+
+# Chelakni "qarzga" tushirish: keyingi token ARGV[3] ms dan keyin paydo bo'ladi.
+_PENALIZE_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local rate = tonumber(ARGV[1])
+local cap = tonumber(ARGV[2])
+local ms = tonumber(ARGV[3])
+redis.call('HSET', KEYS[1], 'tokens', 1 - rate * ms, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], ms + math.ceil(cap / rate) + 1000)
+return 0
+"""
+
+
+class TelegramRateLimiter:
+    """Umumiy, shaxsiy chat va guruh/kanal limitlarini birga tekshiruvchi limiter.
+
+    ``acquire(chat_id)`` — Telegram so'rovidan oldin chaqiriladi va ruxsat
+    bo'lguncha kutadi. ``penalize(chat_id, seconds)`` — RetryAfter olinganda
+    shu chatni barcha worker'lar uchun vaqtincha to'xtatadi.
+    """
+
+    def __init__(
+        self,
+        redis_client,
+        *,
+        global_per_sec: float,
+        private_per_sec: float,
+        private_burst: int,
+        group_per_min: float,
+    ):
+        self._redis = redis_client
+        self._acquire = redis_client.register_script(_ACQUIRE_LUA)
+        self._penalize = redis_client.register_script(_PENALIZE_LUA)
+        # (tezlik token/ms, sig'im)
+        self._global = (global_per_sec / 1000, max(1.0, global_per_sec))
+        self._private = (private_per_sec / 1000, max(1, private_burst))
+        self._group = (group_per_min / 60000, 1)
+        self._fallback_delay = 1 / global_per_sec
+
+    def _chat_bucket(self, chat_id):
+        """Chat turi bo'yicha (kalit, tezlik, sig'im). Inline xabarlar uchun None."""
+        if chat_id is None:
+            return None
+        # Shaxsiy chat id'lari musbat; guruh/kanal — manfiy yoki "@username"
+        try:
+            is_private = int(chat_id) > 0
+        except (TypeError, ValueError):
+            is_private = False
+        rate, cap = self._private if is_private else self._group
+        return f"{_KEY_PREFIX}:chat:{chat_id}", rate, cap
+
+    async def acquire(self, chat_id) -> None:
+        keys = [f"{_KEY_PREFIX}:global"]
+        args = list(self._global)
+        bucket = self._chat_bucket(chat_id)
+        if bucket:
+            keys.append(bucket[0])
+            args.extend(bucket[1:])
+
+        while True:
+            try:
+                wait_ms = int(await self._acquire(keys=keys, args=args))
+            except Exception as e:
+                # Redis ishlamasa yuborishni to'xtatmaymiz — faqat sekinlashtiramiz
+                logger.warning("⚠️ Rate limiter ishlamadi, lokal pauza: %s", e)
+                await asyncio.sleep(self._fallback_delay)
+                return
+            if wait_ms <= 0:
+                return
+            await asyncio.sleep(max(wait_ms, 5) / 1000)
+
+    async def penalize(self, chat_id, seconds: float) -> None:
+        bucket = self._chat_bucket(chat_id)
+        if not bucket:
+            return
+        key, rate, cap = bucket
+        try:
+            await self._penalize(keys=[key], args=[rate, cap, int(seconds * 1000)])
+        except Exception as e:
+            logger.warning("⚠️ Rate limiter penalize xatosi: %s", e)
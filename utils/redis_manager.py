@@ -1,11 +1,30 @@
-import json
 import asyncio
+import hashlib
+import json
 import logging
 import re
+import time
+import uuid
+from collections import deque
+from contextvars import ContextVar
+from enum import Enum
+from functools import lru_cache
+
 import redis.asyncio as redis
-from telegram import Bot
-from telegram.error import BadRequest, RetryAfter, Forbidden
-from .settings import ADMIN_ID, MANAGER_ID, REDIS_URL
+from telegram import Bot, Message
+from telegram.error import BadRequest, RetryAfter, Forbidden, TelegramError
+from .queue_codec import PayloadError, decode, encode
+from .queue_metrics import WorkerMetrics, dumps_snapshot, merge_snapshots, serve_prometheus
+from .queue_transport import create_transport
+from .rate_limiter import TelegramRateLimiter
+from .telegram_http import build_request
+from .settings import (
+    ADMIN_ID, MANAGER_ID, REDIS_URL, WORKER_CONCURRENCY, WORKER_ID, TELEGRAM_POOL_SIZE,
+    QUEUE_BACKEND, QUEUE_STREAM_MAXLEN, STREAM_CLAIM_IDLE, QUEUE_CODEC,
+    DEAD_LETTER_MAXLEN, DEAD_LETTER_REPLAY_RATE, METRICS_HOST, METRICS_PORT,
+    RATE_LIMIT_GLOBAL_PER_SEC, RATE_LIMIT_PRIVATE_PER_SEC,
+    RATE_LIMIT_PRIVATE_BURST, RATE_LIMIT_GROUP_PER_MIN,
+)
 try:
     from telegram.ext import ExtBot
 except ImportError:
@@ -15,15 +34,146 @@ logger = logging.getLogger(__name__)
 
 QUEUE_NAME = "bot_queue"
 
-# Telegram global limiti ~30 xabar/sek. Biroz pastroq tezlikda yuboramiz.
-SEND_INTERVAL = 0.035
+# Ustuvorlik (priority) navbatlari. "interactive" — foydalanuvchi so'roviga
+# bevosita javoblar, har doim birinchi olinadi (eski "bot_queue" kaliti shu).
+# Qolganlari o'zaro vaznli-adolatli (weighted fair) navbat bilan olinadi:
+# admin ogohlantirishlari ommaviy (broadcast, hisobotlar) xabarlardan ko'proq.
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_ALERTS = "alerts"
+PRIORITY_BULK = "bulk"
+PRIORITY_QUEUES = {
+    PRIORITY_INTERACTIVE: QUEUE_NAME,
+    PRIORITY_ALERTS: f"{QUEUE_NAME}:alerts",
+    PRIORITY_BULK: f"{QUEUE_NAME}:bulk",
+}
+PRIORITY_WEIGHTS = {PRIORITY_ALERTS: 3, PRIORITY_BULK: 1}
+# Barcha navbatlar bo'sh bo'lganda interactive navbatni shuncha soniya kutamiz
+# (boshqa navbatlarga kelgan xabar ham eng ko'pi bilan shuncha kechikadi).
+IDLE_WAIT = 0.2
+
+# Kechiktirilgan (qayta urinish) xabarlar: har bir navbat uchun sorted set,
+# score = yuborish vaqti (unix).
+DELAYED_SUFFIX = ":delayed"
+DELAYED_QUEUE = QUEUE_NAME + DELAYED_SUFFIX
+
+# Edit'larni birlashtirish: bitta xabarga (chat_id + message_id) ketma-ket
+# kelgan edit'lardan faqat oxirgisi yuboriladi. Edit payloadi EDITS_HASH da
+# "<target>|content" (matn/caption) yoki "<target>|markup" maydonida turadi,
+# navbatga esa target uchun bitta "ref" (COALESCED_EDIT) qo'yiladi.
+EDITS_HASH = f"{QUEUE_NAME}:edits"
+EDITS_PENDING = f"{QUEUE_NAME}:edits:pending"
+COALESCED_EDIT = "coalesced_edit"
+_EDIT_SLOTS = {
+    "edit_message_text": "content",
+    "edit_message_caption": "content",
+    "edit_message_reply_markup": "markup",
+}
+# Ishonchli navbat: worker olgan xabar ACK bo'lguncha "o'zlashtirilgan" holatda
+# turadi (list — processing ro'yxati, stream — consumer group PEL). Worker
+# o'lsa, uning xabarlari boshqa worker tomonidan navbatga qaytariladi
+# (utils/queue_transport.py). Heartbeat/reaper shu oraliqda ishlaydi.
+HEARTBEAT_INTERVAL = 10
+
+# Urinishlari tugagan xabarlar shu stream'ga (dead-letter) yoziladi: payload,
+# sabab, urinishlar soni va vaqtlar bilan. Uzunligi DEAD_LETTER_MAXLEN bilan
+# cheklangan; ko'rish/qayta yuborish — admin statistika paneli va
+# scripts/dead_letters.py orqali.
+DEAD_LETTER_STREAM = f"{QUEUE_NAME}:dead"
+# Filtrlashda dead-letter stream'ning eng ko'pi bilan shuncha oxirgi yozuvi ko'riladi.
+DEAD_LETTER_SCAN = 5000
+# Admin paneldan qayta yuborish ishlayotganini bildiruvchi qulf (ikkinchi
+# bosish yoki boshqa admin bir xil yozuvlarni ikki marta qaytarmasligi uchun).
+DEAD_LETTER_REPLAY_LOCK = f"{DEAD_LETTER_STREAM}:replay"
+DEAD_LETTER_REPLAY_LOCK_TTL = 6 * 3600
+
+# Botni bloklagan / o'chirilgan chatlar (Forbidden, "chat not found"). Worker va
+# broadcast bu chatlarga Telegram so'rovi yubormaydi. Worker yangi qo'shilgan
+# chatlarni BLOCKED_CHANGES ga ham yozadi — bot jarayoni ularni User.is_blocked
+# ustuniga ko'chiradi (utils/blocked_users.py). /start — ro'yxatdan chiqaradi.
+BLOCKED_CHATS = "blocked_chats"
+BLOCKED_CHANGES = "blocked_chats:changes"
+
 # Flood-limit (RetryAfter) bo'lganda eng ko'pi bilan shuncha soniya kutamiz.
 MAX_RETRY_AFTER = 60
 # Bitta xabar shuncha martadan ko'p qayta urinilsa — tashlab yuboriladi
 # (navbat "zaharlangan" xabar tufayli bloklanib qolmasligi uchun).
 MAX_QUEUE_RETRIES = 5
+# Xato bilan tugagan xabar uchun qayta urinish oralig'i: 2, 4, 8, ... soniya.
+RETRY_BASE_DELAY = 2
+RETRY_MAX_DELAY = 300
+# Kechiktirilgan xabarlar navbatga bir urinishda shuncha donadan qaytariladi.
+PROMOTE_BATCH = 200
+# enqueue_batch() payloadlarni shuncha donadan bitta round-trip'da yozadi.
+ENQUEUE_CHUNK = 5000
+# Redis'dan olingan, lekin hali yuborilmagan xabarlar soni shundan oshmaydi
+# (bitta sekin chat tufayli xotirada cheksiz navbat yig'ilmasligi uchun).
+MAX_BUFFERED = WORKER_CONCURRENCY * 4
+# wait=True bilan yuborilgan xabar natijasini standart holda shuncha soniya kutamiz.
+RESULT_TIMEOUT = 30
+# Worker natijalarni (yuborilgan Message) shu jarayonning kanaliga PUBLISH qiladi.
+RESULTS_CHANNEL = f"{QUEUE_NAME}:results:{uuid.uuid4().hex}"
+# Worker navbatdan bir so'rovda shuncha xabargacha oladi (bufferdagi bo'sh joy
+# bilan cheklanadi).
+POP_BATCH = MAX_BUFFERED
+
+# Worker metrikalari: har bir worker snapshot'i shu hash'da (field = WORKER_ID).
+# Shundan eski snapshot — o'chgan worker'niki, hisobga olinmaydi.
+METRICS_HASH = f"{QUEUE_NAME}:metrics"
+METRICS_INTERVAL = 10
+METRICS_STALE = 60
 
 r = redis.from_url(REDIS_URL, decode_responses=True)
+# Navbat payloadlari binar (utils/queue_codec.py) — ular uchun alohida,
+# javoblarni dekodlamaydigan ulanish.
+rq = redis.from_url(REDIS_URL)
+
+# Navbat transporti (QUEUE_BACKEND): "list" yoki "stream"
+transport = create_transport(
+    QUEUE_BACKEND,
+    rq,
+    queues=list(PRIORITY_QUEUES.values()),
+    namespace=QUEUE_NAME,
+    worker_id=WORKER_ID,
+    stream_warn_len=QUEUE_STREAM_MAXLEN,
+    stream_claim_idle=STREAM_CLAIM_IDLE,
+)
+
+# Telegram limitlari — barcha worker jarayonlari uchun umumiy (Redis'da).
+send_limiter = TelegramRateLimiter(
+    r,
+    global_per_sec=RATE_LIMIT_GLOBAL_PER_SEC,
+    private_per_sec=RATE_LIMIT_PRIVATE_PER_SEC,
+    private_burst=RATE_LIMIT_PRIVATE_BURST,
+    group_per_min=RATE_LIMIT_GROUP_PER_MIN,
+)
+# Bir vaqtda Telegramga ketayotgan HTTP so'rovlar soni
+_send_slots = asyncio.Semaphore(WORKER_CONCURRENCY)
+# Shu jarayon metrikalari (worker'da to'ldiriladi)
+metrics = WorkerMetrics()
+
+# Ustuvorlik aniq berilmagan xabarlar shu navbatga tushadi. Standart — bulk:
+# Update'ga javob bo'lmagan hamma narsa (job'lar, fon vazifalari) past
+# navbatda. Update'larni qayta ishlash paytida mark_update_interactive()
+# buni "interactive" ga o'zgartiradi.
+queue_priority: ContextVar[str] = ContextVar("queue_priority", default=PRIORITY_BULK)
+
+
+def set_queue_priority(priority: str) -> None:
+    """Joriy kontekstdagi (task) standart navbat ustuvorligini o'rnatish.
+
+    Update handler ichidan ishga tushirilgan fon vazifalari (broadcast va
+    h.k.) "interactive" kontekstni meros oladi — ular buni bulk ga qaytarishi kerak.
+    """
+    queue_priority.set(priority)
+
+
+async def mark_update_interactive(update, context) -> None:
+    """Har bir Update uchun eng birinchi ishlaydigan handler (main.py, group=-1).
+
+    Shu Update'ga javoban yuborilgan barcha xabarlar interactive navbatga tushadi.
+    """
+    queue_priority.set(PRIORITY_INTERACTIVE)
+
 
 # Original metodlarni saqlab qolamiz
 _original_send_message = Bot.send_message
@@ -32,59 +182,261 @@ _original_edit_message_text = Bot.edit_message_text
 _original_edit_message_caption = Bot.edit_message_caption
 _original_edit_message_reply_markup = Bot.edit_message_reply_markup
 _original_delete_message = Bot.delete_message
+_original_copy_message = Bot.copy_message
+
+_ARG_SKIP, _ARG_KEEP, _ARG_VALUE, _ARG_TO_DICT = range(4)
+_PLAIN_TYPES = (str, int, float, bool, list, dict, type(None))
+
+
+@lru_cache(maxsize=256)
+def _arg_kind(tp: type) -> int:
+    """Argument turi bo'yicha nima qilish kerakligi (har bir tur uchun bir marta hisoblanadi)."""
+    # DefaultValue — PTB'ning "berilmagan" belgisi, Redis'ga yozilmaydi
+    if tp.__name__ == "DefaultValue":
+        return _ARG_SKIP
+    # Enum'lar (ParseMode va h.k.) — qiymatiga o'tkaziladi
+    if issubclass(tp, Enum):
+        return _ARG_VALUE
+    if hasattr(tp, "to_dict"):
+        return _ARG_TO_DICT
+    if issubclass(tp, _PLAIN_TYPES):
+        return _ARG_KEEP
+    return _ARG_SKIP
+
 
 def clean_kwargs(kwargs):
     """Redisga yozishdan oldin argumentlarni tozalash"""
     cleaned = {}
     for k, v in kwargs.items():
-        # DefaultValue obyektlarini o'tkazib yuborish
-        if "DefaultValue" in str(type(v)):
-            continue
-
-        # Enum'larni qiymatiga o'tkazish
-        if hasattr(v, "value"):
+        kind = _arg_kind(type(v))
+        if kind == _ARG_VALUE:
             cleaned[k] = v.value
-            continue
-
-        # Reply Markup ni dict ga o'tkazish
-        if k == "reply_markup":
-            if hasattr(v, "to_dict"):
+        elif k == "reply_markup":
+            # Reply Markup ni dict ga o'tkazish
+            if kind == _ARG_TO_DICT:
                 cleaned[k] = v.to_dict()
             elif isinstance(v, dict):
                 cleaned[k] = v
-            continue
-
-        # Oddiy tiplarni qabul qilish
-        if isinstance(v, (str, int, float, bool, list, dict, type(None))):
-             cleaned[k] = v
-
+        elif kind == _ARG_KEEP:
+            cleaned[k] = v
     return cleaned
 
-async def _push_to_redis(chat_id, method, content, **kwargs):
-    # Argumentlarni tozalash
-    cleaned_args = clean_kwargs(kwargs)
+def _resolve_priority(priority) -> str:
+    if priority is None:
+        return queue_priority.get()
+    if priority not in PRIORITY_QUEUES:
+        logger.warning("⚠️ Noma'lum navbat ustuvorligi: %s (bulk ishlatiladi)", priority)
+        return PRIORITY_BULK
+    return priority
 
+
+def _build_payload(chat_id, method, content, priority, args: dict, *, msg_id=None, reply_to=None) -> dict:
     payload = {
+        "id": msg_id or uuid.uuid4().hex,
         "chat_id": chat_id,
         "method": method,
         "content": content,
-        "args": cleaned_args
+        "args": args,
+        "priority": priority,
+        # Navbatga qo'yilgan vaqt — worker "enqueue -> send" kechikishini o'lchaydi
+        "ts": round(time.time(), 3),
     }
+    if reply_to:
+        payload["reply_to"] = reply_to
+    return payload
+
+
+def _edit_target(chat_id, args: dict) -> str | None:
+    """Edit/delete qaysi xabarga tegishli (birlashtirish kaliti) yoki None."""
+    if args.get("inline_message_id"):
+        return f"inline:{args['inline_message_id']}"
+    if chat_id is not None and args.get("message_id") is not None:
+        return f"{chat_id}:{args['message_id']}"
+    return None
+
+
+# Edit payloadini slotga yozish. content-edit (matn/caption o'z tugmalari bilan)
+# avvalgi markup-edit'ni ham bekor qiladi. Target uchun navbatda ref bo'lmasa —
+# qo'yiladi. KEYS: edits hash, pending set, navbat; ARGV: target, slot, payload, ref.
+# push() — transportga qarab RPUSH yoki XADD.
+_STAGE_EDIT_LUA = """
+redis.call('HSET', KEYS[1], ARGV[1] .. '|' .. ARGV[2], ARGV[3])
+if ARGV[2] == 'content' then
+    redis.call('HDEL', KEYS[1], ARGV[1] .. '|markup')
+end
+if redis.call('SADD', KEYS[2], ARGV[1]) == 1 then
+    push(KEYS[3], ARGV[4])
+    return 1
+end
+return 0
+"""
+_stage_edit_script = r.register_script(transport.lua_push + _STAGE_EDIT_LUA)
+
+
+async def _push_to_redis(chat_id, method, content, *, priority=None, msg_id=None, reply_to=None, **kwargs) -> bool:
+    """Xabarni navbatga qo'yish. Redis xatosida False (xato loglanadi)."""
+    # Argumentlarni tozalash
+    cleaned_args = clean_kwargs(kwargs)
+    priority = _resolve_priority(priority)
+    payload = _build_payload(
+        chat_id, method, content, priority, cleaned_args, msg_id=msg_id, reply_to=reply_to
+    )
+    queue = PRIORITY_QUEUES[priority]
 
     try:
-        await r.rpush(QUEUE_NAME, json.dumps(payload))
+        target = _edit_target(chat_id, cleaned_args)
+        if method in _EDIT_SLOTS and target:
+            ref_args = {"inline_message_id": cleaned_args["inline_message_id"]} if chat_id is None else {}
+            ref = _build_payload(chat_id, COALESCED_EDIT, target, priority, ref_args)
+            await _stage_edit_script(
+                keys=[EDITS_HASH, EDITS_PENDING, transport.key(queue)],
+                args=[target, _EDIT_SLOTS[method], encode(payload, QUEUE_CODEC), encode(ref, QUEUE_CODEC)],
+            )
+            return True
+
+        if method == "delete_message" and target:
+            # O'chiriladigan xabarning navbatdagi edit'lari endi kerak emas
+            pipe = r.pipeline(transaction=True)
+            pipe.hdel(EDITS_HASH, f"{target}|content", f"{target}|markup")
+            pipe.srem(EDITS_PENDING, target)
+            await pipe.execute()
+
+        await transport.push(queue, encode(payload, QUEUE_CODEC))
+        return True
     except Exception as e:
         logger.error("❌ Redis Push Error: %s", e)
+        return False
+
+
+class QueuedSendError(TelegramError):
+    """wait=True bilan navbatga qo'yilgan xabar yetkazilmadi."""
+
+
+class _ResultWaiter:
+    """wait=True yuborishlar natijasini kutuvchi.
+
+    Jarayon uchun bitta pub/sub obuna (RESULTS_CHANNEL) — har bir kutilayotgan
+    xabar uchun alohida bloklovchi Redis ulanishi ochilmaydi.
+    """
+
+    def __init__(self, client, channel: str):
+        self._client = client
+        self.channel = channel
+        self._futures: dict[str, asyncio.Future] = {}
+        self._listener = None
+        self._lock = asyncio.Lock()
+
+    async def expect(self, msg_id: str) -> asyncio.Future:
+        """Natija uchun future — xabar navbatga qo'yilishidan OLDIN olinadi."""
+        async with self._lock:
+            if self._listener is None or self._listener.done():
+                pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+                await pubsub.subscribe(self.channel)
+                self._listener = asyncio.create_task(self._listen(pubsub))
+        future = asyncio.get_running_loop().create_future()
+        self._futures[msg_id] = future
+        return future
+
+    def discard(self, msg_id: str) -> None:
+        self._futures.pop(msg_id, None)
+
+    async def _listen(self, pubsub) -> None:
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                try:
+                    result = decode(message["data"])
+                except PayloadError:
+                    continue
+                future = self._futures.pop(result.get("id"), None)
+                if future is not None and not future.done():
+                    future.set_result(result)
+        except Exception as e:
+            # Keyingi expect() obunani qayta ochadi; kutayotganlar timeout oladi
+            logger.error("❌ Natijalar kanali uzildi: %s", e)
+        finally:
+            await pubsub.aclose()
+
+
+_results = _ResultWaiter(rq, RESULTS_CHANNEL)
+
+
+async def _push_and_wait(bot, chat_id, method, content, timeout: float, **kwargs) -> Message:
+    """Xabarni navbatga qo'yib, worker yuborgan Message'ni kutish.
+
+    Yetkazilmasa — QueuedSendError, ``timeout`` soniyada natija bo'lmasa — TimeoutError.
+    """
+    msg_id = uuid.uuid4().hex
+    future = await _results.expect(msg_id)
+    try:
+        if not await _push_to_redis(
+            chat_id, method, content, msg_id=msg_id, reply_to=RESULTS_CHANNEL, **kwargs
+        ):
+            raise QueuedSendError("Xabarni navbatga qo'yib bo'lmadi")
+        result = await asyncio.wait_for(future, timeout)
+    except asyncio.TimeoutError:
+        raise TimeoutError(
+            f"Worker {timeout}s ichida natija qaytarmadi ({method}, chat_id={chat_id})"
+        ) from None
+    finally:
+        _results.discard(msg_id)
+
+    if not result.get("ok"):
+        raise QueuedSendError(result.get("error") or "Xabar yetkazilmadi")
+    return Message.de_json(result["message"], bot)
+
+async def enqueue_batch(method: str, items, *, priority=None, **common) -> int:
+    """Ko'p xabarni pipeline orqali navbatga qo'yish (ommaviy yuboruvchilar uchun).
+
+    items — (chat_id, content) juftliklari; common — hammasiga umumiy
+    argumentlar (masalan copy_message uchun from_chat_id, message_id).
+    Payloadlar ENQUEUE_CHUNK donadan bitta round-trip'da yoziladi.
+    Edit/delete birlashtirish kerak bo'lgani uchun bu yerda qabul qilinmaydi.
+    Qaytaradi: navbatga qo'yilgan xabarlar soni.
+    """
+    if method in _EDIT_SLOTS or method == "delete_message":
+        raise ValueError(f"enqueue_batch {method} uchun ishlatilmaydi")
+    cleaned_args = clean_kwargs(common)
+    priority = _resolve_priority(priority)
+    queue = PRIORITY_QUEUES[priority]
+
+    total = 0
+    chunk = []
+    for chat_id, content in items:
+        chunk.append(encode(_build_payload(chat_id, method, content, priority, cleaned_args), QUEUE_CODEC))
+        if len(chunk) >= ENQUEUE_CHUNK:
+            await transport.push_many(queue, chunk)
+            total += len(chunk)
+            chunk = []
+    if chunk:
+        await transport.push_many(queue, chunk)
+        total += len(chunk)
+    return total
+
 
-# Patched methods
+# Patched methods — barchasi ixtiyoriy priority="interactive"|"alerts"|"bulk"
+# argumentini qabul qiladi (berilmasa — joriy kontekstdagi queue_priority).
+# send_message/send_video: wait=True — navbat orqali yuborib, natija Message'ni
+# qaytaradi (wait_timeout soniya kutiladi, standart RESULT_TIMEOUT).
 async def patched_send_message(self, chat_id, text, **kwargs):
+    wait = kwargs.pop('wait', False)
+    timeout = kwargs.pop('wait_timeout', RESULT_TIMEOUT)
     if kwargs.pop('direct', False):
+        kwargs.pop('priority', None)
         return await _original_send_message(self, chat_id, text, **kwargs)
+    if wait:
+        return await _push_and_wait(self, chat_id, "send_message", text, timeout, **kwargs)
     await _push_to_redis(chat_id, "send_message", text, **kwargs)
 
 async def patched_send_video(self, chat_id, video, **kwargs):
+    wait = kwargs.pop('wait', False)
+    timeout = kwargs.pop('wait_timeout', RESULT_TIMEOUT)
     if kwargs.pop('direct', False):
+        kwargs.pop('priority', None)
         return await _original_send_video(self, chat_id, video, **kwargs)
+    if wait:
+        return await _push_and_wait(self, chat_id, "send_video", video, timeout, **kwargs)
     await _push_to_redis(chat_id, "send_video", video, **kwargs)
 
 async def patched_edit_message_text(self, text, chat_id=None, message_id=None, inline_message_id=None, **kwargs):
@@ -131,6 +483,21 @@ def apply_redis_patch():
     logger.info("✅ Redis Patch (Full Coverage) muvaffaqiyatli qo'llanildi")
 
 
+async def _tg_call(original, bot, chat_id, **kwargs):
+    """Limiter'dan ruxsat olib, asl (patch qilinmagan) Bot metodini chaqirish.
+
+    Worker'dagi barcha Telegram so'rovlari shu orqali o'tadi. Limitni kutish
+    slotdan tashqarida — chelagini kutayotgan chat boshqalarni to'xtatmaydi.
+    """
+    await send_limiter.acquire(chat_id)
+    async with _send_slots:
+        started = time.perf_counter()
+        try:
+            return await original(bot, chat_id=chat_id, **kwargs)
+        finally:
+            metrics.observe("telegram_request_seconds", original.__name__, time.perf_counter() - started)
+
+
 def _broken_movie_markup(reply_markup):
     """Video yuborilmagan kino uchun tugmalarni filtrlaydi.
 
@@ -162,9 +529,9 @@ async def _notify_video_failure(bot, chat_id, content, args, error_msg):
         markup = _broken_movie_markup(args.get("reply_markup"))
         if markup:
             fallback_args["reply_markup"] = markup
-        await _original_send_message(bot, chat_id=chat_id, text=user_text, parse_mode="HTML", **fallback_args)
+        await _tg_call(_original_send_message, bot, chat_id, text=user_text, parse_mode="HTML", **fallback_args)
     except Exception:
-        await _original_send_message(bot, chat_id=chat_id, text=user_text, parse_mode="HTML")
+        await _tg_call(_original_send_message, bot, chat_id, text=user_text, parse_mode="HTML")
 
     # Caption'dan kino nomi va kodini olish
     file_id_short = str(content)[:50] + "..." if len(str(content)) > 50 else str(content)
@@ -187,46 +554,51 @@ async def _notify_video_failure(bot, chat_id, content, args, error_msg):
         f"🎬 <b>File ID:</b> <code>{file_id_short}</code>\n\n"
         f"⚠️ Kinoning videosini qayta yuklash kerak!"
     )
+    # Adminlarga xabar alerts navbati orqali — foydalanuvchi yo'lagini kutdirmaydi
     for admin_id in (ADMIN_ID, MANAGER_ID):
         if admin_id:
-            try:
-                await _original_send_message(bot, chat_id=admin_id, text=admin_text, parse_mode="HTML")
-            except Exception:
-                pass
+            await _push_to_redis(
+                admin_id, "send_message", admin_text, parse_mode="HTML", priority=PRIORITY_ALERTS
+            )
 
 
 async def _handle_message(bot, msg):
     """Navbatdan olingan bitta xabarni Telegramga yuborish.
 
     RetryAfter (flood-limit) bu yerda ushlanmaydi — uni run_worker boshqaradi.
+    send_message/send_video uchun yuborilgan Message qaytariladi (wait=True
+    kutayotgan producer'ga yuboriladi), qolganlari uchun None.
     """
     method = msg['method']
     chat_id = msg['chat_id']
     content = msg['content']
     args = msg['args']
+    sent = None
 
     if method == "send_message":
         try:
-            await _original_send_message(bot, chat_id=chat_id, text=content, **args)
+            sent = await _tg_call(_original_send_message, bot, chat_id, text=content, **args)
         except BadRequest as e:
             if "parse entities" in str(e).lower():
                 safe_args = dict(args)
                 safe_args.pop("parse_mode", None)
-                await _original_send_message(bot, chat_id=chat_id, text=content, **safe_args)
+                sent = await _tg_call(_original_send_message, bot, chat_id, text=content, **safe_args)
             else:
                 raise
         logger.debug("✅ MSG: %s", chat_id)
 
     elif method == "send_video":
         try:
-            await _original_send_video(bot, chat_id=chat_id, video=content, **args)
+            sent = await _tg_call(_original_send_video, bot, chat_id, video=content, **args)
         except BadRequest as e:
+            if _is_chat_gone(e):
+                raise
             await _notify_video_failure(bot, chat_id, content, args, str(e))
         logger.debug("✅ VID: %s", chat_id)
 
     elif method == "edit_message_text":
         try:
-            await _original_edit_message_text(bot, text=content, chat_id=chat_id, **args)
+            await _tg_call(_original_edit_message_text, bot, chat_id, text=content, **args)
             logger.debug("✅ EDIT TXT: %s", chat_id)
         except BadRequest as e:
             if "message is not modified" in str(e).lower():
@@ -236,7 +608,7 @@ async def _handle_message(bot, msg):
 
     elif method == "edit_message_caption":
         try:
-            await _original_edit_message_caption(bot, caption=content, chat_id=chat_id, **args)
+            await _tg_call(_original_edit_message_caption, bot, chat_id, caption=content, **args)
             logger.debug("✅ EDIT CAP: %s", chat_id)
         except BadRequest as e:
             if "message is not modified" in str(e).lower():
@@ -246,7 +618,7 @@ async def _handle_message(bot, msg):
 
     elif method == "edit_message_reply_markup":
         try:
-            await _original_edit_message_reply_markup(bot, chat_id=chat_id, **args)
+            await _tg_call(_original_edit_message_reply_markup, bot, chat_id, **args)
             logger.debug("✅ EDIT MKP: %s", chat_id)
         except BadRequest as e:
             if "message is not modified" in str(e).lower():
@@ -256,93 +628,784 @@ async def _handle_message(bot, msg):
 
     elif method == "delete_message":
         try:
-            await _original_delete_message(bot, chat_id=chat_id, **args)
+            await _tg_call(_original_delete_message, bot, chat_id, **args)
             logger.debug("✅ DEL: %s", chat_id)
         except BadRequest:
             pass  # Eski xabarni o'chirib bo'lmasa — e'tiborsiz qoldirish
 
+    elif method == "copy_message":
+        await _tg_call(_original_copy_message, bot, chat_id, **args)
+        logger.debug("✅ COPY: %s", chat_id)
+
+    return sent
+
+
+def _is_chat_gone(error: Exception) -> bool:
+    """Chatga endi umuman yuborib bo'lmaydimi (bloklagan, o'chirilgan, topilmadi)."""
+    text = str(error).lower()
+    if isinstance(error, Forbidden):
+        # Guruhda huquq yetishmasligi — vaqtinchalik sozlama muammosi
+        return "not enough rights" not in text
+    return isinstance(error, BadRequest) and "chat not found" in text
+
+
+def _is_private_chat(chat_id) -> bool:
+    """Shaxsiy chat (foydalanuvchi) — Telegram'da faqat ularning id'si musbat."""
+    try:
+        return int(chat_id) > 0
+    except (TypeError, ValueError):
+        return False  # "@kanal" kabi username
+
+
+async def mark_chat_blocked(chat_id) -> None:
+    """Chatni bloklanganlar ro'yxatiga qo'shish (DB'ga keyin bot jarayoni yozadi).
+
+    Faqat shaxsiy chatlar: kanal/guruh (masalan, admin huquqi vaqtincha olingan
+    kanal) ro'yxatdan /start orqali hech qachon chiqa olmaydi.
+    """
+    if not _is_private_chat(chat_id):
+        return
+    try:
+        if await r.sadd(BLOCKED_CHATS, chat_id):
+            await r.rpush(BLOCKED_CHANGES, chat_id)
+    except Exception as e:
+        logger.warning("⚠️ Bloklangan chatni yozib bo'lmadi (%s): %s", chat_id, e)
+
+
+async def unmark_chat_blocked(chat_id) -> None:
+    await r.srem(BLOCKED_CHATS, chat_id)
+
+
+async def blocked_among(chat_ids) -> set:
+    """Berilgan chat_id'lardan bloklanganlari (bitta round-trip)."""
+    chat_ids = [c for c in chat_ids if c is not None]
+    if not chat_ids:
+        return set()
+    flags = await r.smismember(BLOCKED_CHATS, chat_ids)
+    return {c for c, flag in zip(chat_ids, flags) if flag}
+
+
+async def _publish_result(msg: dict, sent=None, *, error: str | None = None) -> None:
+    """wait=True bilan kutayotgan producer'ga natijani yuborish (kutilmasa — hech narsa)."""
+    channel = msg.get("reply_to")
+    if not channel:
+        return
+    if sent is not None:
+        result = {"id": msg.get("id"), "ok": True, "message": sent.to_dict()}
+    else:
+        result = {"id": msg.get("id"), "ok": False, "error": error or "Xabar yetkazilmadi"}
+    try:
+        await r.publish(channel, encode(result, QUEUE_CODEC))
+    except Exception as e:
+        logger.warning("⚠️ Natijani qaytarib bo'lmadi: %s", e)
+
 
 async def _notify_admin(bot, text: str):
+    await _push_to_redis(
+        ADMIN_ID,
+        "send_message",
+        f"🚨 <b>Worker Xatoligi:</b>\n\n<code>{text[:500]}</code>",
+        parse_mode="HTML",
+        priority=PRIORITY_ALERTS,
+    )
+
+
+async def _ack(token) -> None:
+    """Xabar bilan ish tugadi — uni navbatda tasdiqlash (ACK)."""
     try:
-        await _original_send_message(
-            bot,
-            chat_id=ADMIN_ID,
-            text=f"🚨 <b>Worker Xatoligi:</b>\n\n<code>{text[:500]}</code>",
-            parse_mode="HTML",
-        )
-    except Exception:
-        pass
+        await transport.ack(token)
+    except Exception as e:
+        logger.error("❌ ACK xatosi (xabar qayta yuborilishi mumkin): %s", e)
+
+
+async def _drop(bot, msg: dict, *, reason: str, token=None) -> None:
+    """Urinishlar tugagan xabarni dead-letter stream'ga o'tkazish va adminga xabar berish."""
+    logger.error(
+        "❌ Xabar %s urinishdan keyin dead-letter'ga o'tkazildi | sabab=%s method=%s chat_id=%s",
+        msg.get("_retries"), reason, msg.get("method"), msg.get("chat_id"),
+    )
+    now = time.time()
+    fields = {
+        "p": encode(msg, QUEUE_CODEC),
+        "method": str(msg.get("method")),
+        "chat_id": str(msg.get("chat_id")),
+        "priority": str(msg.get("priority") or PRIORITY_BULK),
+        "reason": str(reason)[:500],
+        "attempts": int(msg.get("_retries") or 0),
+        "failed_at": float(msg.get("_failed_at") or now),
+        "dropped_at": now,
+    }
+    try:
+        # Dead-letter yozuvi va ACK bitta tranzaksiyada — oradagi uzilishda xabar yo'qolmaydi
+        pipe = rq.pipeline(transaction=True)
+        pipe.xadd(DEAD_LETTER_STREAM, fields, maxlen=DEAD_LETTER_MAXLEN, approximate=True)
+        if token is not None:
+            transport.ack_to(pipe, token)
+        await pipe.execute()
+        if token is not None:
+            transport.acked(token)
+    except Exception as e:
+        # ACK ham bajarilmadi — xabar o'zlashtirilgan holda qoladi va keyin tiklanadi
+        logger.error("❌ Dead-letter'ga yozib bo'lmadi: %s", e)
+        return
+    metrics.inc("dropped", str(msg.get("method")))
+    await _publish_result(msg, error=reason)
+    await _notify_admin(
+        bot,
+        f"Xabar yetkazilmadi ({msg.get('_retries')} urinish): {reason} | "
+        f"method={msg.get('method')} chat_id={msg.get('chat_id')}",
+    )
+
+
+# Muddati kelgan xabarlarni delayed -> asosiy navbat OXIRIGA atomar ko'chirish.
+# push() — transportga qarab RPUSH yoki XADD.
+_PROMOTE_LUA = """
+local items = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+if #items > 0 then
+    redis.call('ZREM', KEYS[1], unpack(items))
+    for _, item in ipairs(items) do
+        push(KEYS[2], item)
+    end
+end
+return #items
+"""
+_promote_script = r.register_script(transport.lua_push + _PROMOTE_LUA)
 
 
-async def _requeue(bot, msg: dict, *, reason: str) -> None:
-    """Xabarni cheklangan urinishlar bilan navbat boshiga qaytarish.
+async def _schedule(entries: list[tuple[dict, float]], *, acks: tuple = ()) -> None:
+    """Xabarlarni o'z navbatining kechiktirilgan sorted set'iga yozish.
 
-    MAX_QUEUE_RETRIES dan oshsa — tashlab yuboriladi va adminga xabar beriladi
-    (bitta yaroqsiz xabar butun navbatni bloklamasligi uchun).
+    entries — (xabar, yuborish vaqti unix soniyada) juftliklari. Sorted set
+    a'zolari noyob bo'lishi uchun har bir xabarda "id" bo'ladi. acks — shu
+    bilan birga (bitta tranzaksiyada) ACK qilinadigan tokenlar.
+    """
+    mappings: dict[str, dict] = {}
+    for msg, due in entries:
+        msg.setdefault("id", uuid.uuid4().hex)
+        queue = PRIORITY_QUEUES.get(msg.get("priority"), QUEUE_NAME)
+        mappings.setdefault(queue + DELAYED_SUFFIX, {})[encode(msg, QUEUE_CODEC)] = due
+    try:
+        pipe = r.pipeline(transaction=True)
+        for delayed_key, mapping in mappings.items():
+            pipe.zadd(delayed_key, mapping)
+        for token in acks:
+            transport.ack_to(pipe, token)
+        await pipe.execute()
+    except Exception as push_err:
+        # ACK ham bajarilmadi — xabar o'zlashtirilgan holda qoladi va keyin tiklanadi
+        logger.error("❌ Xabarni kechiktirilgan navbatga qo'yib bo'lmadi: %s", push_err)
+        return
+    for token in acks:
+        transport.acked(token)
+
+
+async def _requeue(bot, msg: dict, *, reason: str, token=None) -> None:
+    """Xabarni cheklangan urinishlar bilan kechiktirib qayta yuborish.
+
+    Xabar navbat boshiga emas, kechiktirilgan navbatga (eksponensial kechikish bilan)
+    yoziladi va vaqti kelganda navbat oxiriga qaytadi — yaroqsiz xabar yangi
+    xabarlarni to'sib qo'ymaydi. MAX_QUEUE_RETRIES dan oshsa — tashlab
+    yuboriladi va adminga xabar beriladi.
     """
     retries = int(msg.get("_retries", 0)) + 1
     msg["_retries"] = retries
+    msg.setdefault("_failed_at", time.time())
 
     if retries > MAX_QUEUE_RETRIES:
-        logger.error(
-            "❌ Xabar %s urinishdan keyin tashlandi | sabab=%s method=%s chat_id=%s",
-            retries, reason, msg.get("method"), msg.get("chat_id"),
-        )
-        await _notify_admin(
-            bot,
-            f"Xabar yetkazilmadi ({retries} urinish): {reason} | "
-            f"method={msg.get('method')} chat_id={msg.get('chat_id')}",
-        )
+        await _drop(bot, msg, reason=reason, token=token)
         return
 
-    try:
-        await r.lpush(QUEUE_NAME, json.dumps(msg))
-    except Exception as push_err:
-        logger.error("❌ Xabarni qayta navbatga qo'yib bo'lmadi: %s", push_err)
+    metrics.inc("retries", str(msg.get("method")))
+    delay = min(RETRY_BASE_DELAY * 2 ** (retries - 1), RETRY_MAX_DELAY)
+    await _schedule([(msg, time.time() + delay)], acks=(token,) if token is not None else ())
+
+
+async def _promote_delayed() -> None:
+    """Fon vazifasi: muddati kelgan kechiktirilgan xabarlarni navbatga qaytarish."""
+    while True:
+        busy = False
+        for queue in PRIORITY_QUEUES.values():
+            try:
+                moved = await _promote_script(
+                    keys=[queue + DELAYED_SUFFIX, transport.key(queue)],
+                    args=[time.time(), PROMOTE_BATCH],
+                )
+            except Exception as e:
+                logger.error("❌ Kechiktirilgan xabarlarni ko'chirishda xato: %s", e)
+                moved = 0
+            busy = busy or moved >= PROMOTE_BATCH
+        if not busy:
+            await asyncio.sleep(0.5)
+
+
+class _WeightedFair:
+    """Vaznli navbatlar uchun "smooth weighted round-robin" tartibi.
+
+    Har safar eng katta kreditli navbat birinchi. Kredit faqat haqiqatan
+    xabar olinganda hisoblanadi — bo'sh navbat o'z ulushini "yig'ib" qo'ymaydi.
+    """
+
+    def __init__(self, weights: dict[str, int]):
+        self._weights = weights
+        self._total = sum(weights.values())
+        self._credit = {name: 0 for name in weights}
+
+    def order(self) -> list[str]:
+        return sorted(self._weights, key=lambda n: self._credit[n] + self._weights[n], reverse=True)
+
+    def plan(self, n: int) -> dict[str, int]:
+        """Keyingi n ta xabar navbatlar orasida qanday bo'linishi kerak (holat o'zgarmaydi)."""
+        credit = dict(self._credit)
+        quotas = {name: 0 for name in self._weights}
+        for _ in range(n):
+            for name, w in self._weights.items():
+                credit[name] += w
+            best = max(credit, key=credit.get)
+            credit[best] -= self._total
+            quotas[best] += 1
+        return quotas
+
+    def taken(self, name: str) -> None:
+        for n, w in self._weights.items():
+            self._credit[n] += w
+        self._credit[name] -= self._total
 
 
-async def run_worker(bot_token: str):
-    bot = Bot(token=bot_token)
-    logger.info("🚀 Worker ishga tushdi (Full Mode)...")
+async def _pop_next(fair: _WeightedFair, limit: int) -> list[tuple]:
+    """Navbatlardan ``limit`` tagacha xabarni o'zlashtirib olish: [(token, payload), ...].
 
+    Interactive navbat har doim birinchi (to'liq kvota bilan); qolganlari
+    _WeightedFair rejasi bo'yicha bo'linadi. Hammasi bo'sh bo'lsa —
+    interactive navbatda IDLE_WAIT kutiladi.
+    """
+    quotas = fair.plan(limit)
+    names = [PRIORITY_INTERACTIVE, *fair.order()]
+    queues = [PRIORITY_QUEUES[n] for n in names]
+    found = await transport.pop(
+        queues, [limit, *(quotas[n] for n in names[1:])], limit, IDLE_WAIT
+    )
+    popped = []
+    for queue, token, raw in found:
+        name = names[queues.index(queue)]
+        if name in PRIORITY_WEIGHTS:
+            fair.taken(name)
+        popped.append((token, raw))
+    return popped
+
+
+async def _heartbeat_and_reap() -> None:
+    """Fon vazifasi: o'z xabarlarini "tirik" deb belgilash va o'lik worker'larnikini qaytarish."""
     while True:
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
         try:
-            data = await r.blpop(QUEUE_NAME, timeout=1)
-            if not data:
-                continue
+            await transport.keepalive()
         except Exception as e:
-            # Redis darajasidagi xato (ulanish uzilishi va h.k.)
-            logger.error("❌ Redis blpop xatosi: %s", e)
-            await asyncio.sleep(0.5)
-            continue
+            logger.error("❌ Heartbeat/reaper xatosi: %s", e)
+
+
+def _lane_key(msg: dict):
+    """Xabar qaysi "chat yo'lagi"ga tegishli (tartib shu kalit ichida saqlanadi)."""
+    chat_id = msg.get("chat_id")
+    if chat_id is not None:
+        return chat_id
+    return ("inline", msg.get("args", {}).get("inline_message_id"))
+
+
+class _ChatLanes:
+    """Navbatdagi xabarlarni chatlar bo'yicha parallel yuboruvchi dispetcher.
+
+    Har bir chat uchun alohida ichki navbat (yo'lak) bor: bitta chatning
+    xabarlari kelgan tartibda, bittadan yuboriladi (send -> edit -> delete
+    ketma-ketligi buzilmaydi). Turli chatlar esa bir vaqtda yuboriladi —
+    tezlikni send_limiter (Telegram limitlari) va _send_slots belgilaydi.
+
+    Chat flood-limit (RetryAfter) olsa, uning navbatdagi barcha xabarlari
+    tartibi bilan kechiktirilgan navbatga o'tkaziladi — worker shu chatni kutib
+    turmaydi, boshqa foydalanuvchilar kechikmaydi.
+
+    Yo'lak elementlari — (token, msg): token transportdagi yozuvni bildiradi,
+    xabar bilan ish tugaganda aynan shu token ACK qilinadi.
+    """
 
+    # Bitta chatning kechiktirilgan xabarlari orasidagi score farqi (tartib uchun)
+    _DEFER_STEP = 0.001
+
+    def __init__(self, bot):
+        self.bot = bot
+        self._lanes: dict = {}
+        self._tasks: set = set()
+        self._buffered = asyncio.Semaphore(MAX_BUFFERED)
+        # chat -> shu chatning oxirgi kechiktirilgan xabari vaqti
+        self._deferred: dict = {}
+
+    async def reserve(self, limit: int) -> int:
+        """Navbatdan yangi xabarlar olishdan oldin bufferda joy olish.
+
+        Kamida bitta joy bo'shashini kutadi, keyin kutmasdan ``limit`` tagacha
+        oladi. Qaytaradi: olingan joylar soni.
+        """
+        await self._buffered.acquire()
+        n = 1
+        while n < limit and not self._buffered.locked():
+            await self._buffered.acquire()
+            n += 1
+        return n
+
+    def release(self, n: int = 1) -> None:
+        """reserve() bilan olingan, lekin ishlatilmagan joylarni qaytarish."""
+        for _ in range(n):
+            self._buffered.release()
+
+    def gauges(self) -> dict:
+        """Metrikalar uchun: faol yo'laklar va ularda navbat kutayotgan xabarlar."""
+        return {
+            "lanes_active": len(self._lanes),
+            "lanes_buffered": sum(len(lane) for lane in self._lanes.values()),
+        }
+
+    async def submit(self, token, msg: dict) -> None:
+        key = _lane_key(msg)
+
+        # Chat hali flood-limit ostida — yangi xabar ham kechiktirilganlar ortidan
+        last_due = self._deferred.get(key)
+        if last_due is not None:
+            if last_due > time.time():
+                last_due += self._DEFER_STEP
+                self._deferred[key] = last_due
+                self.release()
+                await _schedule([(msg, last_due)], acks=(token,))
+                return
+            del self._deferred[key]
+
+        lane = self._lanes.get(key)
+        if lane is not None:
+            lane.append((token, msg))
+            return
+
+        self._lanes[key] = deque([(token, msg)])
+        task = asyncio.create_task(self._drain(key))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _drain(self, key) -> None:
+        lane = self._lanes[key]
         try:
-            msg = json.loads(data[1])
-        except (ValueError, TypeError) as e:
-            logger.error("❌ Buzilgan xabar tashlab yuborildi: %s", e)
-            continue
+            while lane:
+                token, msg = lane.popleft()
+                try:
+                    items = await self._expand(token, msg)
+                    for i, (item_token, item_msg) in enumerate(items):
+                        wait = await self._deliver(item_token, item_msg)
+                        if wait:
+                            pending = [*items[i:], *lane]
+                            for _ in lane:
+                                self._buffered.release()
+                            lane.clear()
+                            await self._defer(key, pending, wait)
+                            break
+                except Exception as e:
+                    logger.error("❌ Yo'lakda kutilmagan xato: %s | chat_id=%s", e, msg.get("chat_id"))
+                finally:
+                    self._buffered.release()
+        finally:
+            # Kutilmagan to'xtash (masalan, task bekor qilindi) — qolgan joylarni
+            # qaytaramiz (xabarlar o'zlashtirilgan holda qoladi va keyin tiklanadi)
+            for _ in lane:
+                self._buffered.release()
+            self._lanes.pop(key, None)
+
+    async def _expand(self, token, msg: dict) -> list[tuple]:
+        """Edit ref'ini shu paytdagi eng oxirgi edit payload(lar)iga almashtirish.
+
+        Ref yo'lakda kutgan vaqt ichida kelgan edit'lar ham shu yerda yutiladi.
+        Oddiy xabar o'zgarishsiz qaytadi.
+        """
+        if msg.get("method") != COALESCED_EDIT:
+            return [(token, msg)]
+        try:
+            taken = await transport.take_edits(EDITS_HASH, EDITS_PENDING, msg["content"], token)
+        except Exception as e:
+            await _requeue(self.bot, msg, reason=f"edit ref: {e}", token=token)
+            return []
+        return [(item_token, decode(raw)) for item_token, raw in taken]
+
+    async def _defer(self, key, items: list[tuple], wait: float) -> None:
+        """Chat xabarlarini tartibini saqlagan holda "wait" soniyaga kechiktirish."""
+        due = time.time() + wait
+        entries = [(msg, due + i * self._DEFER_STEP) for i, (_, msg) in enumerate(items)]
+        # Await'dan OLDIN belgilanadi — shu orada kelgan xabarlar ham ortga o'tadi
+        self._deferred[key] = entries[-1][1]
+        await _schedule(entries, acks=tuple(token for token, _ in items))
 
+    async def _deliver(self, token, msg: dict) -> float | None:
+        """Xabarni yuborish. Flood-limit bo'lsa — kutish soniyasini qaytaradi.
+
+        Flood-limitdan boshqa barcha holatlarda xabar shu yerda ACK qilinadi
+        (yoki kechiktirilgan navbatga o'tkaziladi).
+        """
         try:
-            await _handle_message(bot, msg)
+            sent = await _handle_message(self.bot, msg)
+            await _ack(token)
+            await _publish_result(msg, sent)
+            metrics.inc("sent", msg.get("method"))
+            if msg.get("ts"):
+                metrics.observe("enqueue_to_send_seconds", msg.get("method"), max(0.0, time.time() - msg["ts"]))
+            return None
         except RetryAfter as e:
-            # Telegram flood-limit: kutib, xabarni qayta navbatga qaytaramiz.
+            metrics.inc("retry_after", msg.get("method"))
             wait = min(int(getattr(e, "retry_after", 1)) + 1, MAX_RETRY_AFTER)
-            logger.warning("⚠️ Flood limit, %ss kutilmoqda (chat_id=%s)", wait, msg.get("chat_id"))
-            await asyncio.sleep(wait)
-            await _requeue(bot, msg, reason="flood-limit")
-            continue
-        except Forbidden:
-            # Foydalanuvchi botni bloklagan — qayta urinishdan ma'no yo'q
-            logger.info("⛔ Foydalanuvchi bloklagan, xabar tashlandi (chat_id=%s)", msg.get("chat_id"))
-            continue
+        except (Forbidden, BadRequest) as e:
+            if not _is_chat_gone(e):
+                logger.error(
+                    "❌ Xabarni yuborishda xato: %s | method=%s chat_id=%s",
+                    e, msg.get("method"), msg.get("chat_id"),
+                )
+                await _requeue(self.bot, msg, reason=str(e), token=token)
+                return None
+            # Foydalanuvchi botni bloklagan / chat yo'q — qayta urinishdan ma'no yo'q,
+            # keyingi xabarlar ham Telegramga yuborilmaydi (bloklanganlar ro'yxati)
+            logger.info("⛔ Chat mavjud emas yoki bloklagan, xabar tashlandi (chat_id=%s): %s", msg.get("chat_id"), e)
+            metrics.inc("forbidden", msg.get("method"))
+            await mark_chat_blocked(msg.get("chat_id"))
+            await _ack(token)
+            await _publish_result(msg, error="Foydalanuvchi botni bloklagan")
+            return None
         except Exception as e:
             # Kutilmagan xato — xabar yo'qolmasligi uchun cheklangan qayta urinish
             logger.error(
                 "❌ Xabarni yuborishda xato: %s | method=%s chat_id=%s",
                 e, msg.get("method"), msg.get("chat_id"),
             )
-            await _requeue(bot, msg, reason=str(e))
+            await _requeue(self.bot, msg, reason=str(e), token=token)
+            return None
+
+        logger.warning("⚠️ Flood limit, %ss ga kechiktirildi (chat_id=%s)", wait, msg.get("chat_id"))
+        msg["_retries"] = int(msg.get("_retries", 0)) + 1
+        msg.setdefault("_failed_at", time.time())
+        if msg["_retries"] > MAX_QUEUE_RETRIES:
+            await _drop(self.bot, msg, reason="flood-limit", token=token)
+            return None
+        # Boshqa worker'lar ham shu chatga "wait" davomida yubormasin
+        await send_limiter.penalize(msg.get("chat_id"), wait)
+        return wait
+
+
+def _text(value) -> str:
+    return value.decode() if isinstance(value, bytes) else str(value)
+
+
+def dead_letter_reason_group(reason: str) -> str:
+    """Xato matnini guruhlash uchun: raqamlar (id, soniya) olib tashlanadi."""
+    return re.sub(r"\d+", "N", reason.splitlines()[0] if reason else "")[:80]
+
+
+def dead_letter_reason_key(reason: str) -> str:
+    """Sabab guruhining qisqa kaliti (callback_data ga sig'adi)."""
+    return hashlib.sha1(dead_letter_reason_group(reason).encode()).hexdigest()[:8]
+
+
+def _dead_letter_entry(entry_id, fields: dict) -> dict:
+    fields = {_text(k): v for k, v in fields.items()}
+    return {
+        "id": _text(entry_id),
+        "method": _text(fields.get("method", "")),
+        "chat_id": _text(fields.get("chat_id", "")),
+        "priority": _text(fields.get("priority", PRIORITY_BULK)),
+        "reason": _text(fields.get("reason", "")),
+        "attempts": int(fields.get("attempts") or 0),
+        "failed_at": float(fields.get("failed_at") or 0),
+        "dropped_at": float(fields.get("dropped_at") or 0),
+        "payload": fields.get("p"),
+    }
+
+
+def _dead_letter_matches(entry: dict, method=None, error=None, reason_key=None) -> bool:
+    if method and entry["method"] != method:
+        return False
+    if error and error.lower() not in entry["reason"].lower():
+        return False
+    if reason_key and dead_letter_reason_key(entry["reason"]) != reason_key:
+        return False
+    return True
+
+
+async def dead_letters(*, method=None, error=None, reason_key=None, limit: int = 20,
+                       scan: int = DEAD_LETTER_SCAN) -> list[dict]:
+    """Dead-letter yozuvlari (eng yangisi birinchi), filtr bilan.
+
+    method — aniq moslik, error — sabab ichida qidiriladigan matn,
+    reason_key — dead_letter_reason_key() natijasi.
+    """
+    found = []
+    last = "+"
+    seen = 0
+    while len(found) < limit and seen < scan:
+        batch = await rq.xrevrange(DEAD_LETTER_STREAM, max=last, min="-", count=200)
+        if not batch:
+            break
+        for entry_id, fields in batch:
+            seen += 1
+            entry = _dead_letter_entry(entry_id, fields)
+            if _dead_letter_matches(entry, method, error, reason_key):
+                found.append(entry)
+                if len(found) >= limit:
+                    break
+        last = "(" + _text(batch[-1][0])
+    return found
+
+
+async def dead_letter_summary(scan: int = DEAD_LETTER_SCAN) -> dict:
+    """Umumiy son va oxirgi ``scan`` ta yozuv bo'yicha method/sabab taqsimoti."""
+    total = await rq.xlen(DEAD_LETTER_STREAM)
+    methods: dict[str, int] = {}
+    reasons: dict[str, int] = {}
+    entries = await dead_letters(limit=scan, scan=scan)
+    for entry in entries:
+        methods[entry["method"]] = methods.get(entry["method"], 0) + 1
+        group = dead_letter_reason_group(entry["reason"])
+        reasons[group] = reasons.get(group, 0) + 1
+    return {
+        "total": total,
+        "scanned": len(entries),
+        "methods": sorted(methods.items(), key=lambda kv: kv[1], reverse=True),
+        "reasons": sorted(reasons.items(), key=lambda kv: kv[1], reverse=True),
+        "oldest": min((e["dropped_at"] for e in entries), default=None),
+        "newest": max((e["dropped_at"] for e in entries), default=None),
+    }
+
+
+async def replay_dead_letters(*, method=None, error=None, reason_key=None, limit: int | None = None,
+                              rate: float = DEAD_LETTER_REPLAY_RATE, delete: bool = True) -> int:
+    """Dead-letter xabarlarini (eskisidan boshlab) o'z navbatiga qaytarish.
+
+    ``rate`` — soniyasiga nechta xabar navbatga qo'yiladi (Telegram limitlari
+    worker'da baribir qo'llanadi, bu esa navbatni birdan to'ldirib yubormaslik
+    uchun). Urinishlar hisobi nolga tushiriladi. delete=False — yozuvlar
+    dead-letter'da ham qoladi. Qaytaradi: qayta yuborilganlar soni.
+    """
+    replayed = 0
+    last = "-"
+    interval = 1 / rate if rate > 0 else 0
+    # Faqat boshlanish paytidagi yozuvlar: shu orada yana yiqilib dead-letter'ga
+    # qaytgan xabarlar shu ishga tushirishda qayta olinmaydi
+    newest = await rq.xrevrange(DEAD_LETTER_STREAM, max="+", min="-", count=1)
+    if not newest:
+        return 0
+    end = newest[0][0]
+    while limit is None or replayed < limit:
+        batch = await rq.xrange(DEAD_LETTER_STREAM, min=last, max=end, count=100)
+        if not batch:
+            break
+        last = "(" + _text(batch[-1][0])
+        for entry_id, fields in batch:
+            entry = _dead_letter_entry(entry_id, fields)
+            if not _dead_letter_matches(entry, method, error, reason_key):
+                continue
+            try:
+                msg = decode(entry["payload"])
+            except PayloadError as e:
+                logger.warning("⚠️ Dead-letter %s ochilmadi: %s", entry["id"], e)
+                continue
+            for key in ("_retries", "_failed_at", "reply_to"):
+                msg.pop(key, None)
+            msg["ts"] = round(time.time(), 3)
+            queue = PRIORITY_QUEUES.get(msg.get("priority"), QUEUE_NAME)
+            await transport.push(queue, encode(msg, QUEUE_CODEC))
+            if delete:
+                await rq.xdel(DEAD_LETTER_STREAM, entry_id)
+            replayed += 1
+            if limit is not None and replayed >= limit:
+                break
+            if interval:
+                await asyncio.sleep(interval)
+    if replayed:
+        logger.info("🔁 Dead-letter: %s ta xabar navbatga qaytarildi", replayed)
+    return replayed
+
+
+async def acquire_replay_lock() -> bool:
+    """Qayta yuborishni boshlash huquqi (boshqasi ishlayotgan bo'lsa False)."""
+    return bool(await r.set(DEAD_LETTER_REPLAY_LOCK, int(time.time()), nx=True, ex=DEAD_LETTER_REPLAY_LOCK_TTL))
+
+
+async def release_replay_lock() -> None:
+    await r.delete(DEAD_LETTER_REPLAY_LOCK)
+
+
+async def count_dead_letters(*, method=None, error=None, reason_key=None) -> int:
+    """Filtrga mos dead-letter yozuvlari soni — butun stream ko'riladi (DEAD_LETTER_SCAN cheklovisiz)."""
+    count = 0
+    last = "-"
+    while True:
+        batch = await rq.xrange(DEAD_LETTER_STREAM, min=last, max="+", count=500)
+        if not batch:
+            break
+        last = "(" + _text(batch[-1][0])
+        count += sum(
+            1 for entry_id, fields in batch
+            if _dead_letter_matches(_dead_letter_entry(entry_id, fields), method, error, reason_key)
+        )
+    return count
+
+
+async def purge_dead_letters(*, method=None, error=None, reason_key=None) -> int:
+    """Filtrga mos dead-letter yozuvlarini o'chirish. Qaytaradi: o'chirilganlar soni."""
+    removed = 0
+    last = "-"
+    while True:
+        batch = await rq.xrange(DEAD_LETTER_STREAM, min=last, max="+", count=500)
+        if not batch:
+            break
+        last = "(" + _text(batch[-1][0])
+        ids = [
+            entry_id for entry_id, fields in batch
+            if _dead_letter_matches(_dead_letter_entry(entry_id, fields), method, error, reason_key)
+        ]
+        if ids:
+            removed += await rq.xdel(DEAD_LETTER_STREAM, *ids)
+    return removed
+
+
+async def _queue_gauges() -> dict:
+    """Redis'dagi navbat holati: har bir yo'lak chuqurligi, kechiktirilganlar, dead-letter."""
+    gauges = {}
+    names = {queue: name for name, queue in PRIORITY_QUEUES.items()}
+    for queue, info in (await transport.stats()).items():
+        for field, value in info.items():
+            gauges[f"queue_{field}:{names.get(queue, queue)}"] = value
+    pipe = r.pipeline(transaction=False)
+    for queue in PRIORITY_QUEUES.values():
+        pipe.zcard(queue + DELAYED_SUFFIX)
+    pipe.xlen(DEAD_LETTER_STREAM)
+    pipe.hlen(EDITS_HASH)
+    *delayed, dead, edits = await pipe.execute()
+    for name, count in zip(PRIORITY_QUEUES, delayed):
+        gauges[f"queue_delayed:{name}"] = count
+    gauges["dead_letters"] = dead
+    gauges["edits_staged"] = edits
+    return gauges
+
+
+def _local_gauges(lanes: "_ChatLanes", *, reset_peak: bool = False) -> dict:
+    """Shu jarayonga xos gauge'lar: chat yo'laklari va HTTP pul bandligi."""
+    return {**lanes.gauges(), **lanes.bot.request.gauges(reset_peak=reset_peak)}
+
+
+async def _publish_metrics(lanes: "_ChatLanes") -> None:
+    """Fon vazifasi: metrikalar snapshot'ini METRICS_HASH ga yozib turish."""
+    while True:
+        await asyncio.sleep(METRICS_INTERVAL)
+        try:
+            snapshot = metrics.snapshot(WORKER_ID, await _queue_gauges(), _local_gauges(lanes, reset_peak=True))
+            await r.hset(METRICS_HASH, WORKER_ID, dumps_snapshot(snapshot))
+        except Exception as e:
+            logger.warning("⚠️ Metrikalarni yozib bo'lmadi: %s", e)
+
+
+async def _start_metrics_server(lanes: "_ChatLanes"):
+    async def render() -> str:
+        try:
+            gauges = await _queue_gauges()
+        except Exception as e:
+            logger.warning("⚠️ Navbat holatini olib bo'lmadi: %s", e)
+            gauges = {}
+        return metrics.render_prometheus(gauges, _local_gauges(lanes))
+
+    try:
+        return await serve_prometheus(render, METRICS_HOST, METRICS_PORT)
+    except OSError as e:
+        logger.error("❌ Metrics port'ini ochib bo'lmadi (%s:%s): %s", METRICS_HOST, METRICS_PORT, e)
+        return None
+
+
+async def queue_metrics() -> dict | None:
+    """Barcha tirik worker'lar metrikalari jamlanmasi (admin panel uchun).
+
+    METRICS_STALE dan eski snapshot'lar (to'xtagan worker'lar) hash'dan
+    o'chiriladi. Birorta ham worker bo'lmasa — None.
+    """
+    raw = await r.hgetall(METRICS_HASH)
+    now = time.time()
+    snapshots, stale = [], []
+    for worker_id, data in raw.items():
+        try:
+            snap = json.loads(data)
+        except ValueError:
+            stale.append(worker_id)
+            continue
+        if now - snap.get("ts", 0) > METRICS_STALE:
+            stale.append(worker_id)
+        else:
+            snapshots.append(snap)
+    if stale:
+        await r.hdel(METRICS_HASH, *stale)
+    if not snapshots:
+        return None
+    return merge_snapshots(snapshots)
+
+
+async def run_worker(bot_token: str, *, base_url: str | None = None):
+    """Navbat worker'i. base_url — boshqa Bot API manzili (o'z serveri yoki scripts/fake_telegram.py)."""
+    if TELEGRAM_POOL_SIZE < WORKER_CONCURRENCY:
+        logger.warning(
+            "⚠️ TELEGRAM_POOL_SIZE (%s) < WORKER_CONCURRENCY (%s) — so'rovlar bo'sh ulanish kutib qoladi",
+            TELEGRAM_POOL_SIZE, WORKER_CONCURRENCY,
+        )
+    request = build_request(on_pool_timeout=lambda: metrics.inc("pool_timeouts"))
+    if base_url:
+        bot = Bot(token=bot_token, base_url=base_url, request=request)
+    else:
+        bot = Bot(token=bot_token, request=request)
+    lanes = _ChatLanes(bot)
+    fair = _WeightedFair(PRIORITY_WEIGHTS)
+    await transport.start()
+    # Havola saqlanadi — aks holda fon vazifalarini GC yo'qotib yuborishi mumkin
+    background = [
+        asyncio.create_task(_promote_delayed()),
+        asyncio.create_task(_heartbeat_and_reap()),
+        asyncio.create_task(_publish_metrics(lanes)),
+    ]
+    metrics_server = await _start_metrics_server(lanes) if METRICS_PORT else None
+    logger.info(
+        "🚀 Worker ishga tushdi (Full Mode, id=%s, transport=%s, parallel=%s)...",
+        WORKER_ID, transport.name, WORKER_CONCURRENCY,
+    )
+
+    while True:
+        reserved = await lanes.reserve(POP_BATCH)
+        try:
+            # Atomar: navbatdan olib, shu worker nomiga o'zlashtirish.
+            # Worker shu yerdan keyin o'lsa ham xabar yo'qolmaydi (reaper qaytaradi).
+            popped = await _pop_next(fair, reserved)
+        except Exception as e:
+            # Redis darajasidagi xato (ulanish uzilishi va h.k.)
+            lanes.release(reserved)
+            logger.error("❌ Redis navbat xatosi: %s", e)
+            await asyncio.sleep(0.5)
             continue
 
-        # Telegram limitidan oshmaslik uchun yuborishlar orasida pauza
-        await asyncio.sleep(SEND_INTERVAL)
+        lanes.release(reserved - len(popped))
+        batch = []
+        for token, raw in popped:
+            try:
+                batch.append((token, decode(raw)))
+            except PayloadError as e:
+                lanes.release()
+                logger.error("❌ Buzilgan xabar tashlab yuborildi: %s", e)
+                await _ack(token)
+
+        try:
+            blocked = await blocked_among({msg.get("chat_id") for _, msg in batch})
+        except Exception as e:
+            logger.warning("⚠️ Bloklanganlar ro'yxatini tekshirib bo'lmadi: %s", e)
+            blocked = set()
+
+        for token, msg in batch:
+            if msg.get("chat_id") in blocked:
+                # Bloklagan chatga Telegram so'rovi sarflanmaydi
+                lanes.release()
+                await _ack(token)
+                await _publish_result(msg, error="Foydalanuvchi botni bloklagan")
+                metrics.inc("blocked_skipped", msg.get("method"))
+                continue
+            await lanes.submit(token, msg)
@@ -3,24 +3,35 @@
 Postgres tomonida `uz_normalize()` funksiyasi (database/init_db.py dagi
 ensure_search_index() da yaratiladi) apostrof variantlarini
 (', ', ', ʻ, ʼ, `, ´, ʹ, ʺ) va registrni bir xillashtiradi, shuning uchun
-"po'lat", "po'lat" va "polat" bir xil so'z sifatida topiladi. Aniq substring
+"po'lat", "po'lat" va "polat" bir xil so'z sifatida topiladi. Kirill yozuvi
+lotinga o'giriladi — "Ўргимчак одам" va "O'rgimchak odam" bir xil. Kino nomining
+normalize qilingan shakli `movie_name_norm` ustunida saqlanadi (trigger
+yuritadi) — qidiruv har bir qator uchun funksiya chaqirmaydi. Aniq substring
 mos kelish natijalari trigram o'xshashlik darajasidan ustun qo'yib
 saralanadi, shu bilan birga bir-ikkita harfi xato yozilgan so'zlar ham
 (masalan "pulat" -> "po'lat") topiladi.
+
+pg_trgm mavjud bo'lmasa (yoki SEARCH_ENGINE=memory) xuddi shu qoidalar va
+tartib bilan jarayon ichidagi indeks ishlatiladi (utils/trigram_index.py) —
+bu holda Redis keshi ham chetlab o'tiladi.
 """
+import asyncio
 import re
 
-from tortoise import Tortoise
+from tortoise.transactions import in_transaction
+
+from . import search_cache
+from .trigram_index import search_index
 
 SIMILARITY_THRESHOLD = 0.25
 
-# "2-qism", "2 qism", "2qism", "qism 2", "3-qism" kabi qism-raqam
+# "2-qism", "2 qism", "2qism", "qism 2", "3-қисм" kabi qism-raqam
 # iboralarini so'rovdan olib tashlash uchun. Qismlar bazada alohida Movie
 # qatori bo'lib, movie_name'i ota-kino nomi bilan bir xil (part_number'da
 # saqlanadi, nomida emas) — shuning uchun "Kino nomi 2-qism" deb qidirilsa,
 # "2-qism" qismi olib tashlanmasa so'rov nomga mos kelmay qoladi.
 _PART_SUFFIX_RE = re.compile(
-    r"(?:\bqism\s*-?\s*\d+\b|\b\d+\s*-?\s*qism\b)", re.IGNORECASE
+    r"(?:\b(?:qism|қисм)\s*-?\s*\d+\b|\b\d+\s*-?\s*(?:qism|қисм)\b)", re.IGNORECASE
 )
 
 
@@ -36,52 +47,149 @@ def _strip_part_suffix(query: str) -> str:
 # o'ziga xos nom bergan bo'lsa (masalan "Qasoskorlar 2: Altron Davri" — franshizaning
 # alohida filmi), bu holda o'sha nom bo'yicha ham topilishi kerak — shuning uchun
 # ota-kino bilan solishtirib, faqat nomi haqiqatan farq qiladigan qismlar qidiruvga
-# o'z ID'si bilan qo'shiladi.
-_FROM_CLAUSE = "FROM movie m LEFT JOIN movie p ON m.parent_movie_id = p.movie_id"
+# o'z ID'si bilan qo'shiladi. Bu solishtirish ham oldindan hisoblangan:
+# inherits_parent_name (trigger yuritadi, ota-kino nomi o'zgarsa ham yangilanadi).
+#
+# uz_normalize(%s) — so'rov parametri ustida, konstanta sifatida bir marta
+# hisoblanadi. "%%" (pg_trgm "%" operatori) — faqat indeksdan foydalanadigan
+# dastlabki filtr (o'xshashlik >= pg_trgm.similarity_threshold); haqiqiy shart
+# esa aniq similarity(...) > SIMILARITY_THRESHOLD — xotiradagi indeks ham aynan
+# shuni tekshiradi. Dastlabki filtr chegarasi undan qattiqroq bo'lmasligi uchun
+# har bir so'rov tranzaksiyasida SET LOCAL qilinadi (_execute_dict).
+_FROM_CLAUSE = "FROM movie m"
 _WHERE_CLAUSE = """
-    (m.parent_movie_id IS NULL OR m.movie_name <> p.movie_name)
+    NOT m.inherits_parent_name
     AND (
-        uz_normalize(m.movie_name) ILIKE '%%' || uz_normalize(%s) || '%%'
-        OR similarity(uz_normalize(m.movie_name), uz_normalize(%s)) > %s
+        m.movie_name_norm LIKE '%%' || uz_normalize(%s) || '%%'
+        OR (
+            m.movie_name_norm %% uz_normalize(%s)
+            AND similarity(m.movie_name_norm, uz_normalize(%s)) > %s
+        )
     )
 """
 
 
-async def search_movie_ids(query: str, *, limit: int, offset: int = 0) -> tuple[list[int], int]:
-    """Fuzzy qidiruvga mos kino id'larini (o'xshashlik bo'yicha saralangan) va jami sonini qaytaradi."""
-    query = _strip_part_suffix(query)
-    conn = Tortoise.get_connection("default")
+_ORDER_CLAUSE = """
+    (m.movie_name_norm LIKE '%%' || uz_normalize(%s) || '%%') DESC,
+    similarity(m.movie_name_norm, uz_normalize(%s)) DESC,
+    m.movie_name ASC
+"""
 
-    count_rows = await conn.execute_query_dict(
-        f"SELECT COUNT(*) AS cnt {_FROM_CLAUSE} WHERE {_WHERE_CLAUSE}",
-        [query, query, SIMILARITY_THRESHOLD],
-    )
-    total = count_rows[0]["cnt"] if count_rows else 0
 
-    rows = await conn.execute_query_dict(
-        f"""
-        SELECT m.movie_id {_FROM_CLAUSE}
+def _page_sql(columns: str) -> str:
+    """Sahifa so'rovi (scripts/bench_search.py EXPLAIN uchun ham ishlatadi)."""
+    return f"""
+        SELECT {columns}, COUNT(*) OVER() AS _total {_FROM_CLAUSE}
         WHERE {_WHERE_CLAUSE}
-        ORDER BY
-            (uz_normalize(m.movie_name) ILIKE '%%' || uz_normalize(%s) || '%%') DESC,
-            similarity(uz_normalize(m.movie_name), uz_normalize(%s)) DESC,
-            m.movie_name ASC
+        ORDER BY {_ORDER_CLAUSE}
         LIMIT %s OFFSET %s
-        """,
-        [query, query, SIMILARITY_THRESHOLD, query, query, limit, offset],
+        """
+
+
+def _where_params(query: str) -> list:
+    return [query, query, query, SIMILARITY_THRESHOLD]
+
+
+def _page_params(query: str, limit: int, offset: int) -> list:
+    return [*_where_params(query), query, query, limit, offset]
+
+
+async def _execute_dict(sql: str, params: list) -> list[dict]:
+    """"%" operatori chegarasini shu so'rov uchun SIMILARITY_THRESHOLD ga tushirib bajarish.
+
+    set_config(..., true) = SET LOCAL — faqat shu tranzaksiyaga ta'sir qiladi,
+    pool'dagi boshqa ulanishlar va huquqlarga bog'liq emas.
+    """
+    async with in_transaction("default") as conn:
+        await conn.execute_query(
+            "SELECT set_config('pg_trgm.similarity_threshold', %s, true)", [str(SIMILARITY_THRESHOLD)]
+        )
+        return await conn.execute_query_dict(sql, params)
+
+
+async def _search_rows(query: str, columns: str, *, limit: int, offset: int) -> tuple[list[dict], int]:
+    """Bitta so'rovda sahifa qatorlari va jami son (COUNT(*) OVER()).
+
+    Window funksiya LIMIT'dan oldin hisoblanadi, shuning uchun har bir qatorda
+    butun natija soni bor — alohida COUNT so'rovi kerak emas. Faqat sahifa
+    bo'sh bo'lsa (offset natijadan tashqarida) jami son alohida olinadi.
+    """
+    query = _strip_part_suffix(query)
+
+    rows = await _execute_dict(_page_sql(columns), _page_params(query, limit, offset))
+    if rows:
+        return rows, rows[0]["_total"]
+    if not offset:
+        return [], 0
+
+    count_rows = await _execute_dict(
+        f"SELECT COUNT(*) AS cnt {_FROM_CLAUSE} WHERE {_WHERE_CLAUSE}",
+        _where_params(query),
     )
-    return [r["movie_id"] for r in rows], total
+    return [], count_rows[0]["cnt"] if count_rows else 0
+
+
+# Single-flight: bir vaqtda kelgan bir xil (normalize qilingan) so'rovlar bitta
+# bazaga borishni kutadi. Kalit -> hisoblayotgan task.
+_inflight: dict[tuple, asyncio.Task] = {}
+
+
+async def _compute_movie_ids(query: str, normalized: str, limit: int, offset: int) -> tuple[list[int], int]:
+    cached = await search_cache.lookup(normalized, limit, offset)
+    if cached.hit:
+        return cached.ids, cached.total
+
+    owner = await search_cache.acquire_lock(cached)
+    if not owner:
+        # Boshqa replika hisoblamoqda — natija keshga tushishini kutamiz
+        cached = await search_cache.wait_for_result(normalized, limit, offset)
+        if cached.hit:
+            return cached.ids, cached.total
+    try:
+        rows, total = await _search_rows(query, "m.movie_id", limit=limit, offset=offset)
+        ids = [r["movie_id"] for r in rows]
+        await search_cache.store(cached, ids, total)
+    finally:
+        if owner:
+            await search_cache.release_lock(cached)
+    return ids, total
+
+
+async def search_movie_ids(query: str, *, limit: int, offset: int = 0) -> tuple[list[int], int]:
+    """Fuzzy qidiruvga mos kino id'larini (o'xshashlik bo'yicha saralangan) va jami sonini qaytaradi.
+
+    Bir xil so'rov allaqachon hisoblanayotgan bo'lsa, yangi so'rov bazaga
+    bormaydi — o'sha natijani kutadi (shield: bitta chaqiruvchi bekor
+    qilinsa boshqalar uchun hisoblash to'xtamaydi).
+    """
+    if search_index.active:
+        return search_index.search(
+            _strip_part_suffix(query), limit=limit, offset=offset, threshold=SIMILARITY_THRESHOLD
+        )
+
+    normalized = search_cache.normalize_query(_strip_part_suffix(query))
+    key = (normalized, limit, offset)
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_compute_movie_ids(query, normalized, limit, offset))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    else:
+        search_cache.cache_stats["shared"] += 1
+    ids, total = await asyncio.shield(task)
+    return list(ids), total
 
 
 async def search_movies(query: str, *, limit: int, offset: int = 0):
-    """Fuzzy qidiruv natijasidagi Movie obyektlarini (saralangan tartibda) va jami sonini qaytaradi."""
+    """Fuzzy qidiruv natijasidagi Movie obyektlarini (saralangan tartibda) va jami sonini qaytaradi.
+
+    Id'lar search_movie_ids() dan (kesh, single-flight va replikalar qulfi
+    shu yerda), Movie qatorlari esa primary key bo'yicha bitta so'rovda olinadi.
+    """
     from database import Movie
 
     ids, total = await search_movie_ids(query, limit=limit, offset=offset)
     if not ids:
         return [], total
-
-    movies = await Movie.filter(movie_id__in=ids)
-    by_id = {m.movie_id: m for m in movies}
-    ordered = [by_id[i] for i in ids if i in by_id]
-    return ordered, total
+    by_id = {m.movie_id: m for m in await Movie.filter(movie_id__in=ids)}
+    return [by_id[i] for i in ids if i in by_id], total
@@ -0,0 +1,225 @@
+"""Qidiruv natijalari uchun Redis keshi (katalog versiyasi bilan).
+
+Mashhur nomlar kuniga minglab marta bir xil so'rov bilan qidiriladi — har
+safar pg_trgm'ga bormaslik uchun saralangan id'lar va jami son Redis'da
+saqlanadi. Kalit: normalize qilingan so'rov + limit + offset.
+
+Yaroqsizlantirish — global katalog versiyasi (CATALOG_VERSION_KEY): admin
+kinoni qo'shsa/tahrirlasa/o'chirsa bump_catalog_version() chaqiriladi va
+eski versiya bilan yozilgan barcha yozuvlar bir zumda "miss" bo'ladi (ular
+SEARCH_CACHE_TTL tugaganda o'zi o'chadi). Keshda faqat id'lar bor — Movie
+qatorlari har doim bazadan yangi o'qiladi.
+
+Inline sahifalash uchun (handlers/inline_query_handler.py) so'rovning
+to'liq saralangan id ro'yxati ham qisqa muddat (INLINE_PAGES_TTL) saqlanadi —
+keyingi sahifalar qidiruvni qaytarmasdan shu ro'yxatdan kesib olinadi.
+
+Bir nechta replika bir vaqtda bir xil so'rovni hisoblamasligi uchun
+SEARCH_LOCK_MS > 0 bo'lsa kesh kaliti ustida qisqa Redis qulfi olinadi:
+qulfni olgan replika qidiradi va keshga yozadi, qolganlari kesh paydo
+bo'lishini kutadi (utils/search.py dagi single-flight'ga qarang).
+
+Redis ishlamasa kesh shunchaki chetlab o'tiladi (qidiruv to'xtamaydi).
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import re
+from dataclasses import dataclass
+
+from .redis_manager import r
+from .settings import INLINE_PAGES_TTL, SEARCH_CACHE_TTL, SEARCH_LOCK_MS
+
+logger = logging.getLogger(__name__)
+
+CATALOG_VERSION_KEY = "catalog:version"
+SEARCH_CACHE_PREFIX = "search:"
+INLINE_PAGES_PREFIX = "inline:"
+
+# database/init_db.py dagi uz_normalize() bilan bir xil qoidalar
+_APOSTROPHES_RE = re.compile("['‘’ʻʼ`´ʹʺ]")
+
+# O'zbek (va rus) kirill -> lotin transliteratsiyasi (kichik harflar). Natijadagi
+# apostroflar (o', g') keyin olib tashlanadi — "Ўргимчак одам" va "O'rgimchak
+# odam" bir xil "orgimchak odam" ga aylanadi. uz_normalize() SQL funksiyasi
+# shu jadvaldan yasaladi (database/init_db.py).
+CYRILLIC_TO_LATIN = {
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "yo", "ж": "j",
+    "з": "z", "и": "i", "й": "y", "к": "k", "л": "l", "м": "m", "н": "n", "о": "o",
+    "п": "p", "р": "r", "с": "s", "т": "t", "у": "u", "ф": "f", "х": "x", "ц": "ts",
+    "ч": "ch", "ш": "sh", "щ": "sh", "ъ": "", "ы": "i", "ь": "", "э": "e", "ю": "yu",
+    "я": "ya", "ў": "o", "қ": "q", "ғ": "g", "ҳ": "h",
+}
+_TRANSLIT_TABLE = str.maketrans(CYRILLIC_TO_LATIN)
+
+# Normalize qoidalari o'zgarganda eski kesh yozuvlari ishlatilmasligi uchun kalitda
+_NORMALIZE_VERSION = 2
+
+# Shu jarayon hisoblagichlari (admin statistika panelida ko'rsatiladi)
+cache_stats = {"hits": 0, "misses": 0, "errors": 0, "bumps": 0, "shared": 0, "lock_waits": 0}
+
+# Qulf egasi natijani yozishini kutishda keshni tekshirish oralig'i (soniya)
+_LOCK_POLL_INTERVAL = 0.025
+
+
+def normalize_query(query: str) -> str:
+    """So'rovni SQL'dagi uz_normalize() kabi bir xillashtirish: registr, kirill -> lotin, apostroflar."""
+    return _APOSTROPHES_RE.sub("", query.strip().lower().translate(_TRANSLIT_TABLE))
+
+
+@dataclass
+class CacheLookup:
+    key: str | None
+    version: str | None
+    ids: list[int] | None = None
+    total: int = 0
+
+    @property
+    def hit(self) -> bool:
+        return self.ids is not None
+
+
+def _cache_key(normalized: str, limit: int, offset: int) -> str:
+    digest = hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+    return f"{SEARCH_CACHE_PREFIX}n{_NORMALIZE_VERSION}:{limit}:{offset}:{digest}"
+
+
+def query_fingerprint(normalized: str) -> str:
+    """Inline next_offset ichiga sig'adigan qisqa so'rov izi (64 bayt chegarasi)."""
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:12]
+
+
+async def save_ranked_ids(fingerprint: str, ids: list[int]) -> None:
+    """Inline so'rovning to'liq saralangan natijasini keyingi sahifalar uchun saqlash."""
+    try:
+        await r.set(f"{INLINE_PAGES_PREFIX}{fingerprint}", json.dumps(ids, separators=(",", ":")), ex=INLINE_PAGES_TTL)
+    except Exception as e:
+        cache_stats["errors"] += 1
+        logger.warning("⚠️ Inline natijalarini saqlab bo'lmadi: %s", e)
+
+
+async def load_ranked_ids(fingerprint: str) -> list[int] | None:
+    """save_ranked_ids() yozgan ro'yxat (muddati o'tgan bo'lsa None)."""
+    try:
+        raw = await r.get(f"{INLINE_PAGES_PREFIX}{fingerprint}")
+    except Exception as e:
+        cache_stats["errors"] += 1
+        logger.warning("⚠️ Inline natijalarini o'qib bo'lmadi: %s", e)
+        return None
+    if not raw:
+        return None
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return None
+
+
+async def lookup(normalized: str, limit: int, offset: int) -> CacheLookup:
+    """Keshdan qidirish. Versiya va yozuv bitta MGET bilan olinadi."""
+    if SEARCH_CACHE_TTL <= 0:
+        return CacheLookup(None, None)
+    key = _cache_key(normalized, limit, offset)
+    try:
+        version, raw = await r.mget(CATALOG_VERSION_KEY, key)
+    except Exception as e:
+        cache_stats["errors"] += 1
+        logger.warning("⚠️ Qidiruv keshini o'qib bo'lmadi: %s", e)
+        return CacheLookup(None, None)
+
+    version = version or "0"
+    if raw:
+        try:
+            cached_version, total, ids = json.loads(raw)
+        except ValueError:
+            cached_version = None
+        if cached_version == version:
+            cache_stats["hits"] += 1
+            return CacheLookup(key, version, ids, total)
+    cache_stats["misses"] += 1
+    return CacheLookup(key, version)
+
+
+async def store(entry: CacheLookup, ids: list[int], total: int) -> None:
+    """Natijani lookup() paytidagi versiya bilan saqlash.
+
+    Versiya so'rovdan OLDIN olingan — shu orada katalog o'zgargan bo'lsa,
+    yozuv darhol eskirgan hisoblanadi va keyingi so'rov uni qayta hisoblaydi.
+    """
+    if entry.key is None:
+        return
+    try:
+        await r.set(entry.key, json.dumps([entry.version, total, ids], separators=(",", ":")), ex=SEARCH_CACHE_TTL)
+    except Exception as e:
+        cache_stats["errors"] += 1
+        logger.warning("⚠️ Qidiruv keshiga yozib bo'lmadi: %s", e)
+
+
+async def acquire_lock(entry: CacheLookup) -> bool:
+    """Shu kesh yozuvini hisoblash huquqi (replikalar orasida). True — hisoblash kerak."""
+    if SEARCH_LOCK_MS <= 0 or entry.key is None:
+        return True
+    try:
+        return bool(await r.set(f"{entry.key}:lock", "1", nx=True, px=SEARCH_LOCK_MS))
+    except Exception as e:
+        cache_stats["errors"] += 1
+        logger.warning("⚠️ Qidiruv qulfini olib bo'lmadi: %s", e)
+        return True
+
+
+async def release_lock(entry: CacheLookup) -> None:
+    if SEARCH_LOCK_MS <= 0 or entry.key is None:
+        return
+    try:
+        await r.delete(f"{entry.key}:lock")
+    except Exception as e:
+        cache_stats["errors"] += 1
+        logger.warning("⚠️ Qidiruv qulfini bo'shatib bo'lmadi (PX tugaganda o'zi o'chadi): %s", e)
+
+
+async def wait_for_result(normalized: str, limit: int, offset: int) -> CacheLookup:
+    """Qulf boshqa replikada — natija keshga yozilguncha (ko'pi bilan SEARCH_LOCK_MS) kutish.
+
+    Muddat tugasa oxirgi (miss) lookup qaytadi va chaqiruvchi o'zi hisoblaydi.
+    """
+    cache_stats["lock_waits"] += 1
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + SEARCH_LOCK_MS / 1000
+    while True:
+        await asyncio.sleep(_LOCK_POLL_INTERVAL)
+        entry = await lookup(normalized, limit, offset)
+        if entry.hit or entry.key is None or loop.time() >= deadline:
+            return entry
+
+
+def add_catalog_listener(callback) -> None:
+    """Katalog o'zgarishiga obuna (masalan, xotiradagi qidiruv indeksi).
+
+    callback(movie_ids: tuple) — async funksiya; bo'sh tuple butun katalog
+    o'zgarganini bildiradi.
+    """
+    if callback not in _catalog_listeners:
+        _catalog_listeners.append(callback)
+
+
+_catalog_listeners: list = []
+
+
+async def bump_catalog_version(*movie_ids: int) -> None:
+    """Kino qo'shilgan/tahrirlangan/o'chirilganda chaqiriladi — barcha qidiruv keshi eskiradi.
+
+    movie_ids — o'zgargan kinolar (obunachilar faqat shularni yangilaydi);
+    berilmasa butun katalog o'zgargan hisoblanadi.
+    """
+    try:
+        await r.incr(CATALOG_VERSION_KEY)
+        cache_stats["bumps"] += 1
+    except Exception as e:
+        cache_stats["errors"] += 1
+        logger.warning("⚠️ Katalog versiyasini oshirib bo'lmadi (kesh TTL tugaguncha eskirgan bo'lishi mumkin): %s", e)
+
+    for callback in _catalog_listeners:
+        try:
+            await callback(movie_ids)
+        except Exception as e:
+            logger.warning("⚠️ Katalog o'zgarishi obunachisi xatosi: %s", e)
@@ -1,4 +1,5 @@
 import os
+import socket
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -35,6 +36,20 @@ BOT_TOKEN = _require("BOT_TOKEN")
 ADMIN_ID = _require_int("ADMIN_ID")
 MANAGER_ID = _require_int("MANAGER_ID")
 INLINE_THUMB_URL = os.environ.get("INLINE_THUMB_URL", "https://i.postimg.cc/FsnbDKnM/IMG-0989.png")
+# Bot API HTTP ulanishlar puli (utils/telegram_http.py). Pul hajmi worker'da
+# WORKER_CONCURRENCY dan kam bo'lmasligi kerak; keep-alive ulanishlar shuncha
+# soniya bo'sh tursa yopiladi. HTTP/2: auto — "h2" o'rnatilgan bo'lsa yoqiladi.
+TELEGRAM_POOL_SIZE = max(1, int(os.environ.get("TELEGRAM_POOL_SIZE", "64")))
+TELEGRAM_KEEPALIVE_EXPIRY = float(os.environ.get("TELEGRAM_KEEPALIVE_EXPIRY", "60"))
+TELEGRAM_HTTP2 = os.environ.get("TELEGRAM_HTTP2", "auto").strip().lower()
+if TELEGRAM_HTTP2 not in ("auto", "on", "off"):
+    raise ConfigError(f"TELEGRAM_HTTP2 'auto', 'on' yoki 'off' bo'lishi kerak, lekin qiymat: {TELEGRAM_HTTP2!r}")
+TELEGRAM_CONNECT_TIMEOUT = float(os.environ.get("TELEGRAM_CONNECT_TIMEOUT", "5"))
+TELEGRAM_READ_TIMEOUT = float(os.environ.get("TELEGRAM_READ_TIMEOUT", "10"))
+TELEGRAM_WRITE_TIMEOUT = float(os.environ.get("TELEGRAM_WRITE_TIMEOUT", "10"))
+TELEGRAM_MEDIA_WRITE_TIMEOUT = float(os.environ.get("TELEGRAM_MEDIA_WRITE_TIMEOUT", "30"))
+# Bo'sh ulanishni shuncha soniya kutadi, keyin "Pool timeout" xatosi
+TELEGRAM_POOL_TIMEOUT = float(os.environ.get("TELEGRAM_POOL_TIMEOUT", "3"))
 
 # Gemini AI
 GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
@@ -42,6 +57,76 @@ GEMINI_MODEL = os.environ.get("GEMINI_MODEL", "gemini-2.5-flash")
 
 # Redis (worker navbati)
 REDIS_URL = os.environ.get("REDIS_URL", "redis://localhost")
+# Worker bir vaqtda nechta Telegram so'rovini "havoda" ushlab tura oladi.
+# Bitta chatning xabarlari baribir ketma-ket (tartib saqlanadi), turli chatlar
+# esa parallel yuboriladi. 1 — eski, to'liq ketma-ket rejim.
+WORKER_CONCURRENCY = max(1, int(os.environ.get("WORKER_CONCURRENCY", "8")))
+# Worker nusxasining noyob nomi: uning "processing" ro'yxati va heartbeat
+# kaliti shu nom bilan yuritiladi. Konteyner qayta ishga tushganda nom
+# o'zgarmaydi (hostname + pid) — oldingi hayotidan qolgan xabarlar darhol
+# qayta navbatga qaytariladi.
+WORKER_ID = os.environ.get("WORKER_ID") or f"{socket.gethostname()}:{os.getpid()}"
+# Telegram yuborish limitlari (utils/rate_limiter.py): umumiy, shaxsiy chat
+# (qisqa "burst" ruxsat etiladi) va guruh/kanal bo'yicha.
+RATE_LIMIT_GLOBAL_PER_SEC = float(os.environ.get("RATE_LIMIT_GLOBAL_PER_SEC", "30"))
+RATE_LIMIT_PRIVATE_PER_SEC = float(os.environ.get("RATE_LIMIT_PRIVATE_PER_SEC", "1"))
+RATE_LIMIT_PRIVATE_BURST = int(os.environ.get("RATE_LIMIT_PRIVATE_BURST", "3"))
+RATE_LIMIT_GROUP_PER_MIN = float(os.environ.get("RATE_LIMIT_GROUP_PER_MIN", "20"))
+# Navbat transporti (utils/queue_transport.py): "list" — Redis LIST +
+# processing ro'yxatlari; "stream" — Redis Streams consumer group (bir nechta
+# worker replikasi uchun tavsiya etiladi: docker compose up --scale worker=N).
+QUEUE_BACKEND = os.environ.get("QUEUE_BACKEND", "list").strip().lower()
+if QUEUE_BACKEND not in ("list", "stream"):
+    raise ConfigError(f"QUEUE_BACKEND 'list' yoki 'stream' bo'lishi kerak, lekin qiymat: {QUEUE_BACKEND!r}")
+# Stream navbatida shundan ko'p yuborilmagan xabar bo'lsa worker log'da
+# ogohlantiradi (0 — o'chirilgan). Xabarlar o'chirilmaydi — ACK qilinganlari
+# XDEL bilan o'chgani uchun xotira yuborilmagan xabarlar bilan chegaralangan.
+QUEUE_STREAM_MAXLEN = int(os.environ.get("QUEUE_STREAM_MAXLEN", "100000"))
+# Shuncha soniya "tirik" deb belgilanmagan pending xabar boshqa worker
+# tomonidan qaytarib olinadi (XAUTOCLAIM)
+STREAM_CLAIM_IDLE = float(os.environ.get("STREAM_CLAIM_IDLE", "60"))
+# Navbat payloadlari formati (utils/queue_codec.py): "compact" — msgpack/zlib,
+# "json" — eski format. Worker ikkalasini ham o'qiydi; yangilashda avval
+# worker'ni, keyin bot'ni "compact" ga o'tkazish xavfsiz.
+QUEUE_CODEC = os.environ.get("QUEUE_CODEC", "compact").strip().lower()
+if QUEUE_CODEC not in ("compact", "json"):
+    raise ConfigError(f"QUEUE_CODEC 'compact' yoki 'json' bo'lishi kerak, lekin qiymat: {QUEUE_CODEC!r}")
+# Dead-letter stream (urinishlari tugagan xabarlar) taxminan shundan oshmaydi
+DEAD_LETTER_MAXLEN = int(os.environ.get("DEAD_LETTER_MAXLEN", "10000"))
+# Dead-letter'dan qayta yuborishda soniyasiga nechta xabar navbatga qaytariladi
+DEAD_LETTER_REPLAY_RATE = float(os.environ.get("DEAD_LETTER_REPLAY_RATE", "20"))
+# Worker metrikalari (utils/queue_metrics.py): METRICS_PORT berilsa worker shu
+# port'da Prometheus formatida /metrics beradi (0 — o'chirilgan). Redis'dagi
+# snapshot (admin panel uchun) har doim yoziladi.
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "0"))
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")
+
+# Qidiruv natijalari keshi (utils/search_cache.py), soniya. 0 — o'chirilgan.
+SEARCH_CACHE_TTL = int(os.environ.get("SEARCH_CACHE_TTL", "600"))
+# Bir xil so'rovni replikalar orasida bir marta hisoblash uchun Redis qulfi
+# muddati (millisekund). 0 — faqat jarayon ichidagi single-flight.
+SEARCH_LOCK_MS = int(os.environ.get("SEARCH_LOCK_MS", "0"))
+# Qidiruv dvigateli: "postgres" — pg_trgm (utils/search.py), "memory" — jarayon
+# ichidagi trigram indeksi (utils/trigram_index.py), "auto" — pg_trgm tayyor
+# bo'lmasa (huquq yo'q, SQLite) avtomatik "memory".
+SEARCH_ENGINE = os.environ.get("SEARCH_ENGINE", "auto").strip().lower()
+if SEARCH_ENGINE not in ("auto", "postgres", "memory"):
+    raise ConfigError(f"SEARCH_ENGINE 'auto', 'postgres' yoki 'memory' bo'lishi kerak, lekin qiymat: {SEARCH_ENGINE!r}")
+# Inline qidiruvda shu uzunlikkacha (normalize qilingan) so'rovlar prefiks
+# indeksidan javob oladi (utils/autocomplete.py), uzunroqlari — fuzzy. 0 — o'chirilgan.
+AUTOCOMPLETE_MAX_LEN = int(os.environ.get("AUTOCOMPLETE_MAX_LEN", "3"))
+# Inline qidiruv sahifasi hajmi (Telegram chegarasi — 50) va keyingi sahifalar
+# uchun saralangan natija ro'yxati Redis'da qancha saqlanishi (soniya).
+INLINE_PAGE_SIZE = int(os.environ.get("INLINE_PAGE_SIZE", "15"))
+if not 1 <= INLINE_PAGE_SIZE <= 50:
+    raise ConfigError(f"INLINE_PAGE_SIZE 1 dan 50 gacha bo'lishi kerak, lekin qiymat: {INLINE_PAGE_SIZE}")
+INLINE_PAGES_TTL = int(os.environ.get("INLINE_PAGES_TTL", "120"))
+# Inline natija turi: "article" — /kino <kod> matni yuboriladi (bot javob
+# beradi), "media" — file_id/poster bor kinolar video/rasm sifatida
+# to'g'ridan-to'g'ri yuboriladi (ko'rish chosen_inline_result orqali yoziladi).
+INLINE_RESULT_TYPE = os.environ.get("INLINE_RESULT_TYPE", "article").strip().lower()
+if INLINE_RESULT_TYPE not in ("article", "media"):
+    raise ConfigError(f"INLINE_RESULT_TYPE 'article' yoki 'media' bo'lishi kerak, lekin qiymat: {INLINE_RESULT_TYPE!r}")
 
 # Ma'lumotlar bazasi
 DB_NAME = _require("DB_NAME")
@@ -0,0 +1,98 @@
+"""Telegram Bot API uchun sozlangan HTTP ulanishlar puli.
+
+PTB'ning standart HTTPXRequest'i ulanishlarni 5 soniya bo'sh turgandan keyin
+yopadi (httpx keepalive_expiry) — xabarlar to'lqin bo'lib kelganda har safar
+yangi TCP+TLS ulanish ochiladi. Bu yerda pul hajmi, keep-alive, HTTP/2 va
+timeout'lar .env orqali sozlanadi (utils/settings.py, TELEGRAM_HTTP_*).
+
+PooledHTTPXRequest pul bandligini ham o'lchaydi: hozir "havoda"gi so'rovlar,
+oraliqdagi eng yuqori qiymat va "Pool timeout" (bo'sh ulanish kutib
+ulgurmagan) holatlari — worker metrikalari (utils/queue_metrics.py) orqali
+ko'rinadi.
+"""
+import importlib.util
+import logging
+
+import httpx
+from telegram.error import TimedOut
+from telegram.request import HTTPXRequest
+
+from .settings import (
+    TELEGRAM_HTTP2, TELEGRAM_KEEPALIVE_EXPIRY, TELEGRAM_POOL_SIZE, TELEGRAM_POOL_TIMEOUT,
+    TELEGRAM_CONNECT_TIMEOUT, TELEGRAM_READ_TIMEOUT, TELEGRAM_WRITE_TIMEOUT, TELEGRAM_MEDIA_WRITE_TIMEOUT,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _http2_enabled() -> bool:
+    if TELEGRAM_HTTP2 == "off":
+        return False
+    available = importlib.util.find_spec("h2") is not None
+    if TELEGRAM_HTTP2 == "on" and not available:
+        logger.warning("⚠️ TELEGRAM_HTTP2=on, lekin 'h2' o'rnatilmagan (pip install httpx[http2]) — HTTP/1.1 ishlatiladi")
+    return available
+
+
+class PooledHTTPXRequest(HTTPXRequest):
+    def __init__(self, *, pool_size: int = TELEGRAM_POOL_SIZE, on_pool_timeout=None):
+        http2 = _http2_enabled()
+        super().__init__(
+            connection_pool_size=pool_size,
+            connect_timeout=TELEGRAM_CONNECT_TIMEOUT,
+            read_timeout=TELEGRAM_READ_TIMEOUT,
+            write_timeout=TELEGRAM_WRITE_TIMEOUT,
+            media_write_timeout=TELEGRAM_MEDIA_WRITE_TIMEOUT,
+            pool_timeout=TELEGRAM_POOL_TIMEOUT,
+            http_version="2" if http2 else "1.1",
+            httpx_kwargs={
+                "limits": httpx.Limits(
+                    max_connections=pool_size,
+                    max_keepalive_connections=pool_size,
+                    keepalive_expiry=TELEGRAM_KEEPALIVE_EXPIRY,
+                ),
+            },
+        )
+        self.pool_size = pool_size
+        self.http2 = http2
+        self.in_flight = 0
+        self.peak = 0
+        self.pool_timeouts = 0
+        self._on_pool_timeout = on_pool_timeout
+
+    async def do_request(self, *args, **kwargs):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            return await super().do_request(*args, **kwargs)
+        except TimedOut as e:
+            if "pool timeout" in str(e).lower():
+                self.pool_timeouts += 1
+                if self._on_pool_timeout is not None:
+                    self._on_pool_timeout()
+            raise
+        finally:
+            self.in_flight -= 1
+
+    def gauges(self, *, reset_peak: bool = False) -> dict:
+        """Pul bandligi. in_flight ulanish kutayotganlarni ham o'z ichiga oladi —
+        pool_size dan oshsa, so'rovlar pulda navbat kutmoqda (to'yinish).
+        reset_peak=True — "peak" keyingi oraliq uchun qaytadan hisoblanadi.
+        """
+        peak = self.peak
+        if reset_peak:
+            self.peak = self.in_flight
+        return {
+            "http_pool_size": self.pool_size,
+            "http_in_flight": self.in_flight,
+            "http_in_flight_peak": peak,
+        }
+
+
+def build_request(**kwargs) -> PooledHTTPXRequest:
+    request = PooledHTTPXRequest(**kwargs)
+    logger.info(
+        "🌐 Telegram HTTP pul: %s ulanish, keep-alive %ss, %s",
+        request.pool_size, TELEGRAM_KEEPALIVE_EXPIRY, "HTTP/2" if request.http2 else "HTTP/1.1",
+    )
+    return request
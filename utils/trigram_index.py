@@ -0,0 +1,210 @@
+"""Jarayon ichidagi (xotiradagi) trigram qidiruv dvigateli.
+
+pg_trgm o'rnatilmagan (huquq yetishmaydi, SQLite/dev) yoki qidiruvni
+Postgres'ga umuman bormasdan bajarish kerak bo'lgan holatlar uchun
+(SEARCH_ENGINE=memory). Katalog bir necha o'n ming nom — xotiraga bemalol
+sig'adi.
+
+Qidiruv faqat so'rov bilan umumiy trigrami bor kinolarni (postings orqali)
+baholaydi — katalogni to'liq aylanmaydi (faqat 1-2 harfli so'zlardan
+iborat so'rovda substring uchun to'liq ko'rib chiqiladi).
+
+Natija SQL yo'li (utils/search.py) bilan bir xil:
+  • trigramlar pg_trgm kabi olinadi: har bir so'z "  so'z " ko'rinishida
+    to'ldiriladi, o'xshashlik — umumiy trigramlar / barcha trigramlar;
+  • mos kelish: normalize qilingan nomda substring YOKI o'xshashlik > chegara;
+  • tartib: substring mosligi, o'xshashlik, keyin movie_name (Python satr
+    tartibi — Postgres collation'idan teng nomlarda farq qilishi mumkin);
+  • ota-kino nomini meros qilgan qismlar chiqarilmaydi.
+
+Indeks ishga tushganda to'liq yuklanadi (load_search_index), kino
+tahrirlanganda bump_catalog_version(movie_id) orqali shu kino (va uning
+qismlari) qayta o'qiladi. Boshqa jarayonlardagi o'zgarishlar uchun davriy
+to'liq qayta yuklash job'i bor.
+"""
+import logging
+import re
+import time
+
+from .search_cache import add_catalog_listener, normalize_query
+from .settings import SEARCH_ENGINE
+
+logger = logging.getLogger(__name__)
+
+SEARCH_INDEX_JOB_NAME = "search_index_refresh"
+SEARCH_INDEX_REFRESH_INTERVAL = 300
+
+# pg_trgm so'z belgilari: harf va raqamlar (pastki chiziq ajratuvchi)
+_WORD_RE = re.compile(r"[^\W_]+")
+
+
+def trigrams(text: str) -> frozenset:
+    """pg_trgm show_trgm() bilan bir xil trigramlar to'plami."""
+    result = set()
+    for word in _WORD_RE.findall(text):
+        padded = f"  {word} "
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(result)
+
+
+class TrigramIndex:
+    def __init__(self):
+        self.active = False
+        # movie_id -> (nomi, normalize qilingan nomi, trigramlar, ota id, meros qilganmi)
+        self._movies: dict[int, tuple] = {}
+        # trigram -> shu trigramli (qidiriladigan) kino id'lari
+        self._postings: dict[str, set] = {}
+        self.loaded_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self._movies)
+
+    # ---------- yozish ----------
+
+    def _add(self, movie_id: int, name: str, parent_id: int | None, inherits: bool) -> None:
+        norm = normalize_query(name)
+        grams = trigrams(norm)
+        self._movies[movie_id] = (name, norm, grams, parent_id, inherits)
+        if not inherits:
+            for gram in grams:
+                self._postings.setdefault(gram, set()).add(movie_id)
+
+    def _remove(self, movie_id: int) -> None:
+        entry = self._movies.pop(movie_id, None)
+        if entry is None or entry[4]:
+            return
+        for gram in entry[2]:
+            ids = self._postings.get(gram)
+            if ids is not None:
+                ids.discard(movie_id)
+                if not ids:
+                    del self._postings[gram]
+
+    def replace(self, rows: list[tuple]) -> None:
+        """To'liq qayta qurish. rows — (movie_id, movie_name, parent_movie_id)."""
+        names = {movie_id: name for movie_id, name, _ in rows}
+        self._movies = {}
+        self._postings = {}
+        for movie_id, name, parent_id in rows:
+            self._add(movie_id, name, parent_id, parent_id is not None and names.get(parent_id) == name)
+        self.loaded_at = time.time()
+
+    def update(self, movie_ids: set, rows: list[tuple]) -> None:
+        """Berilgan kinolar va ularning qismlarini yangilash.
+
+        rows — bazadagi joriy holat: movie_ids dagi va ularga tegishli qismlar.
+        Bazada yo'q (o'chirilgan) id'lar va ularning qismlari indeksdan chiqadi.
+        """
+        stale = set(movie_ids)
+        stale.update(i for i, entry in self._movies.items() if entry[3] in movie_ids)
+        for movie_id in stale:
+            self._remove(movie_id)
+        names = {movie_id: name for movie_id, name, _ in rows}
+        for movie_id, name, parent_id in rows:
+            parent_name = names.get(parent_id)
+            if parent_name is None and parent_id in self._movies:
+                parent_name = self._movies[parent_id][0]
+            self._add(movie_id, name, parent_id, parent_id is not None and parent_name == name)
+
+    # ---------- qidirish ----------
+
+    def search(self, query: str, *, limit: int, offset: int = 0, threshold: float) -> tuple[list[int], int]:
+        """SQL qidiruvi bilan bir xil saralangan id'lar sahifasi va jami son."""
+        norm = normalize_query(query)
+        query_grams = trigrams(norm)
+
+        shared: dict[int, int] = {}
+        for gram in query_grams:
+            for movie_id in self._postings.get(gram, ()):
+                shared[movie_id] = shared.get(movie_id, 0) + 1
+
+        # Nomzodlar — kamida bitta umumiy trigrami borlar: o'xshashlik > 0
+        # faqat ularda. Substring mosligi ham shular ichida, agar so'rovda
+        # 3+ harfli so'z bo'lsa (uning ichki trigrami nomda ham bor). Faqat
+        # 1-2 harfli so'zlardan iborat so'rovda substring uchun butun katalog
+        # ko'riladi (bunday so'rovlarni odatda utils/autocomplete.py oladi).
+        candidates = shared.keys()
+        if not any(len(word) >= 3 for word in _WORD_RE.findall(norm)):
+            candidates = {movie_id for movie_id, entry in self._movies.items() if norm in entry[1]} | shared.keys()
+
+        scored = []
+        n_query = len(query_grams)
+        for movie_id in candidates:
+            name, movie_norm, grams, _, inherits = self._movies[movie_id]
+            if inherits:
+                continue
+            common = shared.get(movie_id, 0)
+            union = n_query + len(grams) - common
+            similarity = common / union if union else 0.0
+            contains = norm in movie_norm
+            if contains or similarity > threshold:
+                scored.append((not contains, -similarity, name, movie_id))
+
+        scored.sort()
+        return [row[3] for row in scored[offset:offset + limit]], len(scored)
+
+
+search_index = TrigramIndex()
+
+
+async def _fetch_rows(movie_ids: set | None = None) -> list[tuple]:
+    from tortoise.expressions import Q
+
+    from database import Movie
+
+    qs = Movie.all()
+    if movie_ids is not None:
+        qs = Movie.filter(Q(movie_id__in=movie_ids) | Q(parent_movie_id__in=movie_ids))
+    return await qs.values_list("movie_id", "movie_name", "parent_movie_id")
+
+
+async def load_search_index(context=None) -> None:
+    """Indeksni bazadan to'liq qayta yuklash (ishga tushganda va JobQueue callback)."""
+    if not search_index.active:
+        return
+    try:
+        started = time.perf_counter()
+        search_index.replace(await _fetch_rows())
+        logger.info(
+            "🔎 Xotiradagi qidiruv indeksi yuklandi: %s ta kino, %.0f ms",
+            len(search_index), (time.perf_counter() - started) * 1000,
+        )
+    except Exception as e:
+        logger.warning("⚠️ Qidiruv indeksini yuklab bo'lmadi: %s", e)
+
+
+async def _on_catalog_change(movie_ids: tuple) -> None:
+    if not search_index.active:
+        return
+    if not movie_ids:
+        # Butun katalog o'zgargan (masalan, backup tiklandi)
+        await load_search_index()
+        return
+    ids = set(movie_ids)
+    try:
+        search_index.update(ids, await _fetch_rows(ids))
+    except Exception as e:
+        logger.warning("⚠️ Qidiruv indeksini yangilab bo'lmadi (%s): %s", ids, e)
+
+
+async def setup_search_engine(pg_trgm_ready: bool) -> None:
+    """Qaysi qidiruv dvigateli ishlatilishini aniqlash va kerak bo'lsa indeksni yuklash."""
+    search_index.active = SEARCH_ENGINE == "memory" or (SEARCH_ENGINE == "auto" and not pg_trgm_ready)
+    if not search_index.active:
+        return
+    if SEARCH_ENGINE == "auto":
+        logger.warning("⚠️ pg_trgm mavjud emas — qidiruv xotiradagi trigram indeksiga o'tkazildi")
+    add_catalog_listener(_on_catalog_change)
+    await load_search_index()
+
+
+def schedule_search_index_refresh(job_queue) -> None:
+    """Boshqa jarayonlar (replikalar) qilgan o'zgarishlar uchun davriy to'liq yuklash."""
+    if not search_index.active:
+        return
+    for job in job_queue.get_jobs_by_name(SEARCH_INDEX_JOB_NAME):
+        job.schedule_removal()
+    job_queue.run_repeating(
+        load_search_index, interval=SEARCH_INDEX_REFRESH_INTERVAL, first=SEARCH_INDEX_REFRESH_INTERVAL,
+        name=SEARCH_INDEX_JOB_NAME,
+    )